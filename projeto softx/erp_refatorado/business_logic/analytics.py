@@ -0,0 +1,211 @@
+# Em erp_refatorado/business_logic/analytics.py
+
+from dataclasses import dataclass, field
+from config import STREAM_BATCH_SIZE
+from erp_refatorado.database.database_manager import DatabaseManager
+from erp_refatorado.models.money import Money
+
+# numpy e pyarrow são opcionais: o restante do sistema funciona sem eles, e só as
+# funções que devolvem arrays (to_numpy, to_arrow e as análises abaixo) os exigem.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# Carga de tabelas/consultas em formato colunar, para análises vetorizadas em vez de
+# laços sobre listas de dataclasses. As linhas são lidas em lotes (DatabaseManager.stream)
+# direto para uma lista por coluna, sem criar um objeto por linha.
+#
+# Tipos de coluna:
+#   'int'      - inteiro (int64); NULL vira 0 no NumPy (ids começam em 1)
+#   'money'    - centavos (int64), como Money; somas continuam exatas
+#   'float'    - float64; NULL vira NaN
+#   'text'     - texto; NULL vira "" no NumPy
+#   'datetime' - "AAAA-MM-DD HH:MM:SS" -> datetime64[s] / timestamp[s]; NULL vira NaT
+COLUMN_TYPES = {
+    'produtos': {'id_produto': 'int', 'nome': 'text', 'descricao': 'text', 'preco_venda': 'money',
+                 'preco_compra': 'money', 'fornecedor_id': 'int'},
+    'estoque': {'id_estoque': 'int', 'produto_id': 'int', 'quantidade': 'int'},
+    'vendas': {'id_vendas': 'int', 'cliente_id': 'int', 'usuario_id': 'int', 'data_venda': 'datetime',
+               'total': 'money', 'desconto': 'money'},
+    'itens_venda': {'id_item': 'int', 'venda_id': 'int', 'produto_id': 'int', 'quantidade': 'int',
+                    'preco_unitario': 'money', 'subtotal': 'money'},
+    'vendas_diarias': {'dia': 'text', 'usuario_id': 'int', 'cliente_id': 'int', 'vendas': 'int', 'itens': 'int',
+                       'desconto': 'money', 'total': 'money'},
+    'compras': {'id_compras': 'int', 'fornecedor_id': 'int', 'usuario_id': 'int', 'data_compra': 'datetime',
+                'total': 'money'},
+    'financeiro': {'id_financeiro': 'int', 'tipo': 'text', 'valor': 'money', 'descricao': 'text',
+                   'data': 'datetime'},
+    'financeiro_diario': {'dia': 'text', 'entradas': 'money', 'saidas': 'money'},
+    'financeiro_fechamento': {'periodo': 'text', 'ate': 'text', 'entradas': 'money', 'saidas': 'money',
+                              'saldo': 'money', 'data_fechamento': 'datetime'},
+}
+
+# Tipo de cada nome de coluna conhecido, para consultas livres (JOINs, aliases)
+_KNOWN_TYPES = {name: kind for columns in COLUMN_TYPES.values() for name, kind in columns.items()}
+
+
+@dataclass(slots=True)
+class ColumnSet:
+    """Resultado de uma consulta em colunas: data[nome] é a lista de valores da coluna."""
+    names: list = field(default_factory=list)
+    types: dict = field(default_factory=dict)
+    data: dict = field(default_factory=dict)
+
+    def __len__(self):
+        return len(self.data[self.names[0]]) if self.names else 0
+
+
+def _require(module, name):
+    if module is None:
+        raise ImportError(f"Esta função precisa do pacote opcional '{name}' (pip install {name})")
+
+
+def _infer_type(values):
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, int):
+            return 'int'
+        if isinstance(value, float):
+            return 'float'
+        return 'text'
+    return 'text'
+
+
+def load_columns(db_manager: DatabaseManager, source, params=(), types=None,
+                 batch_size: int = STREAM_BATCH_SIZE) -> ColumnSet:
+    """
+    Lê uma tabela (um dos nomes de COLUMN_TYPES) ou o resultado de um SELECT em colunas.
+    O tipo de cada coluna vem de types, do nome (se for uma coluna conhecida) ou, em
+    último caso, do primeiro valor não nulo.
+    """
+    if source in COLUMN_TYPES:
+        sql = f"SELECT {', '.join(COLUMN_TYPES[source])} FROM {source}"
+    else:
+        sql = source
+    result = ColumnSet()
+    columns = None
+
+    def start(cursor):
+        # Chamado pelo stream logo após o execute, quando os nomes das colunas já são conhecidos
+        nonlocal columns
+        result.names = [column[0] for column in cursor.description]
+        columns = [result.data.setdefault(name, []) for name in result.names]
+        return None
+
+    batch = []
+    for row in db_manager.stream(sql, params, mapper=start, batch_size=batch_size):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            for column, values in zip(columns, zip(*batch)):
+                column.extend(values)
+            batch.clear()
+    if batch:
+        for column, values in zip(columns, zip(*batch)):
+            column.extend(values)
+
+    types = types or {}
+    for name in result.names:
+        result.types[name] = types.get(name) or _KNOWN_TYPES.get(name) or _infer_type(result.data[name])
+    return result
+
+
+def _numpy_column(values, kind):
+    if kind in ('int', 'money'):
+        return np.fromiter((0 if value is None else value for value in values), dtype=np.int64, count=len(values))
+    if kind == 'float':
+        return np.fromiter((np.nan if value is None else value for value in values), dtype=np.float64,
+                           count=len(values))
+    if kind == 'datetime':
+        return np.array(['NaT' if not value else value.replace(' ', 'T') for value in values],
+                        dtype='datetime64[s]')
+    return np.array(['' if value is None else str(value) for value in values], dtype=str)
+
+
+def to_numpy(columns: ColumnSet):
+    """Converte um ColumnSet num array estruturado do NumPy (um campo tipado por coluna)."""
+    _require(np, 'numpy')
+    arrays = [_numpy_column(columns.data[name], columns.types[name]) for name in columns.names]
+    result = np.empty(len(columns), dtype=[(name, array.dtype) for name, array in zip(columns.names, arrays)])
+    for name, array in zip(columns.names, arrays):
+        result[name] = array
+    return result
+
+
+def _arrow_column(values, kind):
+    if kind == 'datetime':
+        return pa.array(values, type=pa.string()).cast(pa.timestamp('s'))
+    arrow_type = {'int': pa.int64(), 'money': pa.int64(), 'float': pa.float64()}.get(kind, pa.string())
+    return pa.array(values, type=arrow_type)
+
+
+def to_arrow(columns: ColumnSet):
+    """Converte um ColumnSet numa pyarrow.Table. NULLs viram nulos do Arrow; dinheiro fica em centavos (int64)."""
+    _require(pa, 'pyarrow')
+    arrays = [_arrow_column(columns.data[name], columns.types[name]) for name in columns.names]
+    fields = [pa.field(name, array.type, metadata={'unit': 'centavos'} if columns.types[name] == 'money' else None)
+              for name, array in zip(columns.names, arrays)]
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+
+def fetch_numpy(db_manager: DatabaseManager, source, params=(), types=None):
+    """load_columns + to_numpy: tabela ou SELECT como array estruturado."""
+    _require(np, 'numpy')
+    return to_numpy(load_columns(db_manager, source, params, types))
+
+
+def fetch_arrow(db_manager: DatabaseManager, source, params=(), types=None):
+    """load_columns + to_arrow: tabela ou SELECT como pyarrow.Table."""
+    _require(pa, 'pyarrow')
+    return to_arrow(load_columns(db_manager, source, params, types))
+
+
+# Produto com a quantidade em estoque, base das análises abaixo
+STOCK_SQL = """ SELECT p.id_produto, p.fornecedor_id, p.preco_venda, p.preco_compra,
+                       COALESCE(s.quantidade, 0) AS quantidade
+                FROM produtos p LEFT JOIN estoque s ON s.produto_id = p.id_produto """
+
+
+def stock_valuation(db_manager: DatabaseManager):
+    """
+    Valor do estoque a preço de custo (preco_compra * quantidade).
+    Retorna (array com id_produto, quantidade e valor por produto, total em Money).
+    """
+    data = fetch_numpy(db_manager, STOCK_SQL)
+    result = np.empty(len(data), dtype=[('id_produto', np.int64), ('quantidade', np.int64), ('valor', np.int64)])
+    result['id_produto'] = data['id_produto']
+    result['quantidade'] = data['quantidade']
+    result['valor'] = data['preco_compra'] * data['quantidade']
+    return result, Money(int(result['valor'].sum()))
+
+
+def margin_by_supplier(db_manager: DatabaseManager):
+    """
+    Margem do estoque atual por fornecedor: receita (preco_venda * quantidade), custo
+    (preco_compra * quantidade), margem em centavos e margem percentual sobre a receita.
+    fornecedor_id 0 agrupa os produtos sem fornecedor.
+    """
+    data = fetch_numpy(db_manager, STOCK_SQL)
+    suppliers, group = np.unique(data['fornecedor_id'], return_inverse=True)
+    # Somas agrupadas em int64, exatas (bincount somaria em float64)
+    revenue = np.zeros(len(suppliers), dtype=np.int64)
+    cost = np.zeros(len(suppliers), dtype=np.int64)
+    np.add.at(revenue, group, data['preco_venda'] * data['quantidade'])
+    np.add.at(cost, group, data['preco_compra'] * data['quantidade'])
+
+    result = np.empty(len(suppliers), dtype=[('fornecedor_id', np.int64), ('receita', np.int64),
+                                             ('custo', np.int64), ('margem', np.int64),
+                                             ('margem_pct', np.float64)])
+    result['fornecedor_id'] = suppliers
+    result['receita'] = revenue
+    result['custo'] = cost
+    result['margem'] = revenue - cost
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result['margem_pct'] = np.where(revenue > 0, (revenue - cost) * 100.0 / revenue, 0.0)
+    return result
@@ -0,0 +1,215 @@
+# Em erp_refatorado/business_logic/async_managers.py
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config import ASYNC_MAX_WORKERS, ASYNC_TIMEOUT
+from erp_refatorado.database.database_manager import DatabaseManager
+from erp_refatorado.business_logic.client_manager import ClientManager
+from erp_refatorado.business_logic.financial_manager import FinancialManager
+from erp_refatorado.business_logic.product_manager import ProductManager
+from erp_refatorado.business_logic.sale_manager import SaleManager
+from erp_refatorado.business_logic.supplier_manager import SupplierManager
+from erp_refatorado.business_logic.user_manager import UserManager
+
+# Fachada asyncio para os managers. Cada método "await"-ável chama o método síncrono
+# correspondente (mesmo SQL, mesmo código) numa thread de um executor limitado; cada
+# thread usa sua própria conexão do pool enquanto a chamada dura.
+#
+#     async_db = AsyncDatabase(db_manager)
+#     clientes = AsyncClientManager(async_db)
+#     pagina, produtos = await asyncio.gather(clientes.get_clients_page(),
+#                                             AsyncProductManager(async_db).search_product("caneta"))
+#
+# Timeout e cancelamento interrompem a consulta em andamento (sqlite3 interrupt) e
+# desfazem o que ela ainda não confirmou.
+
+
+class _Call:
+    """Uma chamada enviada ao executor, com o que é preciso para interrompê-la."""
+
+    def __init__(self, db_manager, fn, args, kwargs):
+        self.db_manager = db_manager
+        self.fn, self.args, self.kwargs = fn, args, kwargs
+        self._lock = threading.Lock()
+        self._conn = None
+        self._cancelled = False
+
+    def run(self):
+        with self._lock:
+            if self._cancelled:
+                raise asyncio.CancelledError()
+        # Abre o escopo aqui para saber qual conexão interromper; os "with" do
+        # manager chamado reutilizam esta mesma conexão
+        with self.db_manager as cursor:
+            with self._lock:
+                self._conn = cursor.connection
+            try:
+                return self.fn(*self.args, **self.kwargs)
+            finally:
+                with self._lock:
+                    self._conn = None
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True
+            if self._conn is not None:
+                # A consulta em andamento falha com "interrupted" e o escopo faz rollback
+                self._conn.interrupt()
+
+
+class AsyncDatabase:
+    """
+    Executor compartilhado pelos managers assíncronos. max_workers limita quantas
+    chamadas rodam ao mesmo tempo (e portanto quantas conexões ficam emprestadas);
+    por padrão é o tamanho do pool, para não abrir conexões excedentes.
+    """
+
+    def __init__(self, db_manager: DatabaseManager = None, max_workers: int = ASYNC_MAX_WORKERS,
+                 timeout: float = ASYNC_TIMEOUT):
+        self.db_manager = db_manager or DatabaseManager()
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="softx-async")
+
+    async def run(self, fn, *args, timeout=None, **kwargs):
+        """
+        Executa fn(*args, **kwargs) no executor. timeout (em segundos) substitui o
+        padrão; ao estourar, levanta asyncio.TimeoutError e interrompe a consulta.
+        """
+        call = _Call(self.db_manager, fn, args, kwargs)
+        future = asyncio.get_running_loop().run_in_executor(self.executor, call.run)
+        try:
+            return await asyncio.wait_for(future, timeout if timeout is not None else self.timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            call.cancel()
+            raise
+
+    def close(self, wait=True):
+        """Encerra o executor, descartando as chamadas que ainda não começaram."""
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _async_method(name):
+    # Gera a versão assíncrona do método "name" do manager síncrono
+    async def method(self, *args, timeout=None, **kwargs):
+        return await self.async_db.run(getattr(self.manager, name), *args, timeout=timeout, **kwargs)
+    method.__name__ = name
+    method.__doc__ = f"Versão assíncrona de {name}. Aceita timeout= (segundos)."
+    return method
+
+
+class _AsyncManager:
+    manager_class = None
+
+    def __init__(self, async_db: AsyncDatabase = None, manager=None):
+        self.async_db = async_db or AsyncDatabase()
+        self.manager = manager or self.manager_class(self.async_db.db_manager)
+
+
+class AsyncClientManager(_AsyncManager):
+    manager_class = ClientManager
+
+    add_client = _async_method('add_client')
+    add_many = _async_method('add_many')
+    update_many = _async_method('update_many')
+    delete_many = _async_method('delete_many')
+    get_all_clients = _async_method('get_all_clients')
+    get_clients_page = _async_method('get_clients_page')
+    search_clients_page = _async_method('search_clients_page')
+    delete_client = _async_method('delete_client')
+    update_client = _async_method('update_client')
+    search_client = _async_method('search_client')
+    get_client_by_id = _async_method('get_client_by_id')
+    get_client_by_cpf = _async_method('get_client_by_cpf')
+    get_clients_by_phone = _async_method('get_clients_by_phone')
+
+
+class AsyncSupplierManager(_AsyncManager):
+    manager_class = SupplierManager
+
+    add_supplier = _async_method('add_supplier')
+    add_many = _async_method('add_many')
+    update_many = _async_method('update_many')
+    delete_many = _async_method('delete_many')
+    get_all_suppliers = _async_method('get_all_suppliers')
+    get_suppliers_page = _async_method('get_suppliers_page')
+    search_suppliers_page = _async_method('search_suppliers_page')
+    delete_supplier = _async_method('delete_supplier')
+    update_supplier = _async_method('update_supplier')
+    search_supplier = _async_method('search_supplier')
+    get_supplier_by_id = _async_method('get_supplier_by_id')
+    get_supplier_by_cnpj = _async_method('get_supplier_by_cnpj')
+
+
+class AsyncProductManager(_AsyncManager):
+    manager_class = ProductManager
+
+    add_product = _async_method('add_product')
+    add_many = _async_method('add_many')
+    update_many = _async_method('update_many')
+    delete_many = _async_method('delete_many')
+    get_all_products = _async_method('get_all_products')
+    get_products_page = _async_method('get_products_page')
+    search_products_page = _async_method('search_products_page')
+    delete_product = _async_method('delete_product')
+    update_product = _async_method('update_product')
+    update_stock = _async_method('update_stock')
+    adjust_stock = _async_method('adjust_stock')
+    decrement_stock = _async_method('decrement_stock')
+    decrement_stock_many = _async_method('decrement_stock_many')
+    reserve_stock = _async_method('reserve_stock')
+    release_stock = _async_method('release_stock')
+    check_stock = _async_method('check_stock')
+    get_stock_movements = _async_method('get_stock_movements')
+    checkpoint_stock = _async_method('checkpoint_stock')
+    verify_stock = _async_method('verify_stock')
+    rebuild_stock = _async_method('rebuild_stock')
+    search_product = _async_method('search_product')
+    get_product_by_id = _async_method('get_product_by_id')
+
+
+class AsyncUserManager(_AsyncManager):
+    manager_class = UserManager
+
+    add_user = _async_method('add_user')
+    add_many = _async_method('add_many')
+    update_many = _async_method('update_many')
+    delete_many = _async_method('delete_many')
+    get_all_users = _async_method('get_all_users')
+    get_users_page = _async_method('get_users_page')
+    search_users_page = _async_method('search_users_page')
+    delete_user = _async_method('delete_user')
+    update_user = _async_method('update_user')
+    search_user = _async_method('search_user')
+    get_user_by_id = _async_method('get_user_by_id')
+    authenticate_user = _async_method('authenticate_user')
+    get_user_by_username = _async_method('get_user_by_username')
+    get_user_by_email = _async_method('get_user_by_email')
+
+
+class AsyncSaleManager(_AsyncManager):
+    manager_class = SaleManager
+
+    finalize_sale = _async_method('finalize_sale')
+    get_sale = _async_method('get_sale')
+    get_sale_items = _async_method('get_sale_items')
+    get_sales_history = _async_method('get_sales_history')
+    rebuild_sales_history = _async_method('rebuild_sales_history')
+
+
+class AsyncFinancialManager(_AsyncManager):
+    manager_class = FinancialManager
+
+    post_entry = _async_method('post_entry')
+    get_entries = _async_method('get_entries')
+    get_balance = _async_method('get_balance')
+    get_daily_balances = _async_method('get_daily_balances')
+    close_periods = _async_method('close_periods')
+    get_closings = _async_method('get_closings')
+    rebuild_daily_totals = _async_method('rebuild_daily_totals')
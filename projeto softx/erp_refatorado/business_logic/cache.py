@@ -0,0 +1,173 @@
+# Em erp_refatorado/business_logic/cache.py
+
+import functools
+import threading
+from collections import OrderedDict
+from config import CACHE_ENABLED, CACHE_MAX_ENTITIES, CACHE_MAX_QUERIES
+
+# Cache de leitura dos managers. Cada tabela tem um EntityCache com duas partes:
+#   - entidades por chave primária (get_*_by_id), em LRU limitado;
+#   - resultados de consultas (listas, páginas, buscas) pelos parâmetros da chamada.
+# Os métodos que escrevem invalidam o cache da tabela: a entidade alterada/removida
+# sai do cache e os resultados de consulta da tabela são descartados (uma linha nova
+# ou alterada pode entrar, sair ou mudar de posição em qualquer lista). Dentro de uma
+# transação a invalidação é repetida depois do commit, para que ninguém guarde no
+# cache uma leitura feita antes dele.
+#
+# Os objetos devolvidos são compartilhados entre chamadas: trate-os como somente leitura.
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Dicionário limitado a max_size itens; o menos usado recentemente sai primeiro."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._data = OrderedDict()
+
+    def get(self, key, default=_MISSING):
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            return default
+        return self._data[key]
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def pop(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class EntityCache:
+    def __init__(self, name, max_entities=CACHE_MAX_ENTITIES, max_queries=CACHE_MAX_QUERIES, enabled=CACHE_ENABLED):
+        self.name = name
+        self.enabled = enabled
+        self._entities = LRUCache(max_entities)
+        self._queries = LRUCache(max_queries)
+        self._lock = threading.Lock()
+        # Incrementada a cada invalidação; uma leitura que começou antes dela não é guardada
+        self._generation = 0
+        self._stats = {'entity_hits': 0, 'entity_misses': 0, 'query_hits': 0, 'query_misses': 0,
+                       'invalidations': 0}
+
+    def _read_through(self, store, kind, key, loader, keep, db_manager):
+        # Dentro de uma transação a leitura pode ver alterações ainda não confirmadas
+        # (que podem ser desfeitas): vai direto ao banco, sem usar nem alimentar o cache
+        if not self.enabled or db_manager.in_transaction():
+            return loader()
+        with self._lock:
+            value = store.get(key)
+            if value is not _MISSING:
+                self._stats[f'{kind}_hits'] += 1
+                return value
+            self._stats[f'{kind}_misses'] += 1
+            generation = self._generation
+        value = loader()
+        if keep(value):
+            with self._lock:
+                if generation == self._generation:
+                    store.put(key, value)
+        return value
+
+    def entity(self, db_manager, entity_id, loader):
+        """Retorna a entidade do cache ou a carrega com loader(). Não guarda "não encontrado"."""
+        return self._read_through(self._entities, 'entity', entity_id, loader, lambda value: value is not None,
+                                  db_manager)
+
+    def query(self, db_manager, key, loader):
+        """Retorna o resultado de uma consulta do cache ou o carrega com loader()."""
+        return self._read_through(self._queries, 'query', key, loader, lambda value: True, db_manager)
+
+    def _invalidate(self, entity_ids):
+        with self._lock:
+            self._generation += 1
+            self._stats['invalidations'] += 1
+            if entity_ids is None:
+                self._entities.clear()
+            else:
+                for entity_id in entity_ids:
+                    self._entities.pop(entity_id)
+            self._queries.clear()
+
+    def invalidate(self, db_manager, *entity_ids):
+        """
+        Chamada depois de uma escrita na tabela: remove as entidades informadas e todos
+        os resultados de consulta. Sem ids (ex.: operações em lote) limpa tudo.
+        """
+        ids = entity_ids or None
+        self._invalidate(ids)
+        if db_manager.in_transaction():
+            db_manager.after_commit(lambda: self._invalidate(ids))
+
+    def clear(self):
+        self._invalidate(None)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entities'] = len(self._entities)
+            stats['queries'] = len(self._queries)
+        lookups = sum(stats[f'{kind}_{result}'] for kind in ('entity', 'query') for result in ('hits', 'misses'))
+        stats['hit_rate'] = (stats['entity_hits'] + stats['query_hits']) / lookups if lookups else 0.0
+        stats['enabled'] = self.enabled
+        return stats
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(db_manager, table):
+    """Cache compartilhado da tabela; um por arquivo de banco, para todos os managers que o usam."""
+    with _caches_lock:
+        cache = _caches.get((db_manager.db_name, table))
+        if cache is None:
+            cache = _caches[(db_manager.db_name, table)] = EntityCache(table)
+        return cache
+
+
+def clear_caches(db_manager):
+    """Descarta o cache de todas as tabelas do banco (ex.: depois de restaurar uma cópia)."""
+    with _caches_lock:
+        caches = [cache for (db_name, _), cache in _caches.items() if db_name == db_manager.db_name]
+    for cache in caches:
+        cache.clear()
+
+
+def cache_stats(db_manager):
+    """Estatísticas de acerto/erro de todos os caches do banco, por tabela."""
+    with _caches_lock:
+        caches = [cache for (db_name, _), cache in _caches.items() if db_name == db_manager.db_name]
+    return {cache.name: cache.stats() for cache in caches}
+
+
+def cached_query(method):
+    """Guarda o resultado do método no cache de consultas do manager, pelos argumentos da chamada."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return method(self, *args, **kwargs)
+        return self.cache.query(self.db_manager, key, lambda: method(self, *args, **kwargs))
+    return wrapper
+
+
+def cached_entity(method):
+    """Guarda a entidade devolvida por um get_*_by_id(entity_id) no cache de entidades do manager."""
+    @functools.wraps(method)
+    def wrapper(self, entity_id):
+        return self.cache.entity(self.db_manager, entity_id, lambda: method(self, entity_id))
+    return wrapper
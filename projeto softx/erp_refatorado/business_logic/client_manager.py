@@ -1,50 +1,170 @@
-from erp_refatorado.database.database_manager import DatabaseManager
+from erp_refatorado.database.database_manager import DatabaseManager, BulkResult
+from config import BULK_CHUNK_SIZE, STREAM_BATCH_SIZE
+from erp_refatorado.database.search_index import build_match_query, only_digits, rank_expression
+from erp_refatorado.database.sql_catalog import register
+from erp_refatorado.business_logic.pagination import DEFAULT_PAGE_SIZE, Page, fetch_page
+from erp_refatorado.business_logic.cache import get_cache, cached_query, cached_entity
+from erp_refatorado.models.mapping import fetch_model, fetch_models, fetch_views, row_mapper
+from erp_refatorado.models.tracking import changed_fields, mark_clean
 from erp_refatorado.models.models import Client
 
 class ClientManager:
-    def __init__(self):
-        self.db_manager = DatabaseManager()
+    # Comandos registrados no catálogo central de SQL (ver database/sql_catalog.py)
+    INSERT_SQL = register('clientes.insert', """ INSERT INTO clientes (nome_cliente, cpf_cliente, email_cliente, telefone_cliente,
+                                           data_nascimento, rua, cep, bairro, cidade)
+                                           VALUES (?,?,?,?,?,?,?,?,?) """)
+    UPDATE_SQL = register('clientes.update', """ UPDATE clientes
+                     SET nome_cliente = ?, cpf_cliente = ?, email_cliente = ?, telefone_cliente = ?, data_nascimento = ?,
+                         rua = ?, cep = ?, bairro = ?, cidade = ? WHERE id_cliente = ? """)
+    DELETE_SQL = register('clientes.delete', """ DELETE FROM clientes WHERE id_cliente = ? """)
+    SEARCH_SQL = register('clientes.search', f""" SELECT c.* FROM clientes_fts JOIN clientes c ON c.id_cliente = clientes_fts.rowid
+                      WHERE clientes_fts MATCH ? ORDER BY {rank_expression('clientes')} """)
+    SELECT_ALL_SQL = register('clientes.select_all', """ SELECT * FROM clientes ORDER BY nome_cliente ASC """)
+    SELECT_BY_ID_SQL = register('clientes.select_by_id', """ SELECT * FROM clientes WHERE id_cliente = ? """)
+    ITER_SQL = register('clientes.iter', """ SELECT * FROM clientes ORDER BY id_cliente """)
+    # Colunas geradas só com dígitos (migração 6), com índice: busca exata sem depender da pontuação
+    SELECT_BY_CPF_SQL = register('clientes.select_by_cpf', """ SELECT * FROM clientes WHERE cpf_digitos = ? """)
+    SELECT_BY_PHONE_SQL = register('clientes.select_by_phone',
+                                   """ SELECT * FROM clientes WHERE telefone_digitos = ? ORDER BY nome_cliente ASC """)
+    # Colunas que update_client pode gravar (os nomes dos campos são os das colunas)
+    UPDATE_COLUMNS = ('nome_cliente', 'cpf_cliente', 'email_cliente', 'telefone_cliente', 'data_nascimento',
+                      'rua', 'cep', 'bairro', 'cidade')
+
+    def __init__(self, db_manager: DatabaseManager = None):
+        # Permite compartilhar um único DatabaseManager (e seu pool) entre os managers
+        self.db_manager = db_manager or DatabaseManager()
+        # Cache de leitura compartilhado por todos os managers de clientes (ver cache.py)
+        self.cache = get_cache(self.db_manager, 'clientes')
+
+    @staticmethod
+    def _insert_params(client: Client):
+        return (client.nome_cliente, client.cpf_cliente, client.email_cliente, client.telefone_cliente,
+                client.data_nascimento, client.rua, client.cep, client.bairro, client.cidade)
+
+    @classmethod
+    def _update_params(cls, client: Client):
+        return cls._insert_params(client) + (client.id_cliente,)
 
     def add_client(self, client: Client):
-        with self.db_manager as cursor:
-            cursor.execute(""" INSERT INTO clientes (nome_cliente, cpf_cliente, email_cliente, telefone_cliente,
-                                                       data_nascimento, rua, cep, bairro, cidade) 
-                                                       VALUES (?,?,?,?,?,?,?,?,?) """,
-                            (client.nome_cliente, client.cpf_cliente, client.email_cliente, client.telefone_cliente,
-                             client.data_nascimento, client.rua, client.cep, client.bairro, client.cidade))
+        self.db_manager.execute_write(self.INSERT_SQL, self._insert_params(client))
+        self.cache.invalidate(self.db_manager)
         return True
 
-    def get_all_clients(self):
+    def add_many(self, clients, chunk_size: int = BULK_CHUNK_SIZE) -> BulkResult:
+        """Insere vários clientes numa única transação. CPFs/emails repetidos vão para result.conflicts."""
+        result = self.db_manager.bulk_execute(self.INSERT_SQL, clients, self._insert_params, chunk_size)
+        self.cache.invalidate(self.db_manager)
+        return result
+
+    def update_many(self, clients, chunk_size: int = BULK_CHUNK_SIZE) -> BulkResult:
+        """Atualiza vários clientes numa única transação."""
+        result = self.db_manager.bulk_execute(self.UPDATE_SQL, clients, self._update_params, chunk_size)
+        self.cache.invalidate(self.db_manager)
+        return result
+
+    def delete_many(self, client_ids, chunk_size: int = BULK_CHUNK_SIZE) -> BulkResult:
+        """Remove vários clientes (pelos ids) numa única transação."""
+        result = self.db_manager.bulk_execute(self.DELETE_SQL, client_ids, lambda client_id: (client_id,), chunk_size)
+        self.cache.invalidate(self.db_manager)
+        return result
+
+    @cached_query
+    def get_all_clients(self, lazy: bool = False):
+        """
+        Carrega todos os clientes de uma vez. Para listas na tela prefira get_clients_page.
+        Com lazy=True devolve RowViews, que leem cada campo só quando acessado (ver models/mapping.py).
+        """
         with self.db_manager as cursor:
-            cursor.execute(""" SELECT * FROM clientes ORDER BY nome_cliente ASC; """)
-            rows = cursor.fetchall()
-            return [Client(id_cliente=row[0], nome_cliente=row[1], cpf_cliente=row[2], email_cliente=row[3],
-                           telefone_cliente=row[4], data_nascimento=row[5], rua=row[6], cep=row[7],
-                           bairro=row[8], cidade=row[9]) for row in rows]
+            cursor.execute(self.SELECT_ALL_SQL)
+            return fetch_views(cursor, Client) if lazy else fetch_models(cursor, Client)
 
-    def delete_client(self, client_id: int):
+    def iter_clients(self, batch_size: int = STREAM_BATCH_SIZE):
+        """
+        Percorre todos os clientes em ordem de id, lendo batch_size linhas por vez, para
+        exportações e relatórios sobre a tabela inteira com memória constante.
+        Não passa pelo cache. Ver DatabaseManager.stream sobre como parar no meio.
+        """
+        return self.db_manager.stream(self.ITER_SQL, mapper=lambda cursor: row_mapper(cursor, Client),
+                                      batch_size=batch_size)
+
+    @cached_query
+    def get_clients_page(self, page_size: int = DEFAULT_PAGE_SIZE, cursor=None) -> Page:
+        """Uma página de clientes em ordem de nome. Passe page.next_cursor para obter a seguinte."""
+        return fetch_page(self.db_manager, "SELECT * FROM clientes", "nome_cliente", "id_cliente",
+                          Client, lambda client: (client.nome_cliente, client.id_cliente),
+                          page_size=page_size, cursor=cursor, name='clientes.page')
+
+    @cached_query
+    def search_clients_page(self, name: str, page_size: int = DEFAULT_PAGE_SIZE, cursor=None) -> Page:
+        """Versão paginada de search_client: filtra pelo índice FTS5, mas mantém a ordem por nome."""
+        match = build_match_query(name)
+        where = "id_cliente IN (SELECT rowid FROM clientes_fts WHERE clientes_fts MATCH ?)" if match else None
+        return fetch_page(self.db_manager, "SELECT * FROM clientes", "nome_cliente", "id_cliente",
+                          Client, lambda client: (client.nome_cliente, client.id_cliente),
+                          where=where, params=(match,) if match else (),
+                          page_size=page_size, cursor=cursor, name='clientes.page')
+
+    @cached_entity
+    def get_client_by_id(self, client_id: int):
         with self.db_manager as cursor:
-            cursor.execute("""DELETE FROM clientes WHERE id_cliente = ?""", (client_id,))
+            cursor.execute(self.SELECT_BY_ID_SQL, (client_id,))
+            return fetch_model(cursor, Client)
+
+    @cached_query
+    def get_client_by_cpf(self, cpf: str):
+        """Cliente com esse CPF, digitado com ou sem pontuação (None se não houver)."""
+        digits = only_digits(cpf)
+        if not digits:
+            return None
+        with self.db_manager as cursor:
+            cursor.execute(self.SELECT_BY_CPF_SQL, (digits,))
+            return fetch_model(cursor, Client)
+
+    @cached_query
+    def get_clients_by_phone(self, phone: str):
+        """Clientes com esse telefone (pode haver mais de um), comparando só os dígitos."""
+        digits = only_digits(phone)
+        if not digits:
+            return []
+        with self.db_manager as cursor:
+            cursor.execute(self.SELECT_BY_PHONE_SQL, (digits,))
+            return fetch_models(cursor, Client)
+
+    def delete_client(self, client_id: int):
+        self.db_manager.execute_write(self.DELETE_SQL, (client_id,))
+        self.cache.invalidate(self.db_manager, client_id)
         return True
 
     def update_client(self, client: Client):
-        with self.db_manager as cursor:
-            cursor.execute(""" 
-            UPDATE clientes
-            SET nome_cliente = ?, cpf_cliente = ?, email_cliente = ?, telefone_cliente = ?, data_nascimento = ?,
-             rua = ?, cep = ?, bairro = ?, cidade = ? WHERE id_cliente = ?""",
-                              (client.nome_cliente, client.cpf_cliente, client.email_cliente, client.telefone_cliente,
-                               client.data_nascimento, client.rua, client.cep, client.bairro, client.cidade, client.id_cliente))
+        """
+        Grava só as colunas alteradas desde que o cliente foi lido (todas, se ele não veio do
+        banco); sem alterações não executa nada. Para alterar um cliente lido use tracking.edit.
+        """
+        columns = changed_fields(client, self.UPDATE_COLUMNS)
+        if columns is None:
+            columns = self.UPDATE_COLUMNS
+        if not columns:
+            return True
+        self.db_manager.update_columns('clientes', 'id_cliente', client.id_cliente,
+                                       {column: getattr(client, column) for column in columns})
+        mark_clean(client)
+        self.cache.invalidate(self.db_manager, client.id_cliente)
         return True
 
+    @cached_query
     def search_client(self, name: str):
+        """
+        Busca por nome, CPF, email, cidade ou bairro no índice FTS5, do resultado mais relevante para o menos.
+        Ignora acentos e maiúsculas e aceita começo de palavra ("mar" encontra "Márcia").
+        Um termo sem palavras (vazio ou só pontuação) não encontra nada: para listar todos,
+        use get_clients_page (ou get_all_clients, que carrega a tabela inteira).
+        """
+        match = build_match_query(name)
+        if match is None:
+            return []
         with self.db_manager as cursor:
-            # Prevenção de SQL Injection: usar LIKE com parâmetros
-            cursor.execute("SELECT * FROM clientes WHERE nome_cliente LIKE ? ORDER BY nome_cliente ASC", (f'%{name}%',))
-            rows = cursor.fetchall()
-            return [Client(id_cliente=row[0], nome_cliente=row[1], cpf_cliente=row[2], email_cliente=row[3],
-                           telefone_cliente=row[4], data_nascimento=row[5], rua=row[6], cep=row[7],
-                           bairro=row[8], cidade=row[9]) for row in rows]
+            cursor.execute(self.SEARCH_SQL, (match,))
+            return fetch_models(cursor, Client)
 
 
 
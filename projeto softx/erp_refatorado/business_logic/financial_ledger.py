@@ -0,0 +1,171 @@
+# Em erp_refatorado/business_logic/financial_ledger.py
+
+import calendar
+from datetime import date, datetime, timedelta
+from erp_refatorado.database.sql_catalog import register
+from erp_refatorado.models.money import Money
+
+# Lançamentos do financeiro com saldo por dia e fechamento de períodos.
+#
+# Cada lançamento (tabela financeiro) soma seu valor às entradas ou saídas do dia em
+# financeiro_diario, na mesma transação. Ao fechar um período (um mês), o saldo no seu
+# último dia é gravado em financeiro_fechamento e o período deixa de aceitar
+# lançamentos, então esse saldo não muda mais. O saldo em qualquer data é
+#     saldo do último fechamento até a data + (entradas - saídas) dos dias seguintes
+# ou seja, uma busca pelo índice de financeiro_fechamento mais uma soma sobre, no
+# máximo, os dias desde o último fechamento, não sobre todos os lançamentos.
+#
+# As funções recebem o cursor de uma transação já aberta pelo chamador
+# (db_manager.transaction()), para que o lançamento e a venda sejam gravados juntos.
+
+ENTRY_TYPES = ('entrada', 'saida')
+
+INSERT_SQL = register('financeiro.insert', """ INSERT INTO financeiro (tipo, valor, descricao, data)
+                                             VALUES (?,?,?,?) """)
+ADD_DAY_SQL = register('financeiro_diario.add', """ INSERT INTO financeiro_diario (dia, entradas, saidas) VALUES (?, ?, ?)
+                       ON CONFLICT(dia) DO UPDATE SET entradas = entradas + excluded.entradas,
+                           saidas = saidas + excluded.saidas """)
+LAST_CLOSING_SQL = register('financeiro_fechamento.last', """ SELECT * FROM financeiro_fechamento
+                            ORDER BY ate DESC LIMIT 1 """)
+CLOSING_AT_SQL = register('financeiro_fechamento.at', """ SELECT ate, saldo FROM financeiro_fechamento
+                          WHERE ate <= ? ORDER BY ate DESC LIMIT 1 """)
+SELECT_CLOSINGS_SQL = register('financeiro_fechamento.select_all', """ SELECT * FROM financeiro_fechamento
+                               ORDER BY ate DESC """)
+INSERT_CLOSING_SQL = register('financeiro_fechamento.insert', """ INSERT INTO financeiro_fechamento
+                              (periodo, ate, entradas, saidas, saldo, data_fechamento) VALUES (?,?,?,?,?,?) """)
+# Soma das (entradas - saídas) dos dias depois do fechamento (exclusive) até a data (inclusive)
+TAIL_SQL = register('financeiro_diario.tail', """ SELECT COALESCE(SUM(entradas - saidas), 0) FROM financeiro_diario
+                    WHERE dia > ? AND dia <= ? """)
+PERIOD_TOTALS_SQL = register('financeiro_diario.totals', """ SELECT COALESCE(SUM(entradas), 0), COALESCE(SUM(saidas), 0)
+                             FROM financeiro_diario WHERE dia BETWEEN ? AND ? """)
+FIRST_DAY_SQL = register('financeiro_diario.first_day', """ SELECT MIN(dia) FROM financeiro_diario """)
+# Saldo no fim de cada dia do intervalo, a partir do saldo do dia anterior ao início
+DAILY_SQL = register('financeiro_diario.balances', """ SELECT dia, entradas, saidas,
+                         ? + SUM(entradas - saidas) OVER (ORDER BY dia) AS saldo
+                     FROM financeiro_diario WHERE dia BETWEEN ? AND ? ORDER BY dia """)
+DELETE_DAYS_SQL = register('financeiro_diario.delete_all', """ DELETE FROM financeiro_diario """)
+REBUILD_DAYS_SQL = register('financeiro_diario.rebuild', """ INSERT INTO financeiro_diario (dia, entradas, saidas)
+                            SELECT date(data), SUM(CASE WHEN tipo = 'entrada' THEN valor ELSE 0 END),
+                                   SUM(CASE WHEN tipo = 'saida' THEN valor ELSE 0 END)
+                            FROM financeiro GROUP BY date(data) """)
+REBUILD_CLOSINGS_SQL = register('financeiro_fechamento.rebuild', """ UPDATE financeiro_fechamento SET
+                                entradas = (SELECT COALESCE(SUM(d.entradas), 0) FROM financeiro_diario d
+                                            WHERE d.dia BETWEEN periodo || '-01' AND ate),
+                                saidas = (SELECT COALESCE(SUM(d.saidas), 0) FROM financeiro_diario d
+                                          WHERE d.dia BETWEEN periodo || '-01' AND ate),
+                                saldo = (SELECT COALESCE(SUM(d.entradas - d.saidas), 0) FROM financeiro_diario d
+                                         WHERE d.dia <= ate) """)
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def parse_date(data):
+    """
+    Data de lançamento (AAAA-MM-DD ou AAAA-MM-DD HH:MM:SS) no formato gravado,
+    "AAAA-MM-DD HH:MM:SS". Levanta ValueError para datas inválidas, que iriam para o
+    dia errado de financeiro_diario e escapariam da conferência de período fechado.
+    """
+    try:
+        return datetime.fromisoformat(str(data)).strftime("%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        raise ValueError(f"Data de lançamento inválida: '{data}'. Use AAAA-MM-DD ou AAAA-MM-DD HH:MM:SS") from None
+
+
+def period_of(dia):
+    """Período (mês, AAAA-MM) de um dia AAAA-MM-DD."""
+    return dia[:7]
+
+
+def period_end(periodo):
+    """Último dia (AAAA-MM-DD) do período AAAA-MM."""
+    year, month = map(int, periodo.split("-"))
+    return date(year, month, calendar.monthrange(year, month)[1]).isoformat()
+
+
+def next_period(periodo):
+    year, month = map(int, periodo.split("-"))
+    return f"{year + month // 12:04d}-{month % 12 + 1:02d}"
+
+
+def last_closing(cursor):
+    """(periodo, ate, entradas, saidas, saldo, data_fechamento) do último fechamento, ou None."""
+    return cursor.execute(LAST_CLOSING_SQL).fetchone()
+
+
+def post_entry(cursor, tipo, valor, descricao=None, data=None):
+    """
+    Grava um lançamento e o soma aos totais do dia. valor é positivo (Money, em
+    centavos); data é "AAAA-MM-DD HH:MM:SS" ou "AAAA-MM-DD" (padrão: agora). Levanta
+    ValueError para tipo, valor ou data inválidos e para datas de períodos já fechados.
+    Retorna o id.
+    """
+    if tipo not in ENTRY_TYPES:
+        raise ValueError(f"Tipo de lançamento inválido: '{tipo}'. Use um de: {', '.join(ENTRY_TYPES)}")
+    valor = Money(valor)
+    if valor <= 0:
+        raise ValueError("O valor do lançamento deve ser maior que zero")
+    data = parse_date(data) if data else _now()
+    dia = data[:10]
+    closing = last_closing(cursor)
+    if closing is not None and dia <= closing[1]:
+        raise ValueError(f"O financeiro está fechado até {closing[1]}; não é possível lançar em {dia}")
+    cursor.execute(INSERT_SQL, (tipo, valor, descricao, data))
+    entry_id = cursor.lastrowid
+    cursor.execute(ADD_DAY_SQL, (dia, valor if tipo == 'entrada' else 0, valor if tipo == 'saida' else 0))
+    return entry_id
+
+
+def balance_at(cursor, dia):
+    """Saldo no fim do dia (AAAA-MM-DD): fechamento anterior mais a soma dos dias seguintes."""
+    closing = cursor.execute(CLOSING_AT_SQL, (dia,)).fetchone()
+    since, saldo = closing if closing is not None else ("", 0)
+    return Money(saldo + cursor.execute(TAIL_SQL, (since, dia)).fetchone()[0])
+
+
+def daily_balances(cursor, start, end):
+    """Cursor posicionado nas linhas (dia, entradas, saidas, saldo) dos dias com lançamentos no intervalo."""
+    opening = balance_at(cursor, (date.fromisoformat(start) - timedelta(days=1)).isoformat())
+    return cursor.execute(DAILY_SQL, (opening, start, end))
+
+
+def close_periods(cursor, until):
+    """
+    Fecha, em ordem, todos os períodos ainda abertos até until (AAAA-MM), inclusive,
+    gravando o saldo no fim de cada um. Só períodos já terminados podem ser fechados.
+    Retorna a lista de fechamentos gravados, como tuplas na ordem da tabela.
+    """
+    if period_end(until) >= date.today().isoformat():
+        raise ValueError(f"O período {until} ainda não terminou")
+    closing = last_closing(cursor)
+    if closing is not None:
+        periodo, saldo = next_period(closing[0]), closing[4]
+    else:
+        first_day = cursor.execute(FIRST_DAY_SQL).fetchone()[0]
+        if first_day is None:
+            return []
+        periodo, saldo = period_of(first_day), 0
+    closed = []
+    data_fechamento = _now()
+    while periodo <= until:
+        ate = period_end(periodo)
+        entradas, saidas = cursor.execute(PERIOD_TOTALS_SQL, (f"{periodo}-01", ate)).fetchone()
+        saldo += entradas - saidas
+        row = (periodo, ate, entradas, saidas, saldo, data_fechamento)
+        cursor.execute(INSERT_CLOSING_SQL, row)
+        closed.append(row)
+        periodo = next_period(periodo)
+    return closed
+
+
+def rebuild(cursor):
+    """
+    Recalcula financeiro_diario a partir dos lançamentos e, com ele, os totais e saldos
+    dos fechamentos já gravados. Retorna quantos dias têm lançamentos.
+    """
+    cursor.execute(DELETE_DAYS_SQL)
+    cursor.execute(REBUILD_DAYS_SQL)
+    days = cursor.rowcount
+    cursor.execute(REBUILD_CLOSINGS_SQL)
+    return days
@@ -0,0 +1,88 @@
+from datetime import date, timedelta
+from erp_refatorado.database.database_manager import DatabaseManager
+from erp_refatorado.database.sql_catalog import register
+from erp_refatorado.business_logic import financial_ledger
+from erp_refatorado.models.mapping import fetch_models
+from erp_refatorado.models.models import DailyBalance, Financial, FinancialClosing
+from erp_refatorado.models.money import Money
+
+
+class FinancialManager:
+    """
+    Lançamentos do financeiro (entradas e saídas), saldo por dia e fechamento mensal
+    (ver financial_ledger.py). As vendas lançam suas entradas pelo SaleManager.
+    """
+
+    # Comandos registrados no catálogo central de SQL (ver database/sql_catalog.py)
+    # Lançamentos de um intervalo de datas pelo índice de financeiro.data; tipo NULL = todos
+    SELECT_PERIOD_SQL = register('financeiro.select_period', """ SELECT * FROM financeiro
+                                 WHERE data >= ? AND data < ? AND (? IS NULL OR tipo = ?)
+                                 ORDER BY data, id_financeiro """)
+
+    def __init__(self, db_manager: DatabaseManager = None):
+        # Permite compartilhar um único DatabaseManager (e seu pool) entre os managers
+        self.db_manager = db_manager or DatabaseManager()
+
+    def post_entry(self, tipo: str, valor: Money, descricao: str = None, data: str = None) -> Financial:
+        """
+        Grava um lançamento ('entrada' ou 'saida', valor positivo) com data
+        "AAAA-MM-DD HH:MM:SS" ou "AAAA-MM-DD" (padrão: agora). Retorna o Financial
+        gravado. Levanta ValueError para tipo/valor/data inválidos ou data de um período
+        já fechado.
+        """
+        entry = Financial(tipo=tipo, valor=Money(valor), descricao=descricao)
+        if data:
+            entry.data = financial_ledger.parse_date(data)
+        entry.id_financeiro = self.db_manager.run_write(self._post_entry, entry)
+        return entry
+
+    def _post_entry(self, entry):
+        with self.db_manager.transaction() as cursor:
+            return financial_ledger.post_entry(cursor, entry.tipo, entry.valor, entry.descricao, entry.data)
+
+    def get_entries(self, start: str, end: str, tipo: str = None):
+        """Lançamentos de start a end (AAAA-MM-DD, inclusive), opcionalmente só de um tipo."""
+        after_end = (date.fromisoformat(end) + timedelta(days=1)).isoformat()
+        with self.db_manager as cursor:
+            cursor.execute(self.SELECT_PERIOD_SQL, (start, after_end, tipo, tipo))
+            return fetch_models(cursor, Financial)
+
+    def get_balance(self, dia: str = None) -> Money:
+        """Saldo no fim do dia (AAAA-MM-DD; padrão: hoje)."""
+        with self.db_manager as cursor:
+            return financial_ledger.balance_at(cursor, dia or date.today().isoformat())
+
+    def get_daily_balances(self, start: str, end: str):
+        """Entradas, saídas e saldo no fim de cada dia com lançamentos entre start e end (inclusive)."""
+        with self.db_manager as cursor:
+            return fetch_models(financial_ledger.daily_balances(cursor, start, end), DailyBalance)
+
+    def close_periods(self, until: str = None):
+        """
+        Fecha os meses ainda abertos até until (AAAA-MM; padrão: o mês passado), gravando
+        o saldo final de cada um. Retorna a lista de FinancialClosing gravados.
+        """
+        until = until or financial_ledger.period_of((date.today().replace(day=1) - timedelta(days=1)).isoformat())
+        closed = self.db_manager.run_write(self._close_periods, until)
+        # As linhas vêm do próprio fechamento, não de uma leitura: os valores são convertidos
+        # para Money aqui, como o mapeador faz em get_closings
+        return [FinancialClosing(periodo, ate, Money(entradas), Money(saidas), Money(saldo), data_fechamento)
+                for periodo, ate, entradas, saidas, saldo, data_fechamento in closed]
+
+    def _close_periods(self, until):
+        with self.db_manager.transaction() as cursor:
+            return financial_ledger.close_periods(cursor, until)
+
+    def get_closings(self):
+        """Fechamentos gravados, do mais recente para o mais antigo."""
+        with self.db_manager as cursor:
+            cursor.execute(financial_ledger.SELECT_CLOSINGS_SQL)
+            return fetch_models(cursor, FinancialClosing)
+
+    def rebuild_daily_totals(self):
+        """Recalcula os totais diários e os fechamentos a partir dos lançamentos. Retorna quantos dias há."""
+        return self.db_manager.run_write(self._rebuild_daily_totals)
+
+    def _rebuild_daily_totals(self):
+        with self.db_manager.transaction() as cursor:
+            return financial_ledger.rebuild(cursor)
@@ -0,0 +1,62 @@
+# Em erp_refatorado/business_logic/pagination.py
+
+from dataclasses import dataclass, field
+from typing import Optional
+from erp_refatorado.database.sql_catalog import register
+from erp_refatorado.models.mapping import fetch_models
+
+# Tamanho de página usado quando o chamador não escolhe um
+DEFAULT_PAGE_SIZE = 200
+
+
+@dataclass
+class Page:
+    items: list = field(default_factory=list)
+    # Posição (valor da coluna de ordenação, id) do último item da página.
+    # Passe-a como "cursor" para buscar a próxima página; None quando não há mais itens.
+    next_cursor: Optional[tuple] = None
+
+    @property
+    def has_more(self):
+        return self.next_cursor is not None
+
+
+def fetch_page(db_manager, select_sql, sort_column, id_column, model, cursor_key,
+               where=None, params=(), page_size=DEFAULT_PAGE_SIZE, cursor=None, name=None):
+    """
+    Busca uma página usando paginação por chave (keyset/seek): em vez de OFFSET, filtra
+    pelos registros depois de (sort_column, id_column) do cursor. Com um índice em
+    sort_column (o id é o rowid, já incluído no índice), cada página custa o mesmo,
+    não importa quão longe se esteja na lista.
+
+    select_sql é o SELECT sem WHERE/ORDER BY; model é a classe do modelo (as linhas são
+    convertidas pelos nomes das colunas, ver models/mapping.py) e
+    cursor_key devolve a tupla (valor de ordenação, id) de um item convertido.
+
+    name registra o SQL gerado no catálogo (ver database/sql_catalog.py); cada forma
+    da consulta tem seu nome: "name", "name.filtered" (com where) e ".next" (com cursor).
+    """
+    if page_size < 1:
+        raise ValueError("page_size deve ser maior que zero")
+    conditions = [where] if where else []
+    params = list(params)
+    if cursor is not None:
+        conditions.append(f"({sort_column}, {id_column}) > (?, ?)")
+        params.extend(cursor)
+    sql = select_sql
+    if conditions:
+        sql += " WHERE " + " AND ".join(f"({condition})" for condition in conditions)
+    # Busca um item a mais só para saber se existe uma próxima página
+    sql += f" ORDER BY {sort_column} ASC, {id_column} ASC LIMIT ?"
+    params.append(page_size + 1)
+    if name is not None:
+        sql = register(name + (".filtered" if where else "") + (".next" if cursor is not None else ""), sql)
+
+    with db_manager as db_cursor:
+        db_cursor.execute(sql, params)
+        items = fetch_models(db_cursor, model)
+
+    has_more = len(items) > page_size
+    items = items[:page_size]
+    next_cursor = cursor_key(items[-1]) if has_more else None
+    return Page(items, next_cursor)
@@ -1,66 +1,296 @@
-from erp_refatorado.database.database_manager import DatabaseManager
-from erp_refatorado.models.models import Product, Stock
+from erp_refatorado.database.database_manager import DatabaseManager, BulkResult
+from config import BULK_CHUNK_SIZE, STREAM_BATCH_SIZE
+from erp_refatorado.database.search_index import build_match_query, rank_expression
+from erp_refatorado.database.sql_catalog import register
+from erp_refatorado.business_logic.pagination import DEFAULT_PAGE_SIZE, Page, fetch_page
+from erp_refatorado.business_logic.cache import get_cache, cached_query, cached_entity
+from erp_refatorado.business_logic import stock_ledger
+from erp_refatorado.models.mapping import fetch_model, fetch_models, fetch_views, row_mapper
+from erp_refatorado.models.tracking import changed_fields, mark_clean
+from erp_refatorado.models.models import Product, Stock, StockMovement
 
 class ProductManager:
-    def __init__(self):
-        self.db_manager = DatabaseManager()
+    # Comandos registrados no catálogo central de SQL (ver database/sql_catalog.py)
+    INSERT_SQL = register('produtos.insert', """ INSERT INTO produtos (nome, descricao, preco_venda, preco_compra, fornecedor_id)
+                                           VALUES (?,?,?,?,?) """)
+    UPDATE_SQL = register('produtos.update', """ UPDATE produtos
+                     SET nome = ?, descricao = ?, preco_venda = ?, preco_compra = ?, fornecedor_id = ?
+                     WHERE id_produto = ? """)
+    DELETE_SQL = register('produtos.delete', """ DELETE FROM produtos WHERE id_produto = ? """)
+    DELETE_STOCK_SQL = register('estoque.delete', """ DELETE FROM estoque WHERE produto_id = ? """)
+    # Alterações de quantidade passam pela razão do estoque (ver stock_ledger.py)
+    ADD_STOCK_SQL = stock_ledger.ADD_STOCK_SQL
+    SELECT_STOCK_SQL = register('estoque.select_by_product', """ SELECT quantidade FROM estoque WHERE produto_id = ? """)
+    # Listagem: produto + quantidade em estoque + nome do fornecedor numa única consulta,
+    # em vez de buscar o fornecedor de cada linha separadamente
+    SELECT_LISTING_SQL = register('produtos.listing', """ SELECT p.*, COALESCE(s.quantidade, 0) AS stock_quantity, COALESCE(f.nome, '') AS fornecedor_nome
+                                FROM produtos p
+                                LEFT JOIN estoque s ON p.id_produto = s.produto_id
+                                LEFT JOIN fornecedores f ON f.id_fornecedor = p.fornecedor_id """)
+    SEARCH_SQL = register('produtos.search', f""" SELECT p.*, COALESCE(s.quantidade, 0) AS stock_quantity, COALESCE(f.nome, '') AS fornecedor_nome
+                      FROM produtos_fts JOIN produtos p ON p.id_produto = produtos_fts.rowid
+                      LEFT JOIN estoque s ON p.id_produto = s.produto_id
+                      LEFT JOIN fornecedores f ON f.id_fornecedor = p.fornecedor_id
+                      WHERE produtos_fts MATCH ? ORDER BY {rank_expression('produtos')} """)
+    SELECT_ALL_SQL = register('produtos.select_all', SELECT_LISTING_SQL + " ORDER BY p.nome ASC")
+    SELECT_BY_ID_SQL = register('produtos.select_by_id', SELECT_LISTING_SQL + " WHERE p.id_produto = ?")
+    ITER_SQL = register('produtos.iter', SELECT_LISTING_SQL + " ORDER BY p.id_produto")
+    # Colunas que update_product pode gravar; estoque e nome do fornecedor vêm de outras tabelas
+    UPDATE_COLUMNS = ('nome', 'descricao', 'preco_venda', 'preco_compra', 'fornecedor_id')
+
+    def __init__(self, db_manager: DatabaseManager = None):
+        # Permite compartilhar um único DatabaseManager (e seu pool) entre os managers
+        self.db_manager = db_manager or DatabaseManager()
+        # Cache de leitura compartilhado por todos os managers de produtos (ver cache.py)
+        self.cache = get_cache(self.db_manager, 'produtos')
+
+    @staticmethod
+    def _insert_params(product: Product):
+        return (product.nome, product.descricao, product.preco_venda, product.preco_compra, product.fornecedor_id)
+
+    @classmethod
+    def _update_params(cls, product: Product):
+        return cls._insert_params(product) + (product.id_produto,)
 
     def add_product(self, product: Product, initial_stock: int = 0):
-        with self.db_manager as cursor:
-            cursor.execute(""" INSERT INTO produtos (nome, descricao, preco_venda, preco_compra, fornecedor_id) 
-                                                       VALUES (?,?,?,?,?) """,
-                            (product.nome, product.descricao, product.preco_venda, product.preco_compra, product.fornecedor_id))
+        self.db_manager.run_write(self._insert_product, product, initial_stock)
+        self.cache.invalidate(self.db_manager)
+        return True
+
+    def _insert_product(self, product: Product, initial_stock: int):
+        with self.db_manager.transaction() as cursor:
+            cursor.execute(self.INSERT_SQL, self._insert_params(product))
             product_id = cursor.lastrowid
             if product_id and initial_stock > 0:
-                cursor.execute(""" INSERT INTO estoque (produto_id, quantidade) VALUES (?,?) """, (product_id, initial_stock))
-        return True
+                stock_ledger.record_movements(cursor, [(product_id, initial_stock)], 'entrada', "Estoque inicial")
+            return product_id
+
+    def add_many(self, products, chunk_size: int = BULK_CHUNK_SIZE) -> BulkResult:
+        """
+        Insere vários produtos numa única transação. O estoque inicial não é criado aqui;
+        use update_stock depois, se necessário.
+        """
+        result = self.db_manager.bulk_execute(self.INSERT_SQL, products, self._insert_params, chunk_size)
+        self.cache.invalidate(self.db_manager)
+        return result
+
+    def update_many(self, products, chunk_size: int = BULK_CHUNK_SIZE) -> BulkResult:
+        """Atualiza vários produtos numa única transação."""
+        result = self.db_manager.bulk_execute(self.UPDATE_SQL, products, self._update_params, chunk_size)
+        self.cache.invalidate(self.db_manager)
+        return result
 
-    def get_all_products(self):
+    def delete_many(self, product_ids, chunk_size: int = BULK_CHUNK_SIZE) -> BulkResult:
+        """
+        Remove vários produtos (pelos ids), junto com seus registros de estoque e a razão
+        do estoque, numa única transação.
+        """
+        product_ids = list(product_ids)  # Percorrido várias vezes: razão, estoque e produtos
+        result = self.db_manager.run_write(self._delete_many, product_ids, chunk_size)
+        self.cache.invalidate(self.db_manager)
+        return result
+
+    def _delete_many(self, product_ids, chunk_size):
+        with self.db_manager.transaction() as cursor:
+            stock_ledger.delete_products(cursor, product_ids)
+            self.db_manager.bulk_execute(self.DELETE_STOCK_SQL, product_ids, lambda product_id: (product_id,),
+                                         chunk_size)
+            return self.db_manager.bulk_execute(self.DELETE_SQL, product_ids, lambda product_id: (product_id,),
+                                                chunk_size)
+
+    @cached_query
+    def get_all_products(self, lazy: bool = False):
+        """
+        Carrega todos os produtos de uma vez. Para listas na tela prefira get_products_page.
+        Com lazy=True devolve RowViews, que leem cada campo só quando acessado (ver models/mapping.py).
+        """
         with self.db_manager as cursor:
-            cursor.execute(""" SELECT p.*, s.quantidade FROM produtos p LEFT JOIN estoque s ON p.id_produto = s.produto_id ORDER BY p.nome ASC; """)
-            rows = cursor.fetchall()
-            products = []
-            for row in rows:
-                product = Product(id_produto=row[0], nome=row[1], descricao=row[2], preco_venda=row[3],
-                                  preco_compra=row[4], fornecedor_id=row[5])
-                product.stock_quantity = row[6] if row[6] is not None else 0 # Adiciona a quantidade em estoque
-                products.append(product)
-            return products
+            cursor.execute(self.SELECT_ALL_SQL)
+            return fetch_views(cursor, Product) if lazy else fetch_models(cursor, Product)
 
-    def delete_product(self, product_id: int):
+    def iter_products(self, batch_size: int = STREAM_BATCH_SIZE):
+        """
+        Percorre todos os produtos (com estoque e fornecedor) em ordem de id, lendo batch_size linhas por vez, para
+        exportações e relatórios sobre a tabela inteira com memória constante.
+        Não passa pelo cache. Ver DatabaseManager.stream sobre como parar no meio.
+        """
+        return self.db_manager.stream(self.ITER_SQL, mapper=lambda cursor: row_mapper(cursor, Product),
+                                      batch_size=batch_size)
+
+    @cached_query
+    def get_products_page(self, page_size: int = DEFAULT_PAGE_SIZE, cursor=None) -> Page:
+        """Uma página de produtos (com estoque e fornecedor) em ordem de nome. Passe page.next_cursor para obter a seguinte."""
+        return fetch_page(self.db_manager, self.SELECT_LISTING_SQL, "p.nome", "p.id_produto",
+                          Product, lambda product: (product.nome, product.id_produto),
+                          page_size=page_size, cursor=cursor, name='produtos.page')
+
+    @cached_query
+    def search_products_page(self, name: str, page_size: int = DEFAULT_PAGE_SIZE, cursor=None) -> Page:
+        """Versão paginada de search_product: filtra pelo índice FTS5, mas mantém a ordem por nome."""
+        match = build_match_query(name)
+        where = "p.id_produto IN (SELECT rowid FROM produtos_fts WHERE produtos_fts MATCH ?)" if match else None
+        return fetch_page(self.db_manager, self.SELECT_LISTING_SQL, "p.nome", "p.id_produto",
+                          Product, lambda product: (product.nome, product.id_produto),
+                          where=where, params=(match,) if match else (),
+                          page_size=page_size, cursor=cursor, name='produtos.page')
+
+    @cached_entity
+    def get_product_by_id(self, product_id: int):
         with self.db_manager as cursor:
-            cursor.execute("""DELETE FROM estoque WHERE produto_id = ?""", (product_id,))
-            cursor.execute("""DELETE FROM produtos WHERE id_produto = ?""", (product_id,))
+            cursor.execute(self.SELECT_BY_ID_SQL, (product_id,))
+            return fetch_model(cursor, Product)
+
+    def delete_product(self, product_id: int):
+        self.db_manager.run_write(self._delete_product, product_id)
+        self.cache.invalidate(self.db_manager, product_id)
         return True
 
+    def _delete_product(self, product_id: int):
+        # Cadastro, estoque e razão do estoque saem juntos, ou nenhum sai
+        with self.db_manager.transaction() as cursor:
+            stock_ledger.delete_product(cursor, product_id)
+            cursor.execute(self.DELETE_STOCK_SQL, (product_id,))
+            cursor.execute(self.DELETE_SQL, (product_id,))
+
     def update_product(self, product: Product):
-        with self.db_manager as cursor:
-            cursor.execute(""" 
-            UPDATE produtos
-            SET nome = ?, descricao = ?, preco_venda = ?, preco_compra = ?, fornecedor_id = ? WHERE id_produto = ?""",
-                              (product.nome, product.descricao, product.preco_venda, product.preco_compra, product.fornecedor_id, product.id_produto))
+        """
+        Grava só as colunas alteradas desde que o produto foi lido (todas, se ele não veio do
+        banco); sem alterações não executa nada. O estoque é alterado por update_stock.
+        """
+        columns = changed_fields(product, self.UPDATE_COLUMNS)
+        if columns is None:
+            columns = self.UPDATE_COLUMNS
+        if not columns:
+            return True
+        self.db_manager.update_columns('produtos', 'id_produto', product.id_produto,
+                                       {column: getattr(product, column) for column in columns})
+        mark_clean(product)
+        self.cache.invalidate(self.db_manager, product.id_produto)
         return True
 
-    def update_stock(self, product_id: int, quantity: int):
-        with self.db_manager as cursor:
-            cursor.execute(""" INSERT OR REPLACE INTO estoque (produto_id, quantidade) VALUES (?, (SELECT COALESCE(quantidade, 0) FROM estoque WHERE produto_id = ?) + ?) """,
-                            (product_id, product_id, quantity))
+    def update_stock(self, product_id: int, quantity: int, referencia: str = None, usuario_id: int = None):
+        """
+        Soma quantity (negativa para retirar) ao estoque do produto, registrando o
+        movimento na razão como entrada ou saída. A retirada não confere o saldo; para
+        vendas e reservas, que não podem deixar o estoque negativo, use decrement_stock.
+        """
+        tipo = 'entrada' if quantity >= 0 else 'saida'
+        self.db_manager.run_write(self._record_movements, [(product_id, quantity)], tipo, referencia, usuario_id)
+        self.cache.invalidate(self.db_manager, product_id)
         return True
 
-    def search_product(self, name: str):
+    def adjust_stock(self, product_id: int, quantity: int, referencia: str = None, usuario_id: int = None):
+        """
+        Define a quantidade em estoque (ex.: após uma contagem), registrando a diferença
+        como ajuste na razão. Retorna a diferença aplicada (0 se já era essa a quantidade).
+        """
+        difference = self.db_manager.run_write(self._adjust_stock, product_id, quantity, referencia, usuario_id)
+        self.cache.invalidate(self.db_manager, product_id)
+        return difference
+
+    def decrement_stock(self, product_id: int, quantity: int, referencia: str = None, usuario_id: int = None):
+        """
+        Baixa quantity do estoque só se houver saldo suficiente, num único UPDATE
+        condicional (seguro com vários caixas ao mesmo tempo). Levanta
+        InsufficientStockError (um ValueError) se faltar estoque.
+        """
+        self.decrement_stock_many([(product_id, quantity)], referencia, usuario_id)
+
+    def decrement_stock_many(self, items, referencia: str = None, usuario_id: int = None):
+        """
+        Baixa de um carrinho inteiro, items = [(produto_id, quantidade), ...]: ou todas
+        as linhas são baixadas, ou nenhuma. InsufficientStockError.shortages traz cada
+        produto que faltou, com a quantidade pedida e a disponível.
+        """
+        items = list(items)
+        try:
+            self.db_manager.run_write(self._decrement, items, referencia, usuario_id)
+        finally:
+            self.cache.invalidate(self.db_manager, *{int(produto_id) for produto_id, _ in items})
+        return True
+
+    def reserve_stock(self, items, referencia: str = "Reserva", usuario_id: int = None):
+        """
+        Separa a quantidade dos itens (ex.: pedido a entregar), com a mesma baixa
+        condicional de decrement_stock_many. Devolva com release_stock se a reserva cair.
+        """
+        return self.decrement_stock_many(items, referencia, usuario_id)
+
+    def release_stock(self, items, referencia: str = "Reserva cancelada", usuario_id: int = None):
+        """Devolve ao estoque itens reservados (ou baixados) antes, como entradas na razão."""
+        items = list(items)
+        self.db_manager.run_write(self._record_movements, items, 'entrada', referencia, usuario_id)
+        self.cache.invalidate(self.db_manager, *{int(produto_id) for produto_id, _ in items})
+        return True
+
+    def check_stock(self, items):
+        """
+        Prévia, só de leitura, das linhas sem estoque suficiente para items (mesmo formato
+        de InsufficientStockError.shortages). Não garante a baixa: outro caixa pode vender
+        antes; a garantia vem da baixa condicional.
+        """
         with self.db_manager as cursor:
-            cursor.execute("SELECT * FROM produtos WHERE nome LIKE ? ORDER BY nome ASC", (f"%{name}%",))
-            rows = cursor.fetchall()
-            products = []
-            for row in rows:
-                product = Product(id_produto=row[0], nome=row[1], descricao=row[2], preco_venda=row[3],
-                                  preco_compra=row[4], fornecedor_id=row[5])
-                product.stock_quantity = row[6] if row[6] is not None else 0
-                products.append(product)
-            return products
+            return stock_ledger.shortages(cursor, items)
+
+    def _decrement(self, items, referencia, usuario_id):
+        with self.db_manager.transaction() as cursor:
+            stock_ledger.decrement(cursor, items, referencia, usuario_id)
+
+    def _record_movements(self, movements, tipo, referencia, usuario_id):
+        with self.db_manager.transaction() as cursor:
+            stock_ledger.record_movements(cursor, movements, tipo, referencia, usuario_id)
+
+    def _adjust_stock(self, product_id, quantity, referencia, usuario_id):
+        with self.db_manager.transaction() as cursor:
+            row = cursor.execute(self.SELECT_STOCK_SQL, (product_id,)).fetchone()
+            difference = quantity - (row[0] if row else 0)
+            if difference:
+                stock_ledger.record_movements(cursor, [(product_id, difference)], 'ajuste', referencia, usuario_id)
+            return difference
 
+    def get_stock_movements(self, product_id: int, limit: int = 100):
+        """Últimos movimentos de estoque do produto, do mais recente para o mais antigo."""
+        with self.db_manager as cursor:
+            cursor.execute(stock_ledger.SELECT_BY_PRODUCT_SQL, (product_id, limit))
+            return fetch_models(cursor, StockMovement)
 
+    def checkpoint_stock(self, only_if_due: bool = False):
+        """
+        Grava um checkpoint das quantidades da razão. Com only_if_due, só grava se houver
+        STOCK_CHECKPOINT_INTERVAL movimentos ou mais desde o último (a aplicação chama
+        assim ao iniciar). Retorna (último movimento incluído, produtos gravados), ou None
+        se não era a hora.
+        """
+        fn = stock_ledger.maybe_checkpoint if only_if_due else stock_ledger.checkpoint
+        return self.db_manager.run_write(self._in_transaction, fn)
 
+    def verify_stock(self):
+        """Compara o estoque com a razão; retorna [(produto_id, no estoque, na razão)] das diferenças."""
+        with self.db_manager as cursor:
+            return stock_ledger.divergences(cursor)
 
+    def rebuild_stock(self):
+        """Recalcula o estoque a partir da razão e retorna as divergências corrigidas."""
+        fixed = self.db_manager.run_write(self._in_transaction, stock_ledger.rebuild)
+        if fixed:
+            self.cache.invalidate(self.db_manager)
+        return fixed
 
+    def _in_transaction(self, fn):
+        with self.db_manager.transaction() as cursor:
+            return fn(cursor)
 
+    @cached_query
+    def search_product(self, name: str):
+        """
+        Busca por nome ou descrição no índice FTS5, do resultado mais relevante para o menos.
+        Ignora acentos e maiúsculas e aceita começo de palavra ("mar" encontra "Márcia").
+        Um termo sem palavras (vazio ou só pontuação) não encontra nada: para listar todos,
+        use get_products_page (ou get_all_products, que carrega a tabela inteira).
+        """
+        match = build_match_query(name)
+        if match is None:
+            return []
+        with self.db_manager as cursor:
+            cursor.execute(self.SEARCH_SQL, (match,))
+            return fetch_models(cursor, Product)
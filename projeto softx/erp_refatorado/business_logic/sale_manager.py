@@ -0,0 +1,124 @@
+import json
+from datetime import datetime
+from erp_refatorado.database.database_manager import DatabaseManager
+from erp_refatorado.database.sql_catalog import register
+from erp_refatorado.business_logic.cache import get_cache
+from erp_refatorado.business_logic import financial_ledger, sales_aggregates, stock_ledger
+from erp_refatorado.models.mapping import fetch_model, fetch_models
+from erp_refatorado.models.models import Sale, SaleItem, SalesSummary
+from erp_refatorado.models.money import Money
+
+
+class SaleManager:
+    """
+    Registro de vendas. finalize_sale grava a venda inteira numa única transação:
+    cabeçalho (vendas), itens (itens_venda), baixa do estoque (com os movimentos na
+    razão do estoque), totais do dia (vendas_diarias) e lançamento de entrada no
+    financeiro. Ou tudo é gravado, ou nada (ex.: produto inexistente no meio do carrinho).
+    """
+
+    # Comandos registrados no catálogo central de SQL (ver database/sql_catalog.py)
+    # Preços de todos os produtos do carrinho numa só consulta: os ids vão como um
+    # array JSON, então o texto do SQL é o mesmo para qualquer quantidade de itens
+    SELECT_PRICES_SQL = register('vendas.select_prices', """ SELECT id_produto, preco_venda FROM produtos
+                                 WHERE id_produto IN (SELECT value FROM json_each(?)) """)
+    INSERT_SQL = register('vendas.insert', """ INSERT INTO vendas (cliente_id, usuario_id, data_venda, total, desconto)
+                                              VALUES (?,?,?,?,?) """)
+    INSERT_ITEM_SQL = register('itens_venda.insert', """ INSERT INTO itens_venda (venda_id, produto_id, quantidade,
+                                                         preco_unitario, subtotal) VALUES (?,?,?,?,?) """)
+    SELECT_BY_ID_SQL = register('vendas.select_by_id', """ SELECT * FROM vendas WHERE id_vendas = ? """)
+    SELECT_ITEMS_SQL = register('itens_venda.select_by_sale', """ SELECT * FROM itens_venda WHERE venda_id = ?
+                                                               ORDER BY id_item """)
+
+    def __init__(self, db_manager: DatabaseManager = None):
+        # Permite compartilhar um único DatabaseManager (e seu pool) entre os managers
+        self.db_manager = db_manager or DatabaseManager()
+        # A venda baixa o estoque, que aparece na listagem de produtos
+        self.product_cache = get_cache(self.db_manager, 'produtos')
+
+    def finalize_sale(self, cliente_id: int, usuario_id: int, items, desconto: Money = Money(0)) -> Sale:
+        """
+        Grava a venda. items é uma sequência de (produto_id, quantidade); o preço de cada
+        item é o preco_venda atual do produto, lido dentro da mesma transação. O mesmo
+        produto pode aparecer em mais de um item. Retorna a Sale gravada (com id e total).
+        Levanta ValueError para carrinho vazio, quantidade inválida, produto inexistente
+        ou desconto maior que a soma dos itens, e InsufficientStockError (também um
+        ValueError, com a falta de cada produto) se o estoque não cobrir o carrinho.
+        """
+        items = [(int(produto_id), int(quantidade)) for produto_id, quantidade in items]
+        if not items:
+            raise ValueError("A venda não tem itens")
+        if any(quantidade <= 0 for _, quantidade in items):
+            raise ValueError("A quantidade de cada item deve ser maior que zero")
+        desconto = Money(desconto)
+        if desconto < 0:
+            raise ValueError("O desconto não pode ser negativo")
+
+        try:
+            return self.db_manager.run_write(self._finalize_sale, cliente_id, usuario_id, items, desconto)
+        finally:
+            # Mesmo sem venda, o estoque lido pela tela pode estar desatualizado
+            self.product_cache.invalidate(self.db_manager, *{produto_id for produto_id, _ in items})
+
+    def _finalize_sale(self, cliente_id, usuario_id, items, desconto):
+        with self.db_manager.transaction() as cursor:
+            product_ids = sorted({produto_id for produto_id, _ in items})
+            cursor.execute(self.SELECT_PRICES_SQL, (json.dumps(product_ids),))
+            prices = dict(cursor.fetchall())
+            missing = [produto_id for produto_id in product_ids if produto_id not in prices]
+            if missing:
+                raise ValueError(f"Produto(s) não encontrado(s): {', '.join(map(str, missing))}")
+
+            lines = [(produto_id, quantidade, Money(prices[produto_id]), Money(prices[produto_id]) * quantidade)
+                     for produto_id, quantidade in items]
+            subtotal = sum((line[3] for line in lines), Money(0))
+            if desconto > subtotal:
+                raise ValueError("O desconto é maior que o valor dos itens")
+            sale = Sale(cliente_id=cliente_id, usuario_id=usuario_id,
+                        data_venda=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                        total=subtotal - desconto, desconto=desconto)
+
+            cursor.execute(self.INSERT_SQL, (sale.cliente_id, sale.usuario_id, sale.data_venda, sale.total,
+                                             sale.desconto))
+            sale.id_vendas = cursor.lastrowid
+            cursor.executemany(self.INSERT_ITEM_SQL, [(sale.id_vendas, *line) for line in lines])
+            # Baixa condicional do estoque, registrada na razão como saída da venda: sem
+            # saldo, InsufficientStockError desfaz a venda inteira
+            stock_ledger.decrement(cursor, items, f"Venda #{sale.id_vendas}", usuario_id)
+            sales_aggregates.record_sale(cursor, sale, sum(quantidade for _, quantidade in items))
+            if sale.total > 0:
+                financial_ledger.post_entry(cursor, 'entrada', sale.total, f"Venda #{sale.id_vendas}", sale.data_venda)
+            return sale
+
+    def get_sale(self, sale_id: int):
+        with self.db_manager as cursor:
+            cursor.execute(self.SELECT_BY_ID_SQL, (sale_id,))
+            return fetch_model(cursor, Sale)
+
+    def get_sale_items(self, sale_id: int):
+        with self.db_manager as cursor:
+            cursor.execute(self.SELECT_ITEMS_SQL, (sale_id,))
+            return fetch_models(cursor, SaleItem)
+
+    def get_sales_history(self, start: str, end: str, group_by: str = 'dia', usuario_id: int = None,
+                          cliente_id: int = None):
+        """
+        Histórico de vendas de start a end (AAAA-MM-DD, inclusive) lido dos totais diários,
+        agrupado por 'dia', 'usuario' ou 'cliente', opcionalmente só de um vendedor e/ou
+        cliente. Retorna uma lista de SalesSummary.
+        """
+        if group_by not in sales_aggregates.HISTORY_SQL:
+            raise ValueError(f"Agrupamento inválido: '{group_by}'. "
+                             f"Use um de: {', '.join(sales_aggregates.HISTORY_SQL)}")
+        with self.db_manager as cursor:
+            cursor.execute(sales_aggregates.HISTORY_SQL[group_by],
+                           sales_aggregates.history_params(start, end, usuario_id, cliente_id))
+            return fetch_models(cursor, SalesSummary)
+
+    def rebuild_sales_history(self):
+        """Recalcula os totais diários a partir das vendas gravadas. Retorna quantas linhas gravou."""
+        return self.db_manager.run_write(self._rebuild_sales_history)
+
+    def _rebuild_sales_history(self):
+        with self.db_manager.transaction() as cursor:
+            return sales_aggregates.rebuild(cursor)
@@ -0,0 +1,75 @@
+# Em erp_refatorado/business_logic/sales_aggregates.py
+
+from erp_refatorado.database.sql_catalog import register
+
+# Totais de vendas por dia, vendedor e cliente (tabela vendas_diarias), para o
+# histórico de vendas. Calcular o histórico com GROUP BY sobre vendas e itens_venda a
+# cada abertura da tela percorre todas as vendas do período; com anos de dados isso
+# fica lento. Em vez disso, cada venda soma seus números à linha (dia, vendedor,
+# cliente) na mesma transação em que é gravada, e as telas leem só essas linhas:
+# o custo passa a depender da quantidade de dias, não da de vendas.
+#
+# A tabela é um resumo: rebuild() a recalcula inteira a partir de vendas e itens_venda
+# (ex.: depois de corrigir uma venda direto no banco). Pela linha de comando:
+#     python -m erp_refatorado.business_logic.sales_aggregates
+
+# Soma uma venda à linha do dia/vendedor/cliente, criando a linha se for a primeira
+ADD_SALE_SQL = register('vendas_diarias.add', """ INSERT INTO vendas_diarias (dia, usuario_id, cliente_id, vendas, itens, desconto, total)
+                        VALUES (?, ?, ?, 1, ?, ?, ?)
+                        ON CONFLICT(dia, usuario_id, cliente_id) DO UPDATE SET vendas = vendas + 1,
+                            itens = itens + excluded.itens, desconto = desconto + excluded.desconto,
+                            total = total + excluded.total """)
+DELETE_ALL_SQL = register('vendas_diarias.delete_all', """ DELETE FROM vendas_diarias """)
+REBUILD_SQL = register('vendas_diarias.rebuild', """ INSERT INTO vendas_diarias (dia, usuario_id, cliente_id, vendas, itens, desconto, total)
+                       SELECT date(v.data_venda), v.usuario_id, v.cliente_id, COUNT(*), COALESCE(SUM(i.itens), 0),
+                              SUM(v.desconto), SUM(v.total)
+                       FROM vendas v
+                       LEFT JOIN (SELECT venda_id, SUM(quantidade) AS itens FROM itens_venda GROUP BY venda_id) i
+                           ON i.venda_id = v.id_vendas
+                       GROUP BY date(v.data_venda), v.usuario_id, v.cliente_id """)
+
+# Histórico no período (dias AAAA-MM-DD, inclusive), com filtros opcionais de vendedor e
+# cliente (NULL = todos), agrupado por dia, vendedor ou cliente
+_FILTER = """ FROM vendas_diarias d {join}
+              WHERE d.dia BETWEEN ? AND ? AND (? IS NULL OR d.usuario_id = ?) AND (? IS NULL OR d.cliente_id = ?) """
+_TOTALS = "SUM(d.vendas) AS vendas, SUM(d.itens) AS itens, SUM(d.desconto) AS desconto, SUM(d.total) AS total"
+HISTORY_SQL = {
+    'dia': register('vendas_diarias.by_day', f""" SELECT d.dia AS chave, {_TOTALS} {_FILTER.format(join='')}
+                    GROUP BY d.dia ORDER BY d.dia """),
+    'usuario': register('vendas_diarias.by_user', f""" SELECT COALESCE(u.nome_usuario, '#' || d.usuario_id) AS chave, {_TOTALS}
+                        {_FILTER.format(join='LEFT JOIN usuarios u ON u.id_usuario = d.usuario_id')}
+                        GROUP BY d.usuario_id ORDER BY SUM(d.total) DESC """),
+    'cliente': register('vendas_diarias.by_client', f""" SELECT COALESCE(c.nome_cliente, '#' || d.cliente_id) AS chave, {_TOTALS}
+                        {_FILTER.format(join='LEFT JOIN clientes c ON c.id_cliente = d.cliente_id')}
+                        GROUP BY d.cliente_id ORDER BY SUM(d.total) DESC """),
+}
+
+
+def record_sale(cursor, sale, itens):
+    """Soma a venda (Sale já gravada, com itens unidades no total) aos totais do dia."""
+    cursor.execute(ADD_SALE_SQL, (sale.data_venda[:10], sale.usuario_id, sale.cliente_id, itens,
+                                  sale.desconto, sale.total))
+
+
+def history_params(start, end, usuario_id=None, cliente_id=None):
+    """Parâmetros de HISTORY_SQL para o período e os filtros."""
+    return (start, end, usuario_id, usuario_id, cliente_id, cliente_id)
+
+
+def rebuild(cursor):
+    """Recalcula vendas_diarias a partir de vendas e itens_venda. Retorna quantas linhas gravou."""
+    cursor.execute(DELETE_ALL_SQL)
+    cursor.execute(REBUILD_SQL)
+    return cursor.rowcount
+
+
+if __name__ == "__main__":
+    from erp_refatorado.database.database_manager import DatabaseManager
+
+    db_manager = DatabaseManager()
+    if db_manager.needs_migration():
+        db_manager.migrate()
+    with db_manager.transaction() as cursor:
+        linhas = rebuild(cursor)
+    print(f"Totais de vendas recalculados: {linhas} linhas (dia, vendedor, cliente).")
+    db_manager.close()
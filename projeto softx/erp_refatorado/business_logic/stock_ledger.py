@@ -0,0 +1,227 @@
+# Em erp_refatorado/business_logic/stock_ledger.py
+
+import json
+from datetime import datetime
+from config import STOCK_CHECKPOINT_INTERVAL
+from erp_refatorado.database.sql_catalog import register
+
+# Razão (ledger) do estoque. Toda alteração de quantidade vira uma linha em
+# movimentos_estoque (entrada, saída ou ajuste, com a variação e a origem) e, na
+# mesma transação, é somada ao registro do produto em estoque. estoque.quantidade é
+# portanto um resumo materializado da razão: lido em O(1), mas sempre reconstruível.
+#
+# Checkpoints: cada checkpoint grava em estoque_checkpoint, para os produtos que se
+# moveram desde o anterior, a quantidade segundo a própria razão (checkpoint anterior
+# + movimentos depois dele), junto com o id do último movimento incluído. Como um
+# produto só deixa de ser gravado quando não teve movimentos, a quantidade correta de
+# qualquer produto é
+#     estoque_checkpoint.quantidade + soma dos movimentos depois do último checkpoint
+# e recalcular o estoque (rebuild) só percorre essa "cauda" da razão, não a história
+# toda. O checkpoint nunca lê estoque.quantidade: uma divergência no resumo não é
+# copiada para a razão, e rebuild continua podendo corrigi-la.
+#
+# Os checkpoints são manutenção, fora do caminho das vendas: gravar um movimento não
+# consulta a razão. maybe_checkpoint() grava um quando a cauda passa de
+# STOCK_CHECKPOINT_INTERVAL movimentos (a aplicação chama ao iniciar); checkpoint()
+# grava sempre (ex.: ProductManager.checkpoint_stock).
+#
+# As funções recebem o cursor de uma transação já aberta pelo chamador
+# (db_manager.transaction()), para que movimento, estoque e venda sejam gravados juntos.
+#
+# Saídas que não podem deixar o estoque negativo (vendas, reservas) usam decrement():
+# cada produto é baixado por um único UPDATE condicional (quantidade >= pedido), que
+# lê e grava na mesma instrução. Não há janela entre conferir o saldo e gravar a baixa,
+# então vários caixas (threads ou processos) vendendo o mesmo produto nunca vendem
+# mais do que há em estoque nem perdem uma baixa.
+
+MOVEMENT_TYPES = ('entrada', 'saida', 'ajuste')
+
+INSERT_MOVEMENT_SQL = register('movimentos_estoque.insert', """ INSERT INTO movimentos_estoque
+                               (produto_id, tipo, quantidade, referencia, usuario_id, data) VALUES (?,?,?,?,?,?) """)
+# estoque.produto_id é único (migração 3): soma a quantidade ou cria o registro
+ADD_STOCK_SQL = register('estoque.add', """ INSERT INTO estoque (produto_id, quantidade) VALUES (?, ?)
+                             ON CONFLICT(produto_id) DO UPDATE SET quantidade = quantidade + excluded.quantidade """)
+LAST_MOVEMENT_SQL = register('movimentos_estoque.last_id',
+                             """ SELECT COALESCE(MAX(id_movimento), 0) FROM movimentos_estoque """)
+LAST_CHECKPOINT_SQL = register('estoque_checkpoint.last',
+                               """ SELECT COALESCE(MAX(ultimo_movimento), 0) FROM estoque_checkpoint """)
+# Checkpoint dos produtos movimentados entre o último checkpoint (exclusive) e o
+# movimento informado (inclusive): quantidade do checkpoint anterior + esses movimentos
+CHECKPOINT_SQL = register('estoque_checkpoint.save', """ INSERT INTO estoque_checkpoint (produto_id, ultimo_movimento, quantidade, data)
+                          SELECT m.produto_id, ?, COALESCE(MAX(c.quantidade), 0) + SUM(m.quantidade), ?
+                          FROM movimentos_estoque m LEFT JOIN estoque_checkpoint c ON c.produto_id = m.produto_id
+                          WHERE m.id_movimento > ? AND m.id_movimento <= ?
+                          GROUP BY m.produto_id
+                          ON CONFLICT(produto_id) DO UPDATE SET ultimo_movimento = excluded.ultimo_movimento,
+                              quantidade = excluded.quantidade, data = excluded.data """)
+# Quantidade de cada produto segundo a razão: checkpoint + cauda
+LEDGER_QUANTITIES_SQL = register('movimentos_estoque.quantities', """ SELECT produto_id, SUM(quantidade) AS quantidade FROM (
+                                     SELECT produto_id, quantidade FROM estoque_checkpoint
+                                     UNION ALL
+                                     SELECT produto_id, quantidade FROM movimentos_estoque WHERE id_movimento > ?)
+                                 GROUP BY produto_id """)
+CURRENT_QUANTITIES_SQL = register('estoque.quantities', """ SELECT produto_id, quantidade FROM estoque """)
+# Excluir um produto remove também a sua razão (ver delete_product)
+DELETE_MOVEMENTS_SQL = register('movimentos_estoque.delete_by_product', """ DELETE FROM movimentos_estoque
+                                WHERE produto_id = ? """)
+DELETE_CHECKPOINT_SQL = register('estoque_checkpoint.delete_by_product', """ DELETE FROM estoque_checkpoint
+                                 WHERE produto_id = ? """)
+DECREMENT_STOCK_SQL = register('estoque.decrement', """ UPDATE estoque SET quantidade = quantidade - ?
+                               WHERE produto_id = ? AND quantidade >= ? """)
+AVAILABLE_SQL = register('estoque.available', """ SELECT p.id_produto, COALESCE(e.quantidade, 0) FROM produtos p
+                         LEFT JOIN estoque e ON e.produto_id = p.id_produto
+                         WHERE p.id_produto IN (SELECT value FROM json_each(?)) """)
+SET_STOCK_SQL = register('estoque.set', """ INSERT INTO estoque (produto_id, quantidade) VALUES (?, ?)
+                         ON CONFLICT(produto_id) DO UPDATE SET quantidade = excluded.quantidade """)
+SELECT_BY_PRODUCT_SQL = register('movimentos_estoque.select_by_product', """ SELECT * FROM movimentos_estoque
+                                 WHERE produto_id = ? ORDER BY id_movimento DESC LIMIT ? """)
+
+
+class InsufficientStockError(ValueError):
+    """
+    Estoque insuficiente para uma ou mais linhas de uma baixa. shortages é a lista de
+    (produto_id, quantidade pedida, quantidade disponível), uma por produto que faltou.
+    """
+
+    def __init__(self, shortages):
+        self.shortages = shortages
+        lines = "; ".join(f"produto {produto_id}: pedido {pedido}, disponível {disponivel}"
+                          for produto_id, pedido, disponivel in shortages)
+        super().__init__(f"Estoque insuficiente ({lines})")
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def record_movements(cursor, movements, tipo, referencia=None, usuario_id=None):
+    """
+    Registra movimentos na razão e os aplica ao estoque. movements é uma sequência de
+    (produto_id, quantidade), com quantidade negativa para saídas.
+    """
+    if tipo not in MOVEMENT_TYPES:
+        raise ValueError(f"Tipo de movimento inválido: '{tipo}'. Use um de: {', '.join(MOVEMENT_TYPES)}")
+    movements = [(int(produto_id), int(quantidade)) for produto_id, quantidade in movements]
+    if not movements:
+        return
+    data = _now()
+    cursor.executemany(INSERT_MOVEMENT_SQL, [(produto_id, tipo, quantidade, referencia, usuario_id, data)
+                                             for produto_id, quantidade in movements])
+    cursor.executemany(ADD_STOCK_SQL, movements)
+
+
+def _totals(movements):
+    # Soma por produto, para que o mesmo produto em várias linhas seja conferido pelo total
+    totals = {}
+    for produto_id, quantidade in movements:
+        totals[produto_id] = totals.get(produto_id, 0) + quantidade
+    return totals
+
+
+def available(cursor, product_ids):
+    """{produto_id: quantidade em estoque} dos produtos informados (0 se não há registro)."""
+    cursor.execute(AVAILABLE_SQL, (json.dumps(sorted(set(product_ids))),))
+    return dict(cursor.fetchall())
+
+
+def shortages(cursor, movements):
+    """
+    Linhas que uma baixa de movements (produto_id, quantidade) deixaria sem estoque,
+    no formato de InsufficientStockError.shortages. Só lê: é uma prévia, não garante a baixa.
+    """
+    totals = _totals((int(produto_id), int(quantidade)) for produto_id, quantidade in movements)
+    stock = available(cursor, totals)
+    return [(produto_id, quantidade, stock.get(produto_id, 0))
+            for produto_id, quantidade in sorted(totals.items()) if quantidade > stock.get(produto_id, 0)]
+
+
+def decrement(cursor, movements, referencia=None, usuario_id=None, tipo='saida'):
+    """
+    Baixa condicional do estoque: movements é uma sequência de (produto_id, quantidade)
+    com quantidades positivas. Ou todas as linhas são baixadas e registradas na razão
+    (com quantidade negativa), ou nada muda e InsufficientStockError informa cada
+    produto que faltou. As baixas já feitas são desfeitas pelo rollback da transação do
+    chamador, por onde a exceção passa.
+    """
+    movements = [(int(produto_id), int(quantidade)) for produto_id, quantidade in movements]
+    if any(quantidade <= 0 for _, quantidade in movements):
+        raise ValueError("A quantidade a baixar deve ser maior que zero")
+    missing = []
+    for produto_id, quantidade in sorted(_totals(movements).items()):
+        cursor.execute(DECREMENT_STOCK_SQL, (quantidade, produto_id, quantidade))
+        if cursor.rowcount == 0:
+            missing.append((produto_id, quantidade))
+    if missing:
+        stock = available(cursor, [produto_id for produto_id, _ in missing])
+        raise InsufficientStockError([(produto_id, quantidade, stock.get(produto_id, 0))
+                                      for produto_id, quantidade in missing])
+    data = _now()
+    cursor.executemany(INSERT_MOVEMENT_SQL, [(produto_id, tipo, -quantidade, referencia, usuario_id, data)
+                                             for produto_id, quantidade in movements])
+
+
+def maybe_checkpoint(cursor, interval=STOCK_CHECKPOINT_INTERVAL):
+    """
+    Faz um checkpoint se houver interval movimentos ou mais depois do último. Retorna
+    o resultado de checkpoint(), ou None se ainda não era a hora.
+    """
+    last_movement = cursor.execute(LAST_MOVEMENT_SQL).fetchone()[0]
+    last_checkpoint = cursor.execute(LAST_CHECKPOINT_SQL).fetchone()[0]
+    if last_movement - last_checkpoint < interval:
+        return None
+    return checkpoint(cursor)
+
+
+def checkpoint(cursor):
+    """
+    Grava em estoque_checkpoint a quantidade, segundo a razão, dos produtos movimentados
+    desde o último checkpoint. Retorna (id do último movimento incluído, produtos gravados).
+    """
+    last_checkpoint = cursor.execute(LAST_CHECKPOINT_SQL).fetchone()[0]
+    last_movement = cursor.execute(LAST_MOVEMENT_SQL).fetchone()[0]
+    if last_movement <= last_checkpoint:
+        return last_checkpoint, 0
+    cursor.execute(CHECKPOINT_SQL, (last_movement, _now(), last_checkpoint, last_movement))
+    return last_movement, cursor.rowcount
+
+
+def delete_product(cursor, produto_id):
+    """
+    Remove os movimentos e o checkpoint de um produto que está sendo excluído, na mesma
+    transação da exclusão, para que a razão não fique com linhas de produto inexistente.
+    """
+    delete_products(cursor, [produto_id])
+
+
+def delete_products(cursor, product_ids):
+    """Versão em lote de delete_product, para vários produtos excluídos na mesma transação."""
+    params = [(int(produto_id),) for produto_id in product_ids]
+    cursor.executemany(DELETE_MOVEMENTS_SQL, params)
+    cursor.executemany(DELETE_CHECKPOINT_SQL, params)
+
+
+def ledger_quantities(cursor):
+    """{produto_id: quantidade} segundo a razão (checkpoint + movimentos posteriores)."""
+    last_checkpoint = cursor.execute(LAST_CHECKPOINT_SQL).fetchone()[0]
+    cursor.execute(LEDGER_QUANTITIES_SQL, (last_checkpoint,))
+    return dict(cursor.fetchall())
+
+
+def divergences(cursor):
+    """Produtos cujo estoque difere da razão: lista de (produto_id, no estoque, na razão)."""
+    expected = ledger_quantities(cursor)
+    cursor.execute(CURRENT_QUANTITIES_SQL)
+    current = dict(cursor.fetchall())
+    return [(produto_id, current.get(produto_id, 0), expected.get(produto_id, 0))
+            for produto_id in sorted(set(expected) | set(current))
+            if current.get(produto_id, 0) != expected.get(produto_id, 0)]
+
+
+def rebuild(cursor):
+    """
+    Recalcula estoque a partir da razão (checkpoint + cauda), corrigindo qualquer
+    divergência. Retorna a lista de divergências corrigidas, como em divergences().
+    """
+    fixed = divergences(cursor)
+    cursor.executemany(SET_STOCK_SQL, [(produto_id, expected) for produto_id, _, expected in fixed])
+    return fixed
@@ -1,45 +1,178 @@
-from erp_refatorado.database.database_manager import DatabaseManager
+from erp_refatorado.database.database_manager import DatabaseManager, BulkResult
+from config import BULK_CHUNK_SIZE, STREAM_BATCH_SIZE
+from erp_refatorado.database.search_index import build_match_query, only_digits, rank_expression
+from erp_refatorado.database.sql_catalog import register
+from erp_refatorado.business_logic.pagination import DEFAULT_PAGE_SIZE, Page, fetch_page
+from erp_refatorado.business_logic.cache import get_cache, cached_query, cached_entity
+from erp_refatorado.models.mapping import fetch_model, fetch_models, fetch_views, row_mapper
+from erp_refatorado.models.tracking import changed_fields, mark_clean
 from erp_refatorado.models.models import Supplier
 
 class SupplierManager:
-    def __init__(self):
-        self.db_manager = DatabaseManager()
+    # Comandos registrados no catálogo central de SQL (ver database/sql_catalog.py)
+    INSERT_SQL = register('fornecedores.insert', """ INSERT INTO fornecedores (nome, cnpj, telefone, email, rua, cep, bairro, cidade)
+                                               VALUES (?,?,?,?,?,?,?,?) """)
+    UPDATE_SQL = register('fornecedores.update', """ UPDATE fornecedores
+                     SET nome = ?, cnpj = ?, telefone = ?, email = ?, rua = ?, cep = ?, bairro = ?, cidade = ?
+                     WHERE id_fornecedor = ? """)
+    DELETE_SQL = register('fornecedores.delete', """ DELETE FROM fornecedores WHERE id_fornecedor = ? """)
+    SEARCH_SQL = register('fornecedores.search', f""" SELECT f.* FROM fornecedores_fts JOIN fornecedores f ON f.id_fornecedor = fornecedores_fts.rowid
+                      WHERE fornecedores_fts MATCH ? ORDER BY {rank_expression('fornecedores')} """)
+    SELECT_ALL_SQL = register('fornecedores.select_all', """ SELECT * FROM fornecedores ORDER BY nome ASC """)
+    SELECT_BY_ID_SQL = register('fornecedores.select_by_id', """ SELECT * FROM fornecedores WHERE id_fornecedor = ? """)
+    SELECT_NAMES_SQL = register('fornecedores.select_names',
+                                """ SELECT id_fornecedor, nome FROM fornecedores ORDER BY nome ASC, id_fornecedor ASC """)
+    ITER_SQL = register('fornecedores.iter', """ SELECT * FROM fornecedores ORDER BY id_fornecedor """)
+    # Coluna gerada só com dígitos (migração 6), com índice único
+    SELECT_BY_CNPJ_SQL = register('fornecedores.select_by_cnpj',
+                                  """ SELECT * FROM fornecedores WHERE cnpj_digitos = ? """)
+    # Colunas que update_supplier pode gravar (os nomes dos campos são os das colunas)
+    UPDATE_COLUMNS = ('nome', 'cnpj', 'telefone', 'email', 'rua', 'cep', 'bairro', 'cidade')
+
+    def __init__(self, db_manager: DatabaseManager = None):
+        # Permite compartilhar um único DatabaseManager (e seu pool) entre os managers
+        self.db_manager = db_manager or DatabaseManager()
+        # Cache de leitura compartilhado por todos os managers de fornecedores (ver cache.py)
+        self.cache = get_cache(self.db_manager, 'fornecedores')
+        # A listagem de produtos traz o nome do fornecedor: alterar/remover fornecedores a invalida
+        self.product_cache = get_cache(self.db_manager, 'produtos')
+
+    @staticmethod
+    def _insert_params(supplier: Supplier):
+        return (supplier.nome, supplier.cnpj, supplier.telefone, supplier.email, supplier.rua,
+                supplier.cep, supplier.bairro, supplier.cidade)
+
+    @classmethod
+    def _update_params(cls, supplier: Supplier):
+        return cls._insert_params(supplier) + (supplier.id_fornecedor,)
 
     def add_supplier(self, supplier: Supplier):
-        with self.db_manager as cursor:
-            cursor.execute(""" INSERT INTO fornecedores (nome, cnpj, telefone, email, rua, cep, bairro, cidade) 
-                                                       VALUES (?,?,?,?,?,?,?,?) """,
-                            (supplier.nome, supplier.cnpj, supplier.telefone, supplier.email, supplier.rua,
-                             supplier.cep, supplier.bairro, supplier.cidade))
+        self.db_manager.execute_write(self.INSERT_SQL, self._insert_params(supplier))
+        self.cache.invalidate(self.db_manager)
         return True
 
-    def get_all_suppliers(self):
+    def add_many(self, suppliers, chunk_size: int = BULK_CHUNK_SIZE) -> BulkResult:
+        """Insere vários fornecedores numa única transação. CNPJs/emails repetidos vão para result.conflicts."""
+        result = self.db_manager.bulk_execute(self.INSERT_SQL, suppliers, self._insert_params, chunk_size)
+        self.cache.invalidate(self.db_manager)
+        return result
+
+    def update_many(self, suppliers, chunk_size: int = BULK_CHUNK_SIZE) -> BulkResult:
+        """Atualiza vários fornecedores numa única transação."""
+        result = self.db_manager.bulk_execute(self.UPDATE_SQL, suppliers, self._update_params, chunk_size)
+        self.cache.invalidate(self.db_manager)
+        self.product_cache.invalidate(self.db_manager)
+        return result
+
+    def delete_many(self, supplier_ids, chunk_size: int = BULK_CHUNK_SIZE) -> BulkResult:
+        """Remove vários fornecedores (pelos ids) numa única transação."""
+        result = self.db_manager.bulk_execute(self.DELETE_SQL, supplier_ids, lambda supplier_id: (supplier_id,),
+                                              chunk_size)
+        self.cache.invalidate(self.db_manager)
+        self.product_cache.invalidate(self.db_manager)
+        return result
+
+    @cached_query
+    def get_all_suppliers(self, lazy: bool = False):
+        """
+        Carrega todos os fornecedores de uma vez. Para listas na tela prefira get_suppliers_page.
+        Com lazy=True devolve RowViews, que leem cada campo só quando acessado (ver models/mapping.py).
+        """
         with self.db_manager as cursor:
-            cursor.execute(""" SELECT * FROM fornecedores ORDER BY nome ASC; """)
-            rows = cursor.fetchall()
-            return [Supplier(id_fornecedor=row[0], nome=row[1], cnpj=row[2], telefone=row[3], email=row[4],
-                             rua=row[5], cep=row[6], bairro=row[7], cidade=row[8]) for row in rows]
+            cursor.execute(self.SELECT_ALL_SQL)
+            return fetch_views(cursor, Supplier) if lazy else fetch_models(cursor, Supplier)
 
-    def delete_supplier(self, supplier_id: int):
+    def iter_suppliers(self, batch_size: int = STREAM_BATCH_SIZE):
+        """
+        Percorre todos os fornecedores em ordem de id, lendo batch_size linhas por vez, para
+        exportações e relatórios sobre a tabela inteira com memória constante.
+        Não passa pelo cache. Ver DatabaseManager.stream sobre como parar no meio.
+        """
+        return self.db_manager.stream(self.ITER_SQL, mapper=lambda cursor: row_mapper(cursor, Supplier),
+                                      batch_size=batch_size)
+
+    @cached_query
+    def get_supplier_names(self):
+        """
+        Mapa {id_fornecedor: nome}, em ordem de nome, lendo só as duas colunas.
+        Fica no cache até algum fornecedor ser alterado; usado pelos combos de fornecedor.
+        """
         with self.db_manager as cursor:
-            cursor.execute("""DELETE FROM fornecedores WHERE id_fornecedor = ?""", (supplier_id,))
+            cursor.execute(self.SELECT_NAMES_SQL)
+            return dict(cursor.fetchall())
+
+    @cached_query
+    def get_suppliers_page(self, page_size: int = DEFAULT_PAGE_SIZE, cursor=None) -> Page:
+        """Uma página de fornecedores em ordem de nome. Passe page.next_cursor para obter a seguinte."""
+        return fetch_page(self.db_manager, "SELECT * FROM fornecedores", "nome", "id_fornecedor",
+                          Supplier, lambda supplier: (supplier.nome, supplier.id_fornecedor),
+                          page_size=page_size, cursor=cursor, name='fornecedores.page')
+
+    @cached_query
+    def search_suppliers_page(self, name: str, page_size: int = DEFAULT_PAGE_SIZE, cursor=None) -> Page:
+        """Versão paginada de search_supplier: filtra pelo índice FTS5, mas mantém a ordem por nome."""
+        match = build_match_query(name)
+        where = "id_fornecedor IN (SELECT rowid FROM fornecedores_fts WHERE fornecedores_fts MATCH ?)" if match else None
+        return fetch_page(self.db_manager, "SELECT * FROM fornecedores", "nome", "id_fornecedor",
+                          Supplier, lambda supplier: (supplier.nome, supplier.id_fornecedor),
+                          where=where, params=(match,) if match else (),
+                          page_size=page_size, cursor=cursor, name='fornecedores.page')
+
+    @cached_entity
+    def get_supplier_by_id(self, supplier_id: int):
+        with self.db_manager as cursor:
+            cursor.execute(self.SELECT_BY_ID_SQL, (supplier_id,))
+            return fetch_model(cursor, Supplier)
+
+    @cached_query
+    def get_supplier_by_cnpj(self, cnpj: str):
+        """Fornecedor com esse CNPJ, digitado com ou sem pontuação (None se não houver)."""
+        digits = only_digits(cnpj)
+        if not digits:
+            return None
+        with self.db_manager as cursor:
+            cursor.execute(self.SELECT_BY_CNPJ_SQL, (digits,))
+            return fetch_model(cursor, Supplier)
+
+    def delete_supplier(self, supplier_id: int):
+        self.db_manager.execute_write(self.DELETE_SQL, (supplier_id,))
+        self.cache.invalidate(self.db_manager, supplier_id)
+        self.product_cache.invalidate(self.db_manager)
         return True
 
     def update_supplier(self, supplier: Supplier):
-        with self.db_manager as cursor:
-            cursor.execute(""" 
-            UPDATE fornecedores
-            SET nome = ?, cnpj = ?, telefone = ?, email = ?, rua = ?, cep = ?, bairro = ?, cidade = ? WHERE id_fornecedor = ?""",
-                              (supplier.nome, supplier.cnpj, supplier.telefone, supplier.email, supplier.rua,
-                               supplier.cep, supplier.bairro, supplier.cidade, supplier.id_fornecedor))
+        """
+        Grava só as colunas alteradas desde que o fornecedor foi lido (todas, se ele não veio
+        do banco); sem alterações não executa nada. Para alterar um fornecedor lido use tracking.edit.
+        """
+        columns = changed_fields(supplier, self.UPDATE_COLUMNS)
+        if columns is None:
+            columns = self.UPDATE_COLUMNS
+        if not columns:
+            return True
+        self.db_manager.update_columns('fornecedores', 'id_fornecedor', supplier.id_fornecedor,
+                                       {column: getattr(supplier, column) for column in columns})
+        mark_clean(supplier)
+        self.cache.invalidate(self.db_manager, supplier.id_fornecedor)
+        # A listagem de produtos mostra só o nome do fornecedor
+        if 'nome' in columns:
+            self.product_cache.invalidate(self.db_manager)
         return True
 
+    @cached_query
     def search_supplier(self, name: str):
+        """
+        Busca por nome, CNPJ, email, cidade ou bairro no índice FTS5, do resultado mais relevante para o menos.
+        Ignora acentos e maiúsculas e aceita começo de palavra ("mar" encontra "Márcia").
+        Um termo sem palavras (vazio ou só pontuação) não encontra nada: para listar todos,
+        use get_suppliers_page (ou get_all_suppliers, que carrega a tabela inteira).
+        """
+        match = build_match_query(name)
+        if match is None:
+            return []
         with self.db_manager as cursor:
-            cursor.execute("SELECT * FROM fornecedores WHERE nome LIKE ? ORDER BY nome ASC", (f"%{name}%",))
-            rows = cursor.fetchall()
-            return [Supplier(id_fornecedor=row[0], nome=row[1], cnpj=row[2], telefone=row[3], email=row[4],
-                             rua=row[5], cep=row[6], bairro=row[7], cidade=row[8]) for row in rows]
+            cursor.execute(self.SEARCH_SQL, (match,))
+            return fetch_models(cursor, Supplier)
 
 
 
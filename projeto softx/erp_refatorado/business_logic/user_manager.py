@@ -1,10 +1,46 @@
-from erp_refatorado.database.database_manager import DatabaseManager
+from erp_refatorado.database.database_manager import DatabaseManager, BulkResult
+from config import BULK_CHUNK_SIZE, STREAM_BATCH_SIZE
+from erp_refatorado.database.search_index import build_match_query, rank_expression
+from erp_refatorado.database.sql_catalog import register
+from erp_refatorado.business_logic.pagination import DEFAULT_PAGE_SIZE, Page, fetch_page
+from erp_refatorado.business_logic.cache import get_cache, cached_query, cached_entity
+from erp_refatorado.models.mapping import fetch_model, fetch_models, fetch_views, row_mapper
+from erp_refatorado.models.tracking import changed_fields, loaded_value, mark_clean
 from erp_refatorado.models.models import User
 import bcrypt
 
 class UserManager:
-    def __init__(self):
-        self.db_manager = DatabaseManager()
+    # Comandos registrados no catálogo central de SQL (ver database/sql_catalog.py)
+    INSERT_SQL = register('usuarios.insert', """ INSERT INTO usuarios (nome_usuario, cpf_usuario, email_usuario, telefone_usuario,
+                                           data_nascimento, rua, cep, bairro, cidade, senha, tipo, permissao)
+                                           VALUES (?,?,?,?,?,?,?,?,?,?,?,?) """)
+    # Usado nas atualizações em lote: senha NULL mantém a senha atual
+    UPDATE_MANY_SQL = register('usuarios.update_many', """ UPDATE usuarios
+                          SET nome_usuario = ?, cpf_usuario = ?, email_usuario = ?, telefone_usuario = ?,
+                              data_nascimento = ?, rua = ?, cep = ?, bairro = ?, cidade = ?,
+                              senha = COALESCE(?, senha), tipo = ?, permissao = ?
+                          WHERE id_usuario = ? """)
+    # Colunas que update_user pode gravar (os nomes dos campos são os das colunas)
+    UPDATE_COLUMNS = ('nome_usuario', 'cpf_usuario', 'email_usuario', 'telefone_usuario', 'data_nascimento',
+                      'rua', 'cep', 'bairro', 'cidade', 'senha', 'tipo', 'permissao')
+    DELETE_SQL = register('usuarios.delete', """ DELETE FROM usuarios WHERE id_usuario = ? """)
+    SEARCH_SQL = register('usuarios.search', f""" SELECT u.* FROM usuarios_fts JOIN usuarios u ON u.id_usuario = usuarios_fts.rowid
+                      WHERE usuarios_fts MATCH ? ORDER BY {rank_expression('usuarios')} """)
+    SELECT_ALL_SQL = register('usuarios.select_all', """ SELECT * FROM usuarios ORDER BY nome_usuario ASC """)
+    SELECT_BY_ID_SQL = register('usuarios.select_by_id', """ SELECT * FROM usuarios WHERE id_usuario = ? """)
+    SELECT_PASSWORD_SQL = register('usuarios.select_password', """ SELECT senha FROM usuarios WHERE id_usuario = ? """)
+    SELECT_BY_USERNAME_SQL = register('usuarios.select_by_username',
+                                      """ SELECT * FROM usuarios WHERE nome_usuario = ? """)
+    ITER_SQL = register('usuarios.iter', """ SELECT * FROM usuarios ORDER BY id_usuario """)
+    # COLLATE NOCASE usa o índice idx_usuarios_email_nocase (migração 6)
+    SELECT_BY_EMAIL_SQL = register('usuarios.select_by_email',
+                                   """ SELECT * FROM usuarios WHERE email_usuario = ? COLLATE NOCASE """)
+
+    def __init__(self, db_manager: DatabaseManager = None):
+        # Permite compartilhar um único DatabaseManager (e seu pool) entre os managers
+        self.db_manager = db_manager or DatabaseManager()
+        # Cache de leitura compartilhado por todos os managers de usuarios (ver cache.py)
+        self.cache = get_cache(self.db_manager, 'usuarios')
 
     def hash_password(self, password):
         # Hash a password for the first time, with a randomly generated salt
@@ -14,81 +50,145 @@ class UserManager:
         # Check if the provided password matches the stored hash
         return bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8"))
 
+    def _insert_params(self, user: User):
+        return (user.nome_usuario, user.cpf_usuario, user.email_usuario, user.telefone_usuario,
+                user.data_nascimento, user.rua, user.cep, user.bairro, user.cidade,
+                self.hash_password(user.senha), user.tipo, user.permissao)
+
+    def _update_many_params(self, user: User):
+        hashed_pw = self.hash_password(user.senha) if user.senha else None
+        return (user.nome_usuario, user.cpf_usuario, user.email_usuario, user.telefone_usuario,
+                user.data_nascimento, user.rua, user.cep, user.bairro, user.cidade,
+                hashed_pw, user.tipo, user.permissao, user.id_usuario)
+
     def add_user(self, user: User):
-        hashed_pw = self.hash_password(user.senha)
-        with self.db_manager as cursor:
-            cursor.execute(""" INSERT INTO usuarios (nome_usuario, cpf_usuario, email_usuario, telefone_usuario,
-                                                        data_nascimento, rua, cep, bairro, cidade, senha, tipo, permissao) 
-                                                        VALUES (?,?,?,?,?,?,?,?,?,?,?,?) """,
-                            (user.nome_usuario, user.cpf_usuario, user.email_usuario, user.telefone_usuario,
-                             user.data_nascimento, user.rua, user.cep, user.bairro, user.cidade, hashed_pw, user.tipo, user.permissao))
+        # O hash da senha (lento) é calculado aqui, fora da fila de escrita
+        params = self._insert_params(user)
+        self.db_manager.execute_write(self.INSERT_SQL, params)
+        self.cache.invalidate(self.db_manager)
         return True
 
-    def get_all_users(self):
+    def add_many(self, users, chunk_size: int = BULK_CHUNK_SIZE) -> BulkResult:
+        """Insere vários usuários numa única transação. CPFs/emails repetidos vão para result.conflicts."""
+        result = self.db_manager.bulk_execute(self.INSERT_SQL, users, self._insert_params, chunk_size)
+        self.cache.invalidate(self.db_manager)
+        return result
+
+    def update_many(self, users, chunk_size: int = BULK_CHUNK_SIZE) -> BulkResult:
+        """
+        Atualiza vários usuários numa única transação.
+        Assim como em update_user, a senha só muda quando vem preenchida.
+        """
+        result = self.db_manager.bulk_execute(self.UPDATE_MANY_SQL, users, self._update_many_params, chunk_size)
+        self.cache.invalidate(self.db_manager)
+        return result
+
+    def delete_many(self, user_ids, chunk_size: int = BULK_CHUNK_SIZE) -> BulkResult:
+        """Remove vários usuários (pelos ids) numa única transação."""
+        result = self.db_manager.bulk_execute(self.DELETE_SQL, user_ids, lambda user_id: (user_id,), chunk_size)
+        self.cache.invalidate(self.db_manager)
+        return result
+
+    @cached_query
+    def get_all_users(self, lazy: bool = False):
+        """
+        Carrega todos os usuários de uma vez. Para listas na tela prefira get_users_page.
+        Com lazy=True devolve RowViews, que leem cada campo só quando acessado (ver models/mapping.py).
+        """
         with self.db_manager as cursor:
-            cursor.execute(""" SELECT * FROM usuarios ORDER BY nome_usuario ASC; """)
-            rows = cursor.fetchall()
-            return [User(id_usuario=row[0], nome_usuario=row[1], cpf_usuario=row[2], email_usuario=row[3],
-                         telefone_usuario=row[4], data_nascimento=row[5], rua=row[6], cep=row[7],
-                         bairro=row[8], cidade=row[9], senha=row[10], tipo=row[11], permissao=row[12]) for row in rows]
+            cursor.execute(self.SELECT_ALL_SQL)
+            return fetch_views(cursor, User) if lazy else fetch_models(cursor, User)
+
+    def iter_users(self, batch_size: int = STREAM_BATCH_SIZE):
+        """
+        Percorre todos os usuários em ordem de id, lendo batch_size linhas por vez, para
+        exportações e relatórios sobre a tabela inteira com memória constante.
+        Não passa pelo cache. Ver DatabaseManager.stream sobre como parar no meio.
+        """
+        return self.db_manager.stream(self.ITER_SQL, mapper=lambda cursor: row_mapper(cursor, User),
+                                      batch_size=batch_size)
+
+    @cached_query
+    def get_users_page(self, page_size: int = DEFAULT_PAGE_SIZE, cursor=None) -> Page:
+        """Uma página de usuários em ordem de nome. Passe page.next_cursor para obter a seguinte."""
+        return fetch_page(self.db_manager, "SELECT * FROM usuarios", "nome_usuario", "id_usuario",
+                          User, lambda user: (user.nome_usuario, user.id_usuario),
+                          page_size=page_size, cursor=cursor, name='usuarios.page')
+
+    @cached_query
+    def search_users_page(self, name: str, page_size: int = DEFAULT_PAGE_SIZE, cursor=None) -> Page:
+        """Versão paginada de search_user: filtra pelo índice FTS5, mas mantém a ordem por nome."""
+        match = build_match_query(name)
+        where = "id_usuario IN (SELECT rowid FROM usuarios_fts WHERE usuarios_fts MATCH ?)" if match else None
+        return fetch_page(self.db_manager, "SELECT * FROM usuarios", "nome_usuario", "id_usuario",
+                          User, lambda user: (user.nome_usuario, user.id_usuario),
+                          where=where, params=(match,) if match else (),
+                          page_size=page_size, cursor=cursor, name='usuarios.page')
 
     def delete_user(self, user_id: int):
-        with self.db_manager as cursor:
-            cursor.execute("""DELETE FROM usuarios WHERE id_usuario = ?""", (user_id,))
+        self.db_manager.execute_write(self.DELETE_SQL, (user_id,))
+        self.cache.invalidate(self.db_manager, user_id)
         return True
 
-    # No seu arquivo UserManager.py
-
     def update_user(self, user: User):
         """
-        Atualiza os dados de um usuário no banco de dados.
-        A senha só é atualizada se um novo valor for fornecido (não estiver em branco).
+        Atualiza os dados de um usuário no banco de dados, gravando só as colunas alteradas
+        desde que ele foi lido (todas, se não veio do banco); sem alterações não executa nada.
+        A senha só é atualizada se um novo valor for fornecido (não estiver em branco); o
+        novo valor chega em texto e é gravado com hash.
         """
-        # Se o objeto User veio com um texto no campo senha...
-        if user.senha:
-            # ...então crie um novo hash e prepare uma query para ATUALIZAR a senha.
-            hashed_pw = self.hash_password(user.senha)
-            query = """ UPDATE usuarios
-                        SET nome_usuario = ?, cpf_usuario = ?, email_usuario = ?, telefone_usuario = ?, 
-                            data_nascimento = ?, rua = ?, cep = ?, bairro = ?, cidade = ?, 
-                            senha = ?, tipo = ?, permissao = ? 
-                        WHERE id_usuario = ? """
-            params = (user.nome_usuario, user.cpf_usuario, user.email_usuario, user.telefone_usuario,
-                      user.data_nascimento, user.rua, user.cep, user.bairro, user.cidade,
-                      hashed_pw, user.tipo, user.permissao, user.id_usuario)
-        else:
-            # ...se a senha veio vazia, prepare uma query que NÃO TOCA na coluna senha.
-            query = """ UPDATE usuarios
-                        SET nome_usuario = ?, cpf_usuario = ?, email_usuario = ?, telefone_usuario = ?, 
-                            data_nascimento = ?, rua = ?, cep = ?, bairro = ?, cidade = ?, 
-                            tipo = ?, permissao = ? 
-                        WHERE id_usuario = ? """  # Veja que a coluna 'senha' não está aqui!
-            params = (user.nome_usuario, user.cpf_usuario, user.email_usuario, user.telefone_usuario,
-                      user.data_nascimento, user.rua, user.cep, user.bairro, user.cidade,
-                      user.tipo, user.permissao, user.id_usuario)
-
-        # Executa a query correta que foi montada no if/else
-        with self.db_manager as cursor:
-            cursor.execute(query, params)
-
+        columns = changed_fields(user, self.UPDATE_COLUMNS)
+        if columns is None:
+            columns = self.UPDATE_COLUMNS
+        values = {column: getattr(user, column) for column in columns}
+        if 'senha' in values:
+            if values['senha']:
+                values['senha'] = self.hash_password(values['senha'])
+            else:
+                # Senha em branco: mantém a atual, e o modelo volta a ter o hash gravado
+                del values['senha']
+                user.senha = self._stored_password(user)
+        if not values:
+            return True
+
+        self.db_manager.update_columns('usuarios', 'id_usuario', user.id_usuario, values)
+        if 'senha' in values:
+            # O modelo passa a ter o hash gravado: a senha em texto não fica no objeto nem
+            # no retrato usado por changed_fields
+            user.senha = values['senha']
+        mark_clean(user)
+        self.cache.invalidate(self.db_manager, user.id_usuario)
         return True
+
+    def _stored_password(self, user):
+        # Hash lido junto com o modelo; se ele não veio do banco, o que está gravado
+        stored = loaded_value(user, 'senha')
+        if stored is None:
+            with self.db_manager as cursor:
+                row = cursor.execute(self.SELECT_PASSWORD_SQL, (user.id_usuario,)).fetchone()
+                stored = row[0] if row else None
+        return stored
+
+    @cached_query
     def search_user(self, name: str):
+        """
+        Busca por nome, CPF, email, cidade ou bairro no índice FTS5, do resultado mais relevante para o menos.
+        Ignora acentos e maiúsculas e aceita começo de palavra ("mar" encontra "Márcia").
+        Um termo sem palavras (vazio ou só pontuação) não encontra nada: para listar todos,
+        use get_users_page (ou get_all_users, que carrega a tabela inteira).
+        """
+        match = build_match_query(name)
+        if match is None:
+            return []
         with self.db_manager as cursor:
-            cursor.execute("SELECT * FROM usuarios WHERE nome_usuario LIKE ? ORDER BY nome_usuario ASC", (f"%{name}%",))
-            rows = cursor.fetchall()
-            return [User(id_usuario=row[0], nome_usuario=row[1], cpf_usuario=row[2], email_usuario=row[3],
-                         telefone_usuario=row[4], data_nascimento=row[5], rua=row[6], cep=row[7],
-                         bairro=row[8], cidade=row[9], senha=row[10], tipo=row[11], permissao=row[12]) for row in rows]
+            cursor.execute(self.SEARCH_SQL, (match,))
+            return fetch_models(cursor, User)
 
+    @cached_entity
     def get_user_by_id(self, user_id: int):
         with self.db_manager as cursor:
-            cursor.execute("SELECT * FROM usuarios WHERE id_usuario = ?", (user_id,))
-            row = cursor.fetchone()
-            if row:
-                return User(id_usuario=row[0], nome_usuario=row[1], cpf_usuario=row[2], email_usuario=row[3],
-                            telefone_usuario=row[4], data_nascimento=row[5], rua=row[6], cep=row[7],
-                            bairro=row[8], cidade=row[9], senha=row[10], tipo=row[11], permissao=row[12])
-            return None
+            cursor.execute(self.SELECT_BY_ID_SQL, (user_id,))
+            return fetch_model(cursor, User)
 
     def authenticate_user(self, username, password):
         """
@@ -106,19 +206,22 @@ class UserManager:
 
         return None
 
+    @cached_query
     def get_user_by_username(self, username):
         """Busca um único usuário pelo nome de usuário."""
         with self.db_manager as cursor:
-            cursor.execute("SELECT * FROM usuarios WHERE nome_usuario = ?", (username,))
-            row = cursor.fetchone()
-            if row:
-                # Adapte os índices (row[0], row[1], etc.) para a ordem das colunas da sua tabela
-                return User(id_usuario=row[0], nome_usuario=row[1], cpf_usuario=row[2],
-                            email_usuario=row[3], telefone_usuario=row[4],
-                            data_nascimento=row[5], rua=row[6], cep=row[7],
-                            bairro=row[8], cidade=row[9], senha=row[10],
-                            tipo=row[11], permissao=row[12])
-        return None
+            cursor.execute(self.SELECT_BY_USERNAME_SQL, (username,))
+            return fetch_model(cursor, User)
+
+    @cached_query
+    def get_user_by_email(self, email):
+        """Busca um único usuário pelo e-mail, sem diferenciar maiúsculas (None se não houver)."""
+        email = (email or "").strip()
+        if not email:
+            return None
+        with self.db_manager as cursor:
+            cursor.execute(self.SELECT_BY_EMAIL_SQL, (email,))
+            return fetch_model(cursor, User)
 
 
 
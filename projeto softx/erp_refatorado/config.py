@@ -1,11 +1,125 @@
-# Em erp_refatorado/config.py
-
-import os
-
-# Pega o caminho absoluto da pasta onde este arquivo (config.py) está
-# que é a raiz do seu projeto.
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-
-# Constrói o caminho completo para o banco de dados, que agora está
-# corretamente dentro da pasta 'database'.
-DB_PATH = os.path.join(BASE_DIR, 'database', 'clientes.bd')
\ No newline at end of file
+# Em erp_refatorado/config.py
+
+import os
+
+# Pega o caminho absoluto da pasta onde este arquivo (config.py) está
+# que é a raiz do seu projeto.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Constrói o caminho completo para o banco de dados, que agora está
+# corretamente dentro da pasta 'database'.
+DB_PATH = os.path.join(BASE_DIR, 'database', 'clientes.bd')
+
+# Modo em memória (ver database/memory_db.py), para testes, demonstrações e terminais
+# de consulta: o DatabaseManager copia DB_MEMORY_TEMPLATE para a memória ao iniciar e
+# roda todo o sistema sobre essa cópia, sem tocar no arquivo. Ligue com SOFTX_DB_MEMORY=1.
+DB_MEMORY = os.environ.get('SOFTX_DB_MEMORY', '0') == '1'
+# Arquivo carregado na memória; vazio cria um banco novo (as migrações criam as tabelas).
+DB_MEMORY_TEMPLATE = os.environ.get('SOFTX_DB_TEMPLATE', DB_PATH)
+# Arquivo em que o conteúdo da memória é gravado ao encerrar (e a cada
+# DB_MEMORY_SAVE_INTERVAL segundos, se maior que zero). Vazio: as alterações são
+# descartadas ao sair, a não ser que se chame save_snapshot(caminho).
+DB_MEMORY_SAVE_PATH = os.environ.get('SOFTX_DB_SAVE_PATH', '')
+DB_MEMORY_SAVE_INTERVAL = float(os.environ.get('SOFTX_DB_SAVE_INTERVAL', '0'))
+
+# Quantidade máxima de conexões mantidas abertas no pool do DatabaseManager.
+DB_POOL_SIZE = 5
+
+# Quantidade de linhas enviadas por executemany nas operações em lote (add_many etc.).
+BULK_CHUNK_SIZE = 500
+
+# Razão do estoque (ver business_logic/stock_ledger.py): ao iniciar, a aplicação grava
+# um checkpoint das quantidades se houver tantos movimentos desde o último, para que
+# recalcular o estoque a partir da razão só precise somar os movimentos posteriores a ele.
+STOCK_CHECKPOINT_INTERVAL = 10_000
+
+# Linhas lidas por fetchmany nas leituras em streaming (iter_clients etc.): limita a
+# memória usada independentemente do tamanho da tabela.
+STREAM_BATCH_SIZE = 1000
+
+
+# Perfis de desempenho do SQLite. O DatabaseManager aplica os PRAGMAs do perfil
+# escolhido em toda conexão que abre.
+#   - durable: WAL com sincronização completa; nenhum commit se perde em queda de energia.
+#   - balanced: WAL com synchronous=NORMAL; pode perder os últimos commits numa queda
+#     de energia, mas o banco nunca fica corrompido. Bom padrão para desktop.
+#   - pos-terminal: igual ao balanced, com mais cache e mmap para terminais de caixa.
+# cache_size negativo é em KiB (ex.: -16000 = ~16 MB); mmap_size é em bytes.
+# temp_store fica em DEFAULT: com MEMORY, os sub-journals que o SQLite grava para os
+# gatilhos de busca (FTS5) dentro de SAVEPOINTs deixaram as cargas em lote ~3x mais lentas.
+DB_PROFILES = {
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -8000,
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 5000,
+    },
+    'balanced': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -16000,
+        'mmap_size': 64 * 1024 * 1024,
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 5000,
+    },
+    'pos-terminal': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -64000,
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 10000,
+    },
+    # Usado no modo em memória (DB_MEMORY): não há arquivo para sincronizar nem para
+    # mapear, e o banco em memória não aceita WAL.
+    'memory': {
+        'journal_mode': 'MEMORY',
+        'synchronous': 'OFF',
+        'cache_size': -16000,
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 5000,
+    },
+}
+
+# Perfil em uso; pode ser trocado pela variável de ambiente SOFTX_DB_PROFILE.
+# Bancos em memória usam sempre o perfil 'memory'.
+DB_PROFILE = os.environ.get('SOFTX_DB_PROFILE', 'balanced')
+
+# Instrumentação das consultas (ver database/instrumentation.py). Com ela ligada, o
+# DatabaseManager mede cada comando SQL e grava as lentas em SLOW_QUERY_LOG. Tem custo
+# em cada comando e em cada linha lida, então fica desligada; ligue com SOFTX_QUERY_STATS=1
+# para diagnóstico (as estatísticas são mostradas e gravadas ao sair do sistema).
+QUERY_STATS_ENABLED = os.environ.get('SOFTX_QUERY_STATS', '0') == '1'
+# Comandos que levam mais que isso (execução + leitura das linhas) vão para o log.
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SOFTX_SLOW_QUERY_MS', '100'))
+SLOW_QUERY_LOG = os.path.join(BASE_DIR, 'database', 'slow_queries.log')
+# Captura o EXPLAIN QUERY PLAN de cada comando novo para apontar varreduras completas.
+# Custa uma consulta extra por comando distinto; ligue só para diagnóstico.
+EXPLAIN_FULL_SCANS = os.environ.get('SOFTX_EXPLAIN_SCANS', '0') == '1'
+# Arquivo padrão do DatabaseManager.dump_query_stats().
+QUERY_STATS_DUMP_PATH = os.path.join(BASE_DIR, 'database', 'query_stats.json')
+
+# Fila de escrita (ver database/write_queue.py): com ela ligada, todas as alterações
+# dos managers passam por uma única thread gravadora, que junta até WRITE_BATCH_SIZE
+# operações ou o que chegar em WRITE_BATCH_DELAY_MS num único commit.
+# Com 0, cada lote leva o que já estiver na fila: enquanto um commit acontece, os
+# próximos pedidos se acumulam. Foi o mais rápido com chamadores que esperam a
+# resposta (8 threads: ~2x o "um commit por operação" no perfil durable); uma
+# janela maior só compensa para quem enfileira via db_manager.write sem esperar.
+WRITE_QUEUE_ENABLED = os.environ.get('SOFTX_WRITE_QUEUE', '0') == '1'
+WRITE_BATCH_SIZE = 200
+WRITE_BATCH_DELAY_MS = 0.0
+
+# Managers assíncronos (ver business_logic/async_managers.py): quantas chamadas rodam
+# ao mesmo tempo (cada uma com sua conexão do pool) e o timeout padrão, em segundos.
+ASYNC_MAX_WORKERS = DB_POOL_SIZE
+ASYNC_TIMEOUT = 30.0
+
+# Cache de leitura dos managers (ver business_logic/cache.py). SOFTX_CACHE=0 desliga.
+CACHE_ENABLED = os.environ.get('SOFTX_CACHE', '1') != '0'
+# Entidades (por id) e resultados de consulta (listas/páginas/buscas) guardados por tabela.
+CACHE_MAX_ENTITIES = 1000
+CACHE_MAX_QUERIES = 64
@@ -0,0 +1,519 @@
+# Em erp_refatorado/database/benchmark.py
+
+import dataclasses
+import datetime
+import sqlite3
+import gc
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from erp_refatorado.database.database_manager import DatabaseManager
+from erp_refatorado.database.sql_catalog import statement_cache_size
+from erp_refatorado.business_logic import analytics, stock_ledger
+from erp_refatorado.business_logic.client_manager import ClientManager
+from erp_refatorado.business_logic.financial_manager import FinancialManager
+from erp_refatorado.business_logic.product_manager import ProductManager
+from erp_refatorado.business_logic.sale_manager import SaleManager
+from erp_refatorado.business_logic.stock_ledger import InsufficientStockError
+from erp_refatorado.models.mapping import fetch_models, fetch_views
+from erp_refatorado.models.models import Client, FrozenClient, Product
+from erp_refatorado.models.tracking import edit
+
+# Script de medição de desempenho. Cria um banco temporário (o banco real em
+# database/clientes.bd nunca é tocado), popula com dados sintéticos e mede os
+# cenários abaixo. Uso:
+#     python -m erp_refatorado.database.benchmark [quantidade_de_linhas]
+
+PRIMEIROS_NOMES = ['José', 'João', 'Maria', 'Ana', 'Antônio', 'Francisco', 'Luís', 'Márcia', 'Conceição',
+                   'Sebastião', 'Letícia', 'Júlia', 'Gonçalo', 'Inês', 'Cecília', 'Otávio', 'Patrícia']
+SOBRENOMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Conceição', 'Gonçalves', 'Araújo', 'Magalhães',
+              'Brandão', 'Falcão', 'Lima', 'Pereira', 'Guimarães', 'Assunção', 'Rocha', 'Simões']
+CIDADES = ['São Paulo', 'Goiânia', 'Maceió', 'Belém', 'Florianópolis', 'Vitória', 'Brasília', 'Cuiabá']
+
+
+def medir(descricao, funcao, repeticoes=20):
+    """Executa a função várias vezes e mostra a latência média e a pior."""
+    tempos = []
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    linhas = len(resultado.items if hasattr(resultado, 'items') else resultado) if resultado is not None else 0
+    print(f"  {descricao:<48} média={sum(tempos) / len(tempos):9.2f} ms  pior={max(tempos):9.2f} ms"
+          f"  linhas={linhas}")
+    return resultado
+
+
+def gerar_clientes(quantidade):
+    rng = random.Random(42)
+    for i in range(quantidade):
+        nome = f"{rng.choice(PRIMEIROS_NOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}"
+        yield Client(nome_cliente=nome, cpf_cliente=f"{i:011d}", email_cliente=f"cliente{i}@exemplo.com",
+                     telefone_cliente="(11) 99999-0000", data_nascimento="1990-01-01", rua="Rua A",
+                     cep="00000-000", bairro="Centro", cidade=rng.choice(CIDADES))
+
+
+def popular_clientes(db_manager, quantidade):
+    print(f"Inserindo {quantidade} clientes...")
+    inicio = time.perf_counter()
+    resultado = ClientManager(db_manager).add_many(gerar_clientes(quantidade), chunk_size=5000)
+    print(f"  {resultado.affected} clientes em {time.perf_counter() - inicio:.1f} s")
+
+
+def cenario_busca(db_manager):
+    """Busca textual: LIKE '%termo%' (varredura completa) contra o índice FTS5 e o índice de CPF."""
+    print("\nBusca de clientes (LIKE contra FTS5):")
+    client_manager = ClientManager(db_manager)
+    # Mede o banco, não o cache de leitura (que responderia da 2ª repetição em diante)
+    client_manager.cache.enabled = False
+
+    def busca_like(termo):
+        with db_manager as cursor:
+            cursor.execute("SELECT * FROM clientes WHERE nome_cliente LIKE ? ORDER BY nome_cliente ASC",
+                           (f"%{termo}%",))
+            return cursor.fetchall()
+
+    def busca_cpf_like(digitos):
+        with db_manager as cursor:
+            cursor.execute("SELECT * FROM clientes WHERE cpf_cliente LIKE ?", (f"%{digitos}%",))
+            return cursor.fetchall()
+
+    medir("LIKE '%magalhães%'", lambda: busca_like("Magalhães"), repeticoes=3)
+    medir("FTS5 'magalhaes' (sem acento)", lambda: client_manager.search_client("magalhaes"), repeticoes=3)
+    medir("FTS5 'jos falc' (prefixos)", lambda: client_manager.search_client("jos falc"))
+    medir("FTS5 paginado 'inês assunção' (200 itens)",
+          lambda: client_manager.search_clients_page("inês assunção"))
+    medir("FTS5 por CPF '00000012345'", lambda: client_manager.search_client("00000012345"))
+    medir("índice cpf_digitos '000.000.123-45'", lambda: [client_manager.get_client_by_cpf("000.000.123-45")])
+    medir("LIKE no CPF '%12345%'", lambda: busca_cpf_like("12345"), repeticoes=3)
+
+
+def cenario_memoria(db_manager, linhas=100_000):
+    """Memória retida e tempo para carregar linhas de clientes em cada formato de modelo."""
+    print(f"\nMemória para {linhas} clientes carregados:")
+    # Como os modelos eram antes: dataclass comum (com __dict__), montada por índice
+    ClienteComDict = dataclasses.make_dataclass(
+        "ClienteComDict", [(f.name, f.type, dataclasses.field(default=f.default)) for f in dataclasses.fields(Client)])
+
+    def por_indice(cursor):
+        return [ClienteComDict(id_cliente=row[0], nome_cliente=row[1], cpf_cliente=row[2], email_cliente=row[3],
+                               telefone_cliente=row[4], data_nascimento=row[5], rua=row[6], cep=row[7],
+                               bairro=row[8], cidade=row[9]) for row in cursor.fetchall()]
+
+    formatos = [
+        ("tuplas do sqlite3 (referência)", lambda cursor: cursor.fetchall()),
+        ("dataclass com __dict__ (antes)", por_indice),
+        ("dataclass slots=True (Client)", lambda cursor: fetch_models(cursor, Client)),
+        ("dataclass frozen + slots (FrozenClient)", lambda cursor: fetch_models(cursor, FrozenClient)),
+        ("RowView preguiçosa (fetch_views)", lambda cursor: fetch_views(cursor, Client)),
+    ]
+    for descricao, carregar in formatos:
+        gc.collect()
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        with db_manager as cursor:
+            cursor.execute("SELECT * FROM clientes ORDER BY id_cliente LIMIT ?", (linhas,))
+            resultado = carregar(cursor)
+        duracao = (time.perf_counter() - inicio) * 1000
+        memoria, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  {descricao:<48} {memoria / 1024 / 1024:8.1f} MB  ({memoria / len(resultado):6.0f} bytes/linha)"
+              f"  {duracao:8.1f} ms")
+        del resultado
+
+
+def cenario_streaming(db_manager):
+    """Pico de memória ao percorrer a tabela inteira: lista completa contra iter_clients."""
+    print("\nLeitura da tabela inteira de clientes (pico de memória):")
+    client_manager = ClientManager(db_manager)
+    client_manager.cache.enabled = False
+
+    def percorrer(descricao, clientes):
+        gc.collect()
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        cidades = set()
+        total = 0
+        for cliente in clientes():
+            cidades.add(cliente.cidade)
+            total += 1
+        duracao = time.perf_counter() - inicio
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  {descricao:<40} {total:>9} linhas  pico={pico / 1024 / 1024:8.1f} MB  {duracao:6.2f} s")
+
+    percorrer("get_all_clients (lista completa)", client_manager.get_all_clients)
+    percorrer("iter_clients (fetchmany de 1000)", client_manager.iter_clients)
+
+    # Parar no meio devolve a conexão ao pool
+    clientes = client_manager.iter_clients()
+    next(clientes)
+    em_uso = db_manager.pool_stats()['in_use']
+    clientes.close()
+    print(f"  conexões emprestadas durante a leitura: {em_uso}; após close(): {db_manager.pool_stats()['in_use']}")
+
+
+def cenario_analitico(db_manager, produtos=200_000, fornecedores=50):
+    """Margem por fornecedor: laço Python sobre get_all_products contra colunas NumPy."""
+    print(f"\nMargem do estoque por fornecedor ({produtos} produtos):")
+    product_manager = ProductManager(db_manager)
+    product_manager.cache.enabled = False
+    product_manager.add_many((Product(nome=f"Produto {i}", preco_venda=random.randint(100, 50_000),
+                                      preco_compra=random.randint(50, 25_000),
+                                      fornecedor_id=random.randint(1, fornecedores)) for i in range(produtos)),
+                             chunk_size=5000)
+    db_manager.bulk_execute("INSERT INTO estoque (produto_id, quantidade) SELECT id_produto, abs(random()) % 500 "
+                            "FROM produtos", [()])
+
+    def margem_python():
+        receita, custo = {}, {}
+        for produto in product_manager.get_all_products():
+            chave = produto.fornecedor_id or 0
+            receita[chave] = receita.get(chave, 0) + produto.preco_venda * produto.stock_quantity
+            custo[chave] = custo.get(chave, 0) + produto.preco_compra * produto.stock_quantity
+        return [(chave, receita[chave] - custo[chave]) for chave in sorted(receita)]
+
+    medir("laço sobre get_all_products", margem_python, repeticoes=3)
+    if analytics.np is None:
+        print("  (numpy não instalado: versão vetorizada não medida)")
+        return
+    medir("analytics.margin_by_supplier (NumPy)", lambda: analytics.margin_by_supplier(db_manager), repeticoes=3)
+    medir("  só a carga em colunas (load_columns)", lambda: analytics.load_columns(db_manager, analytics.STOCK_SQL),
+          repeticoes=3)
+
+
+def cenario_catalogo(db_manager, consultas=20_000):
+    """Busca por id repetida: comando compilado reutilizado (catálogo) contra recompilado a cada vez."""
+    print(f"\nComandos preparados ({consultas} buscas por id):")
+    sql = ClientManager.SELECT_BY_ID_SQL
+    # cached_statements=0 desliga o cache do sqlite3: cada execute volta a compilar o SQL
+    for descricao, cache in [("catálogo (cache do sqlite3)", statement_cache_size()),
+                             ("sem cache de comandos (recompila sempre)", 0)]:
+        conn = sqlite3.connect(db_manager.db_name, cached_statements=cache)
+        inicio = time.perf_counter()
+        for i in range(consultas):
+            conn.execute(sql, (i % 1000 + 1,)).fetchone()
+        duracao = time.perf_counter() - inicio
+        conn.close()
+        print(f"  {descricao:<48} {duracao * 1000:8.1f} ms  ({consultas / duracao:9.0f} consultas/s)")
+
+
+def cenario_atualizacao(db_manager, atualizacoes=2_000):
+    """Troca só o telefone de vários clientes: UPDATE de todas as colunas contra só das alteradas."""
+    print(f"\nAtualização de clientes ({atualizacoes} alterações de telefone):")
+    client_manager = ClientManager(db_manager)
+    clientes = client_manager.get_clients_page(page_size=atualizacoes).items
+    for descricao, preparar in [("todas as colunas (sem rastreamento)",
+                                 lambda c, tel: Client(**{**{f: getattr(c, f) for f in ClientManager.UPDATE_COLUMNS},
+                                                          'id_cliente': c.id_cliente, 'telefone_cliente': tel})),
+                                ("só as colunas alteradas (tracking.edit)",
+                                 lambda c, tel: edit(c, telefone_cliente=tel))]:
+        alterados = [preparar(c, f"(11) 9{i:04d}-{random.randint(0, 9999):04d}") for i, c in enumerate(clientes)]
+        inicio = time.perf_counter()
+        for cliente in alterados:
+            client_manager.update_client(cliente)
+        duracao = time.perf_counter() - inicio
+        print(f"  {descricao:<48} {duracao * 1000:8.1f} ms  ({len(alterados) / duracao:9.0f} updates/s)")
+    inicio = time.perf_counter()
+    for cliente in alterados:
+        client_manager.update_client(cliente)
+    duracao = time.perf_counter() - inicio
+    print(f"  {'sem alterações (nenhum UPDATE executado)':<48} {duracao * 1000:8.1f} ms")
+
+
+def cenario_escrita_concorrente(pasta, threads=8, por_thread=250):
+    """Várias threads cadastrando clientes: um commit por add_client contra a fila de escrita."""
+    print(f"\nEscrita concorrente ({threads} threads x {por_thread} add_client):")
+    for usar_fila in (False, True):
+        db_manager = DatabaseManager(os.path.join(pasta, f"escrita_{int(usar_fila)}.bd"), write_queue=usar_fila)
+        db_manager.migrate()
+        client_manager = ClientManager(db_manager)
+        erros = []
+
+        def trabalhador(numero):
+            for i in range(por_thread):
+                n = numero * por_thread + i
+                try:
+                    client_manager.add_client(Client(nome_cliente=f"Cliente {n}", cpf_cliente=f"{n:011d}",
+                                                     email_cliente=f"concorrente{n}@exemplo.com"))
+                except Exception as e:
+                    erros.append(e)
+
+        inicio = time.perf_counter()
+        trabalhadores = [threading.Thread(target=trabalhador, args=(numero,)) for numero in range(threads)]
+        for t in trabalhadores:
+            t.start()
+        for t in trabalhadores:
+            t.join()
+        duracao = time.perf_counter() - inicio
+        total = threads * por_thread - len(erros)
+        descricao = "fila de escrita (group commit)" if usar_fila else "um commit por operação"
+        print(f"  {descricao:<48} {total / duracao:9.0f} escritas/s  erros={len(erros)}")
+        if usar_fila:
+            print(f"  {'':<48} {db_manager.write_queue_stats()}")
+        db_manager.close()
+
+
+def cenario_banco_em_memoria(pasta, operacoes=2_000):
+    """Cadastros um a um (um commit cada) e buscas por CPF: arquivo em disco contra banco em memória."""
+    print(f"\nBanco em disco x em memória ({operacoes} cadastros e buscas):")
+    for descricao, db_manager in [("arquivo (perfil durable)", DatabaseManager(os.path.join(pasta, "disco.bd"),
+                                                                               profile='durable')),
+                                  ("memória (SOFTX_DB_MEMORY)", DatabaseManager(':memory:'))]:
+        db_manager.migrate()
+        client_manager = ClientManager(db_manager)
+        client_manager.cache.enabled = False
+        inicio = time.perf_counter()
+        for i in range(operacoes):
+            client_manager.add_client(Client(nome_cliente=f"Cliente {i}", cpf_cliente=f"{i:011d}",
+                                             email_cliente=f"memoria{i}@exemplo.com"))
+        escrita = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        for i in range(operacoes):
+            client_manager.get_client_by_cpf(f"{i:011d}")
+        leitura = time.perf_counter() - inicio
+        print(f"  {descricao:<48} {operacoes / escrita:9.0f} cadastros/s  {operacoes / leitura:9.0f} buscas/s")
+        db_manager.close()
+
+
+# Meta de latência do fechamento de uma venda (finalize_sale), no percentil 95
+META_CHECKOUT_P95_MS = 10.0
+
+
+def popular_produtos(db_manager, quantidade, estoque=1_000_000):
+    """
+    Insere produtos sintéticos direto em SQL (com estoque, registrado na razão como
+    saldo inicial, e um checkpoint), para cenários com tabelas grandes.
+    """
+    print(f"Inserindo {quantidade} produtos...")
+    inicio = time.perf_counter()
+    with db_manager.transaction() as cursor:
+        cursor.execute("""INSERT INTO produtos (nome, preco_venda, preco_compra)
+                          WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+                          SELECT 'Produto ' || i, 100 + abs(random()) % 50000, 50 + abs(random()) % 25000 FROM n""",
+                       (quantidade,))
+        cursor.execute("INSERT INTO movimentos_estoque (produto_id, tipo, quantidade, referencia) "
+                       "SELECT id_produto, 'ajuste', ?, 'Saldo inicial' FROM produtos", (estoque,))
+        cursor.execute("INSERT INTO estoque (produto_id, quantidade) SELECT id_produto, ? FROM produtos", (estoque,))
+        stock_ledger.checkpoint(cursor)
+    print(f"  {quantidade} produtos em {time.perf_counter() - inicio:.1f} s")
+
+
+def cenario_venda(pasta, produtos=1_000_000, vendas=2_000, itens_por_venda=5):
+    """Latência do fechamento de venda (cabeçalho, itens, estoque e financeiro numa transação)."""
+    print(f"\nFechamento de vendas ({vendas} vendas de {itens_por_venda} itens, {produtos} produtos):")
+    db_manager = DatabaseManager(os.path.join(pasta, "vendas.bd"))
+    db_manager.migrate()
+    popular_produtos(db_manager, produtos)
+    with db_manager.transaction() as cursor:
+        cursor.execute("INSERT INTO clientes (nome_cliente, cpf_cliente, email_cliente, telefone_cliente, "
+                       "data_nascimento, rua, cep, bairro, cidade) VALUES ('Cliente', '1', 'c@x', '', '', '', '', '', '')")
+        cliente_id = cursor.lastrowid
+    sale_manager = SaleManager(db_manager)
+
+    tempos = []
+    for _ in range(vendas):
+        carrinho = [(random.randint(1, produtos), random.randint(1, 3)) for _ in range(itens_por_venda)]
+        inicio = time.perf_counter()
+        sale_manager.finalize_sale(cliente_id, 1, carrinho)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    p50, p95, p99 = (tempos[int(len(tempos) * q) - 1] for q in (0.50, 0.95, 0.99))
+    situacao = "OK" if p95 <= META_CHECKOUT_P95_MS else "ACIMA DA META"
+    print(f"  finalize_sale  p50={p50:.2f} ms  p95={p95:.2f} ms  p99={p99:.2f} ms  pior={tempos[-1]:.2f} ms"
+          f"  (meta p95 <= {META_CHECKOUT_P95_MS:.0f} ms: {situacao})")
+    with db_manager as cursor:
+        itens = cursor.execute("SELECT COUNT(*) FROM itens_venda").fetchone()[0]
+        lancamentos = cursor.execute("SELECT COUNT(*) FROM financeiro").fetchone()[0]
+    print(f"  {itens} itens gravados, {lancamentos} lançamentos no financeiro")
+
+    # Conferência do estoque com a razão (checkpoint + movimentos posteriores)
+    inicio = time.perf_counter()
+    divergencias = ProductManager(db_manager).verify_stock()
+    print(f"  conferência do estoque com a razão: {time.perf_counter() - inicio:.2f} s, "
+          f"{len(divergencias)} divergências")
+
+    # Exclusão em lote: a razão dos produtos excluídos sai junto, e a conferência continua limpa
+    product_manager = ProductManager(db_manager)
+    inicio = time.perf_counter()
+    product_manager.delete_many(range(1, 1_001))
+    duracao = time.perf_counter() - inicio
+    divergencias = product_manager.verify_stock()
+    situacao = "OK" if not divergencias else "FALHOU"
+    print(f"  exclusão de 1000 produtos em lote: {duracao:.2f} s, "
+          f"{len(divergencias)} divergências depois: {situacao}")
+    db_manager.close()
+
+
+def _caixa(caminho, cliente_id, produtos, vendas, semente):
+    # Um caixa (processo) vendendo carrinhos aleatórios dos mesmos poucos produtos.
+    # Retorna {produto_id: quantidade vendida}, vendas recusadas por falta de estoque e erros.
+    aleatorio = random.Random(semente)
+    db_manager = DatabaseManager(caminho)
+    sale_manager = SaleManager(db_manager)
+    vendido, recusadas, erros = {}, 0, []
+    for _ in range(vendas):
+        carrinho = [(aleatorio.randint(1, produtos), aleatorio.randint(1, 3)) for _ in range(aleatorio.randint(1, 3))]
+        try:
+            sale_manager.finalize_sale(cliente_id, 1, carrinho)
+        except InsufficientStockError:
+            recusadas += 1
+            continue
+        except Exception as e:
+            erros.append(repr(e))
+            continue
+        for produto_id, quantidade in carrinho:
+            vendido[produto_id] = vendido.get(produto_id, 0) + quantidade
+    db_manager.close()
+    return vendido, recusadas, erros
+
+
+def cenario_estoque_concorrente(pasta, processos=4, vendas_por_processo=300, produtos=5, estoque=800):
+    """
+    Vários caixas (processos) vendendo os mesmos produtos, com procura maior que o
+    estoque: confere que nenhuma baixa se perdeu e que nada foi vendido sem saldo.
+    """
+    print(f"\nEstoque sob concorrência ({processos} processos x {vendas_por_processo} vendas, "
+          f"{produtos} produtos com {estoque} unidades):")
+    caminho = os.path.join(pasta, "caixas.bd")
+    db_manager = DatabaseManager(caminho)
+    db_manager.migrate()
+    popular_produtos(db_manager, produtos, estoque)
+    with db_manager.transaction() as cursor:
+        cursor.execute("INSERT INTO clientes (nome_cliente, cpf_cliente, email_cliente, telefone_cliente, "
+                       "data_nascimento, rua, cep, bairro, cidade) VALUES ('Cliente', '1', 'c@x', '', '', '', '', '', '')")
+        cliente_id = cursor.lastrowid
+    db_manager.close()
+
+    inicio = time.perf_counter()
+    with multiprocessing.Pool(processos) as pool:
+        resultados = pool.starmap(_caixa, [(caminho, cliente_id, produtos, vendas_por_processo, semente)
+                                           for semente in range(processos)])
+    duracao = time.perf_counter() - inicio
+
+    vendido, recusadas, erros = {}, 0, []
+    for vendido_caixa, recusadas_caixa, erros_caixa in resultados:
+        for produto_id, quantidade in vendido_caixa.items():
+            vendido[produto_id] = vendido.get(produto_id, 0) + quantidade
+        recusadas += recusadas_caixa
+        erros += erros_caixa
+
+    db_manager = DatabaseManager(caminho)
+    with db_manager as cursor:
+        atual = dict(cursor.execute("SELECT produto_id, quantidade FROM estoque").fetchall())
+        nos_itens = dict(cursor.execute("SELECT produto_id, SUM(quantidade) FROM itens_venda GROUP BY produto_id").fetchall())
+    divergencias = ProductManager(db_manager).verify_stock()
+    db_manager.close()
+    # Sem baixa perdida: estoque final = inicial - vendido; sem venda a descoberto: nada negativo
+    perdidas = [produto_id for produto_id in range(1, produtos + 1)
+                if atual.get(produto_id, 0) != estoque - vendido.get(produto_id, 0)
+                or nos_itens.get(produto_id, 0) != vendido.get(produto_id, 0)]
+    negativos = [produto_id for produto_id, quantidade in atual.items() if quantidade < 0]
+    situacao = "OK" if not (perdidas or negativos or divergencias or erros) else "FALHOU"
+    concluidas = processos * vendas_por_processo - recusadas - len(erros)
+    print(f"  {concluidas} vendas em {duracao:.1f} s ({concluidas / duracao:.0f}/s), {recusadas} recusadas por "
+          f"falta de estoque, {len(erros)} erros")
+    print(f"  vendido={sum(vendido.values())} unidades, restante={sum(atual.values())}, "
+          f"baixas perdidas={len(perdidas)}, negativos={len(negativos)}, divergências={len(divergencias)}: {situacao}")
+    for erro in erros[:5]:
+        print(f"    {erro}")
+
+
+def cenario_historico(pasta, vendas=1_000_000, dias=3_650, usuarios=10, clientes=5):
+    """Histórico de vendas de um ano: totais diários (vendas_diarias) contra GROUP BY sobre as vendas."""
+    print(f"\nHistórico de vendas ({vendas} vendas em {dias} dias, {usuarios} vendedores, {clientes} clientes):")
+    db_manager = DatabaseManager(os.path.join(pasta, "historico.bd"))
+    db_manager.migrate()
+    inicio = time.perf_counter()
+    with db_manager.transaction() as cursor:
+        cursor.execute("""INSERT INTO vendas (cliente_id, usuario_id, data_venda, total, desconto)
+                          WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+                          SELECT 1 + abs(random()) % ?, 1 + abs(random()) % ?,
+                                 datetime('now', '-' || (abs(random()) % ?) || ' days'), 100 + abs(random()) % 50000, 0
+                          FROM n""", (vendas, clientes, usuarios, dias))
+    sale_manager = SaleManager(db_manager)
+    linhas = sale_manager.rebuild_sales_history()
+    print(f"  vendas geradas e totais recalculados ({linhas} linhas) em {time.perf_counter() - inicio:.1f} s")
+
+    fim = datetime.date.today()
+    comeco = (fim - datetime.timedelta(days=365)).isoformat()
+    fim = fim.isoformat()
+    medir("um ano por dia (vendas_diarias)", lambda: sale_manager.get_sales_history(comeco, fim), 10)
+    medir("um ano por vendedor (vendas_diarias)", lambda: sale_manager.get_sales_history(comeco, fim, 'usuario'), 10)
+
+    def agrupar_vendas():
+        with db_manager as cursor:
+            return cursor.execute("""SELECT date(data_venda), COUNT(*), SUM(desconto), SUM(total) FROM vendas
+                                     WHERE data_venda BETWEEN ? AND ? GROUP BY date(data_venda)""",
+                                  (comeco, fim + " 23:59:59")).fetchall()
+
+    medir("um ano por dia (GROUP BY em vendas)", agrupar_vendas, 10)
+    db_manager.close()
+
+
+def cenario_financeiro(pasta, lancamentos=2_000_000, dias=1_825):
+    """Saldo numa data: fechamento mensal + totais diários contra SUM sobre todos os lançamentos."""
+    print(f"\nSaldo do financeiro ({lancamentos} lançamentos em {dias} dias):")
+    db_manager = DatabaseManager(os.path.join(pasta, "financeiro.bd"))
+    db_manager.migrate()
+    inicio = time.perf_counter()
+    with db_manager.transaction() as cursor:
+        cursor.execute("""INSERT INTO financeiro (tipo, valor, descricao, data)
+                          WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+                          SELECT CASE WHEN abs(random()) % 3 = 0 THEN 'saida' ELSE 'entrada' END,
+                                 100 + abs(random()) % 100000, 'Lançamento ' || i,
+                                 datetime('now', 'localtime', '-' || (abs(random()) % ?) || ' days')
+                          FROM n""", (lancamentos, dias))
+    financial_manager = FinancialManager(db_manager)
+    dias_com_lancamento = financial_manager.rebuild_daily_totals()
+    fechados = financial_manager.close_periods()
+    print(f"  lançamentos gerados, {dias_com_lancamento} dias e {len(fechados)} meses fechados em "
+          f"{time.perf_counter() - inicio:.1f} s")
+
+    hoje = datetime.date.today()
+    datas = [(hoje - datetime.timedelta(days=random.randint(0, dias))).isoformat() for _ in range(50)]
+    consulta = iter(datas * 2)
+    medir("saldo numa data (fechamento + dias seguintes)", lambda: [financial_manager.get_balance(next(consulta))], 50)
+
+    def somar_lancamentos():
+        with db_manager as cursor:
+            return [cursor.execute("""SELECT SUM(CASE WHEN tipo = 'entrada' THEN valor ELSE -valor END)
+                                      FROM financeiro WHERE data < date(?, '+1 day')""", (next(consulta),)).fetchone()]
+
+    medir("saldo numa data (SUM em financeiro)", somar_lancamentos, 50)
+    db_manager.close()
+
+
+def main(quantidade):
+    pasta = tempfile.mkdtemp(prefix="softx_benchmark_")
+    db_manager = DatabaseManager(os.path.join(pasta, "benchmark.bd"))
+    db_manager.migrate()
+    popular_clientes(db_manager, quantidade)
+    cenario_busca(db_manager)
+    cenario_memoria(db_manager)
+    cenario_streaming(db_manager)
+    cenario_analitico(db_manager)
+    cenario_catalogo(db_manager)
+    cenario_atualizacao(db_manager)
+    db_manager.close()
+    cenario_escrita_concorrente(pasta)
+    cenario_banco_em_memoria(pasta)
+    cenario_venda(pasta)
+    cenario_estoque_concorrente(pasta)
+    cenario_historico(pasta)
+    cenario_financeiro(pasta)
+    shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    # === CONFIGURE AQUI A QUANTIDADE (ou passe na linha de comando) ===
+    quantidade_linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    main(quantidade_linhas)
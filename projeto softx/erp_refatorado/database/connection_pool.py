@@ -0,0 +1,124 @@
+# Em erp_refatorado/database/connection_pool.py
+
+import sqlite3
+import threading
+from collections import deque
+from erp_refatorado.database.instrumentation import InstrumentedConnection
+from erp_refatorado.database.sql_catalog import statement_cache_size
+
+
+class ConnectionPool:
+    """
+    Mantém conexões SQLite abertas para serem reutilizadas entre chamadas.
+    Cada conexão é emprestada (acquire) para uma única thread por vez e
+    devolvida (release) ao final do uso.
+    """
+
+    def __init__(self, db_name, max_size=5, on_connect=None, query_stats=None):
+        self.db_name = db_name
+        self.max_size = max_size
+        # Função chamada com cada conexão nova (ex.: para aplicar PRAGMAs)
+        self.on_connect = on_connect
+        # QueryStats que mede os comandos de todas as conexões do pool (None = sem medição)
+        self.query_stats = query_stats
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._stats = {
+            'acquisitions': 0,  # Total de empréstimos
+            'reused': 0,        # Empréstimos atendidos por uma conexão já aberta
+            'created': 0,       # Conexões novas abertas
+            'overflow': 0,      # Conexões criadas além do tamanho máximo
+            'closed': 0,        # Conexões fechadas
+        }
+
+    def _connect(self):
+        # check_same_thread=False porque a conexão pode passar de uma thread para
+        # outra ao voltar para o pool; o pool garante que só uma a usa por vez.
+        # cached_statements comporta todo o catálogo de SQL (ver sql_catalog.py).
+        # Nomes "file:..." são URIs (ex.: o banco em memória de memory_db.py).
+        options = {'check_same_thread': False, 'cached_statements': statement_cache_size(),
+                   'uri': self.db_name.startswith('file:')}
+        if self.query_stats is not None:
+            conn = sqlite3.connect(self.db_name, factory=InstrumentedConnection, **options)
+            conn.query_stats = self.query_stats
+        else:
+            conn = sqlite3.connect(self.db_name, **options)
+        if self.on_connect is not None:
+            try:
+                self.on_connect(conn)
+            except Exception:
+                conn.close()
+                raise
+        return conn
+
+    def acquire(self):
+        """Empresta uma conexão do pool, abrindo uma nova se não houver nenhuma livre."""
+        with self._lock:
+            self._stats['acquisitions'] += 1
+            self._in_use += 1
+            if self._idle:
+                self._stats['reused'] += 1
+                return self._idle.pop()
+            self._stats['created'] += 1
+            if self._in_use > self.max_size:
+                self._stats['overflow'] += 1
+        try:
+            return self._connect()
+        except Exception:
+            with self._lock:
+                self._in_use -= 1
+            raise
+
+    def release(self, conn):
+        """Devolve a conexão ao pool. Conexões excedentes são fechadas."""
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            self._in_use -= 1
+            if len(self._idle) < self.max_size:
+                self._idle.append(conn)
+                return
+            self._stats['closed'] += 1
+        conn.close()
+
+    def close_all(self):
+        """Fecha todas as conexões livres do pool."""
+        with self._lock:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._stats['closed'] += len(idle)
+        for conn in idle:
+            conn.close()
+
+    def stats(self):
+        """Retorna um retrato das estatísticas de uso do pool."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_use'] = self._in_use
+            stats['idle'] = len(self._idle)
+            stats['max_size'] = self.max_size
+        acquisitions = stats['acquisitions']
+        stats['reuse_rate'] = stats['reused'] / acquisitions if acquisitions else 0.0
+        return stats
+
+
+# Pools compartilhados por (banco, perfil, tamanho, medição): instâncias que pedem o
+# mesmo banco com outra configuração recebem um pool próprio, em vez de herdar os
+# PRAGMAs, o tamanho ou a medição de quem criou o pool primeiro
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_name, max_size=5, on_connect=None, query_stats=None, profile=None):
+    """
+    Retorna o pool compartilhado do banco informado com o perfil, o tamanho e a medição
+    pedidos, criando-o na primeira chamada.
+    """
+    key = (db_name, profile, max_size, query_stats is not None)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(db_name, max_size, on_connect, query_stats)
+            _pools[key] = pool
+        return pool
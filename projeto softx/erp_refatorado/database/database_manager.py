@@ -1,124 +1,470 @@
 import sqlite3
-from config import DB_PATH
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from itertools import islice
+from config import (DB_PATH, DB_POOL_SIZE, DB_PROFILE, DB_PROFILES, BULK_CHUNK_SIZE, STREAM_BATCH_SIZE,
+                    DB_MEMORY, DB_MEMORY_TEMPLATE, DB_MEMORY_SAVE_PATH, DB_MEMORY_SAVE_INTERVAL,
+                    QUERY_STATS_ENABLED,
+                    SLOW_QUERY_THRESHOLD_MS, SLOW_QUERY_LOG, EXPLAIN_FULL_SCANS, QUERY_STATS_DUMP_PATH,
+                    WRITE_QUEUE_ENABLED, WRITE_BATCH_SIZE, WRITE_BATCH_DELAY_MS)
+from erp_refatorado.database.connection_pool import get_pool
+from erp_refatorado.database.memory_db import get_memory_database, close_memory_database
+from erp_refatorado.database.instrumentation import QueryStats
+from erp_refatorado.database.sql_catalog import CATALOG, update_statement
+from erp_refatorado.database.write_queue import get_write_queue, close_write_queue
+from erp_refatorado.database.migrations import LATEST_VERSION, apply_migrations, get_schema_version
+
+# Valores numéricos que o SQLite devolve ao consultar esses PRAGMAs
+_SYNCHRONOUS_VALUES = {'OFF': 0, 'NORMAL': 1, 'FULL': 2, 'EXTRA': 3}
+_TEMP_STORE_VALUES = {'DEFAULT': 0, 'FILE': 1, 'MEMORY': 2}
+
+
+def apply_profile(conn, profile):
+    """Aplica os PRAGMAs de um perfil de desempenho (ver config.DB_PROFILES) na conexão."""
+    settings = DB_PROFILES[profile]
+    # busy_timeout vem primeiro para que a troca de journal_mode espere um eventual lock
+    conn.execute(f"PRAGMA busy_timeout = {int(settings['busy_timeout'])}")
+    conn.execute(f"PRAGMA journal_mode = {settings['journal_mode']}")
+    conn.execute(f"PRAGMA synchronous = {settings['synchronous']}")
+    conn.execute(f"PRAGMA cache_size = {int(settings['cache_size'])}")
+    conn.execute(f"PRAGMA mmap_size = {int(settings['mmap_size'])}")
+    conn.execute(f"PRAGMA temp_store = {settings['temp_store']}")
+
+
+@dataclass
+class BulkConflict:
+    index: int    # Posição do item na sequência recebida
+    item: object  # O item original (ex.: o Client que não pôde ser gravado)
+    error: str    # Mensagem do SQLite (ex.: UNIQUE constraint failed: clientes.cpf_cliente)
+
+
+@dataclass
+class BulkResult:
+    affected: int = 0  # Linhas inseridas/alteradas/removidas com sucesso
+    conflicts: list = field(default_factory=list)  # Lista de BulkConflict
+
 
 class DatabaseManager:
-    def __init__(self, db_name=DB_PATH):
+    def __init__(self, db_name=DB_PATH, pool_size=DB_POOL_SIZE, profile=DB_PROFILE, write_queue=WRITE_QUEUE_ENABLED,
+                 memory=DB_MEMORY, query_stats=QUERY_STATS_ENABLED):
+        # Modo em memória (ver memory_db.py): db_name passa a ser o modelo carregado na
+        # memória. ":memory:" cria um banco vazio e exclusivo desta instância.
+        self.memory = None
+        if db_name == ':memory:':
+            memory, db_name = True, None
+        elif memory and db_name == DB_PATH:
+            db_name = DB_MEMORY_TEMPLATE or None
+        if memory:
+            self.memory = get_memory_database(db_name, DB_MEMORY_SAVE_PATH or None, DB_MEMORY_SAVE_INTERVAL)
+            db_name = self.memory.uri
+            profile = 'memory'
+        if profile not in DB_PROFILES:
+            raise ValueError(f"Perfil de banco de dados desconhecido: '{profile}'. "
+                             f"Use um de: {', '.join(DB_PROFILES)}")
         self.db_name = db_name
+        self.profile = profile
+        query_stats = QueryStats(SLOW_QUERY_THRESHOLD_MS, SLOW_QUERY_LOG, EXPLAIN_FULL_SCANS) if query_stats else None
+        # O pool (e suas estatísticas de consultas) é compartilhado por todas as
+        # instâncias que apontam para o mesmo banco com o mesmo perfil, tamanho e medição
+        self.pool = get_pool(db_name, pool_size, on_connect=lambda conn: apply_profile(conn, profile),
+                             query_stats=query_stats, profile=profile)
+        self._local = threading.local()
+        # Com a fila de escrita ligada, as alterações dos managers vão para uma única
+        # thread gravadora que confirma várias delas por commit (ver write_queue.py)
+        self.write_queue = get_write_queue(self, WRITE_BATCH_SIZE, WRITE_BATCH_DELAY_MS) if write_queue else None
+
+    def _connection_stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    # Tipos de escopo empilhados por thread:
+    #   'root'      - escopo mais externo: faz commit/rollback e devolve a conexão ao pool
+    #   'begin'     - transação aberta dentro de um "with" externo que ainda não escrevia
+    #   'savepoint' - escopo aninhado dentro de uma transação: RELEASE ou ROLLBACK TO
+    #   'join'      - "with" aninhado fora de transação: apenas reutiliza a conexão
+    def _begin_scope(self, transactional):
+        stack = self._connection_stack()
+        if not stack:
+            conn = self.pool.acquire()
+            kind = 'root'
+            try:
+                if transactional:
+                    # IMMEDIATE reserva o lock de escrita já no início da unidade de trabalho
+                    conn.execute("BEGIN IMMEDIATE")
+            except Exception:
+                self.pool.release(conn)
+                raise
+        else:
+            conn = stack[-1][0]
+            if conn.in_transaction:
+                kind = 'savepoint'
+                conn.execute(f"SAVEPOINT sp_{len(stack)}")
+            elif transactional:
+                kind = 'begin'
+                conn.execute("BEGIN IMMEDIATE")
+            else:
+                kind = 'join'
+        stack.append((conn, kind))
+        return conn.cursor()
+
+    def _end_scope(self, exc_type):
+        stack = self._connection_stack()
+        conn, kind = stack.pop()
+        if kind == 'savepoint':
+            name = f"sp_{len(stack)}"
+            if exc_type is not None:
+                conn.execute(f"ROLLBACK TO {name}")
+            conn.execute(f"RELEASE {name}")
+        elif kind in ('root', 'begin'):
+            callbacks = getattr(self._local, 'after_commit', None)
+            self._local.after_commit = None
+            try:
+                if exc_type is None:
+                    conn.commit()
+                else:
+                    callbacks = None
+                    conn.rollback()
+            finally:
+                if kind == 'root':
+                    self.pool.release(conn)
+            for callback in callbacks or ():
+                callback()
 
     def __enter__(self):
-        self.conn = sqlite3.connect(self.db_name)
-        self.cursor = self.conn.cursor()
-        return self.cursor
+        # Blocos "with" aninhados na mesma thread reutilizam a mesma conexão; dentro de
+        # uma transação cada bloco vira um SAVEPOINT. Só o escopo mais externo faz o
+        # commit e devolve a conexão ao pool.
+        return self._begin_scope(transactional=False)
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.conn.commit()
-        self.conn.close()
+        self._end_scope(exc_type)
 
-    def create_tables(self):
+    @contextmanager
+    def transaction(self):
+        """
+        Unidade de trabalho: todas as operações dos managers feitas dentro do bloco
+        usam a mesma conexão e são confirmadas num único commit (ou desfeitas juntas).
+        Chamadas aninhadas viram SAVEPOINTs, que podem falhar sem desfazer o restante.
+
+            with db_manager.transaction():
+                client_manager.add_client(cliente)
+                product_manager.update_stock(produto_id, -1)
+        """
+        cursor = self._begin_scope(transactional=True)
+        try:
+            yield cursor
+        except BaseException as exc:
+            self._end_scope(type(exc))
+            raise
+        self._end_scope(None)
+
+    def after_commit(self, callback):
+        """
+        Agenda callback() para depois do commit da transação em andamento nesta thread
+        (descartado se ela for desfeita). Fora de transação, chama na hora.
+        """
+        if not self.in_transaction():
+            callback()
+            return
+        callbacks = getattr(self._local, 'after_commit', None)
+        if callbacks is None:
+            callbacks = self._local.after_commit = []
+        callbacks.append(callback)
+
+    def in_transaction(self):
+        """Indica se a thread atual está dentro de uma transação deste DatabaseManager."""
+        stack = self._connection_stack()
+        return bool(stack) and stack[-1][0].in_transaction
+
+    def _runs_inline(self):
+        # Sem fila, dentro de uma transação do chamador (a escrita precisa fazer parte
+        # dela) ou já na própria thread gravadora, a escrita roda direto nesta thread
+        return self.write_queue is None or self.write_queue.is_writer_thread() or self.in_transaction()
+
+    def write(self, fn, *args, **kwargs) -> Future:
+        """
+        Executa uma escrita, fn(*args, **kwargs), e devolve um Future com o resultado.
+        Com a fila de escrita ligada ela é gravada em lote pela thread gravadora;
+        caso contrário roda na hora e o Future já volta concluído.
+
+            futuro = db_manager.write(client_manager.add_client, cliente)
+            ...
+            futuro.result()  # espera o commit (e relança o erro, se houver)
+        """
+        if not self._runs_inline():
+            return self.write_queue.submit(fn, *args, **kwargs)
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def run_write(self, fn, *args, **kwargs):
+        """Como write, mas espera a gravação e devolve o resultado de fn."""
+        if self._runs_inline():
+            return fn(*args, **kwargs)
+        return self.write_queue.submit(fn, *args, **kwargs).result()
+
+    def _execute(self, sql, params):
         with self as cursor:
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS usuarios(
-                    id_usuario INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome_usuario TEXT NOT NULL,
-                    cpf_usuario TEXT NOT NULL UNIQUE,
-                    email_usuario TEXT NOT NULL UNIQUE,
-                    telefone_usuario TEXT NOT NULL,
-                    data_nascimento TEXT NOT NULL,
-                    rua TEXT NOT NULL,
-                    cep TEXT NOT NULL,
-                    bairro TEXT NOT NULL,
-                    cidade TEXT NOT NULL,
-                    senha TEXT NOT NULL,
-                    tipo TEXT NOT NULL CHECK(tipo IN (\'admin\', \'vendedor\', \'financeiro\', \'estoque\')),
-                    permissao TEXT NOT NULL DEFAULT \'padrao\'
-                )
-            """)
-
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS clientes (
-                    id_cliente INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome_cliente TEXT NOT NULL,
-                    cpf_cliente TEXT NOT NULL UNIQUE,
-                    email_cliente TEXT NOT NULL UNIQUE,
-                    telefone_cliente TEXT NOT NULL,
-                    data_nascimento TEXT NOT NULL,
-                    rua TEXT NOT NULL,
-                    cep TEXT NOT NULL,
-                    bairro TEXT NOT NULL,
-                    cidade TEXT NOT NULL
-                )
-            """)
-
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS fornecedores (
-                    id_fornecedor INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome TEXT NOT NULL,
-                    cnpj TEXT NOT NULL UNIQUE,
-                    telefone TEXT,
-                    email TEXT UNIQUE,
-                    rua TEXT NOT NULL,
-                    cep TEXT NOT NULL,
-                    bairro TEXT NOT NULL,
-                    cidade TEXT NOT NULL
-                )
-            """)
-
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS produtos (
-                    id_produto INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome TEXT NOT NULL,
-                    descricao TEXT,
-                    preco_venda REAL NOT NULL,
-                    preco_compra REAL NOT NULL,
-                    fornecedor_id INTEGER,
-                    FOREIGN KEY(fornecedor_id) REFERENCES fornecedores(id_fornecedor)
-                )
-            """)
-
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS estoque (
-                    id_estoque INTEGER PRIMARY KEY AUTOINCREMENT,
-                    produto_id INTEGER NOT NULL,
-                    quantidade INTEGER NOT NULL DEFAULT 0,
-                    FOREIGN KEY(produto_id) REFERENCES produtos(id_produto)
-                )
-            """)
-
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS vendas (
-                    id_vendas INTEGER PRIMARY KEY AUTOINCREMENT,
-                    cliente_id INTEGER NOT NULL,
-                    usuario_id INTEGER NOT NULL,
-                    data_venda TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                    total REAL NOT NULL,
-                    FOREIGN KEY(cliente_id) REFERENCES clientes(id_cliente),
-                    FOREIGN KEY(usuario_id) REFERENCES usuarios(id_usuario)
-                )
-            """)
-
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS compras (
-                    id_compras INTEGER PRIMARY KEY AUTOINCREMENT,
-                    fornecedor_id INTEGER NOT NULL,
-                    usuario_id INTEGER NOT NULL,
-                    data_compra TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                    total REAL NOT NULL,
-                    FOREIGN KEY(fornecedor_id) REFERENCES fornecedores(id_fornecedor),
-                    FOREIGN KEY(usuario_id) REFERENCES usuarios(id_usuario)
-                )
-            """)
-
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS financeiro (
-                    id_financeiro INTEGER PRIMARY KEY AUTOINCREMENT,
-                    tipo TEXT NOT NULL CHECK(tipo IN (
-                        \'entrada\', \'saida\'
-                    )),
-                    valor REAL NOT NULL,
-                    descricao TEXT,
-                    data TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
+            cursor.execute(sql, params)
+            return cursor.rowcount
+
+    def execute_write(self, sql, params=()):
+        """Executa um único comando de alteração (pela fila, se ligada) e retorna o rowcount."""
+        return self.run_write(self._execute, sql, params)
+
+    def update_columns(self, table, id_column, row_id, values):
+        """
+        UPDATE de uma linha gravando só as colunas de values ({coluna: valor}), pela fila
+        de escrita se ela estiver ligada. Com values vazio não executa nada.
+        Retorna o rowcount.
+        """
+        if not values:
+            return 0
+        return self.execute_write(update_statement(table, id_column, tuple(values)), (*values.values(), row_id))
+
+    def write_queue_stats(self):
+        """Estatísticas da fila de escrita (None se ela estiver desligada)."""
+        return self.write_queue.stats() if self.write_queue is not None else None
+
+    def bulk_execute(self, sql, items, to_params=None, chunk_size=BULK_CHUNK_SIZE):
+        """
+        Executa o mesmo comando para cada item de um iterável (pode ser um gerador),
+        enviando blocos de chunk_size linhas por executemany, tudo numa única transação.
+
+        Um bloco que viola uma restrição (UNIQUE, NOT NULL...) é desfeito e refeito
+        linha a linha; as linhas rejeitadas são registradas em BulkResult.conflicts
+        sem interromper o restante do lote.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size deve ser maior que zero")
+        if not self._runs_inline():
+            # O lote inteiro vira uma operação da thread gravadora
+            return self.run_write(self.bulk_execute, sql, items, to_params, chunk_size)
+        result = BulkResult()
+        iterator = iter(items)
+        index = 0
+        with self.transaction() as cursor:
+            while True:
+                chunk = list(islice(iterator, chunk_size))
+                if not chunk:
+                    break
+                params = [to_params(item) for item in chunk] if to_params else chunk
+                cursor.execute("SAVEPOINT bulk_chunk")
+                try:
+                    cursor.executemany(sql, params)
+                    result.affected += cursor.rowcount
+                    cursor.execute("RELEASE bulk_chunk")
+                except sqlite3.IntegrityError:
+                    cursor.execute("ROLLBACK TO bulk_chunk")
+                    cursor.execute("RELEASE bulk_chunk")
+                    for offset, (item, row) in enumerate(zip(chunk, params)):
+                        try:
+                            cursor.execute(sql, row)
+                            result.affected += cursor.rowcount
+                        except sqlite3.IntegrityError as e:
+                            result.conflicts.append(BulkConflict(index + offset, item, str(e)))
+                index += len(chunk)
+        return result
+
+    def stream(self, sql, params=(), mapper=None, batch_size=STREAM_BATCH_SIZE):
+        """
+        Gerador que percorre o resultado de um SELECT lendo batch_size linhas por vez
+        (fetchmany), sem montar a lista inteira: a memória usada não cresce com a tabela.
+        mapper, se informado, recebe o cursor após o execute e devolve a função que
+        converte cada linha (ex.: lambda cursor: row_mapper(cursor, Client)).
+
+        Usa uma conexão própria do pool, fora dos escopos "with" da thread, para que a
+        leitura possa ficar aberta enquanto o chamador faz outras operações; por isso
+        não enxerga alterações ainda não confirmadas de uma transação em andamento.
+        A conexão só é emprestada na primeira iteração e volta ao pool ao fim da
+        leitura ou quando o gerador é fechado antes disso (break, close(), exceção
+        ou coleta pelo GC). Para garantir a devolução imediata ao parar no meio:
+
+            with contextlib.closing(client_manager.iter_clients()) as clientes:
+                for cliente in clientes:
+                    ...
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size deve ser maior que zero")
+        conn = self.pool.acquire()
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            convert = mapper(cursor) if mapper is not None else None
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                if convert is None:
+                    yield from rows
+                else:
+                    yield from map(convert, rows)
+        finally:
+            # Fechar o cursor finaliza o SELECT (e libera o snapshot de leitura) antes
+            # de a conexão voltar ao pool
+            if cursor is not None:
+                cursor.close()
+            self.pool.release(conn)
+
+    def pool_stats(self):
+        """Retorna as estatísticas de uso do pool de conexões."""
+        return self.pool.stats()
+
+    @property
+    def query_stats_enabled(self):
+        """Se as consultas deste banco estão sendo medidas (ver config.QUERY_STATS_ENABLED)."""
+        return self.pool.query_stats is not None
+
+    def query_stats(self):
+        """
+        Estatísticas por comando SQL normalizado: execuções, tempo total/médio/máximo,
+        histograma, linhas, quantas vezes foi lento e (no modo EXPLAIN) o plano.
+        Retorna {} se a instrumentação estiver desligada.
+        """
+        if self.pool.query_stats is None:
+            return {}
+        return self.pool.query_stats.snapshot()
+
+    def dump_query_stats(self, path=QUERY_STATS_DUMP_PATH):
+        """Grava as estatísticas de consultas em JSON e retorna o caminho do arquivo."""
+        if self.pool.query_stats is None:
+            return None
+        return self.pool.query_stats.dump(path)
+
+    def reset_query_stats(self):
+        """Zera as estatísticas de consultas (ex.: antes de medir um cenário)."""
+        if self.pool.query_stats is not None:
+            self.pool.query_stats.reset()
+
+    def print_query_stats(self, limit=10):
+        """Mostra os comandos que mais consumiram tempo."""
+        stats = self.query_stats()
+        print(f"Consultas que mais consumiram tempo (de {len(stats)} comandos distintos):")
+        for sql, entry in list(stats.items())[:limit]:
+            scan = f"  VARREDURA: {', '.join(entry['full_scan'])}" if entry['full_scan'] else ""
+            print(f"  {entry['total_ms']:10.1f} ms  {entry['count']:6}x  média={entry['avg_ms']:8.2f} ms"
+                  f"  lentas={entry['slow']}{scan}  {sql[:90]}")
+
+    def catalog_stats(self):
+        """
+        Contadores por comando do catálogo de SQL (nome -> execuções, tempo total/médio,
+        linhas), do que mais consumiu tempo para o que menos. Vêm das estatísticas de
+        consultas: com a instrumentação desligada, ficam zerados.
+        """
+        return CATALOG.stats(self.query_stats())
+
+    def print_catalog_stats(self, limit=10):
+        """Mostra os comandos do catálogo que mais consumiram tempo, pelo nome."""
+        stats = self.catalog_stats()
+        print(f"Comandos do catálogo que mais consumiram tempo (de {len(stats)} registrados):")
+        for name, entry in list(stats.items())[:limit]:
+            print(f"  {entry['total_ms']:10.1f} ms  {entry['count']:6}x  média={entry['avg_ms']:8.2f} ms  {name}")
+
+    def check_pragmas(self, verbose=True):
+        """
+        Confere os PRAGMAs realmente em vigor contra o perfil configurado.
+        Retorna um dicionário {pragma: (esperado, atual, ok)}.
+        """
+        expected = DB_PROFILES[self.profile]
+        report = {}
+        with self as cursor:
+            for pragma, value in expected.items():
+                row = cursor.execute(f"PRAGMA {pragma}").fetchone()
+                # O banco em memória não tem mmap: o PRAGMA mmap_size não devolve nada
+                actual = row[0] if row is not None else 0
+                if pragma == 'journal_mode':
+                    ok = str(actual).lower() == value.lower()
+                elif pragma == 'synchronous':
+                    ok = actual == _SYNCHRONOUS_VALUES[value]
+                elif pragma == 'temp_store':
+                    ok = actual == _TEMP_STORE_VALUES[value]
+                elif pragma == 'mmap_size':
+                    # O SQLite pode limitar o mmap ao máximo com que foi compilado
+                    ok = actual <= value and (actual > 0) == (value > 0)
+                else:
+                    ok = actual == value
+                report[pragma] = (value, actual, ok)
+
+        if verbose:
+            print(f"Perfil de banco de dados: '{self.profile}'")
+            for pragma, (value, actual, ok) in report.items():
+                status = "OK" if ok else "DIFERENTE"
+                print(f"  {pragma:<13} esperado={value!s:<12} atual={actual!s:<12} {status}")
+        return report
+
+    def save_snapshot(self, path=None):
+        """
+        Grava uma cópia consistente do banco no arquivo, pela API de backup do SQLite,
+        sem interromper quem está usando o banco. No modo em memória o padrão é o
+        DB_MEMORY_SAVE_PATH. Retorna o caminho gravado.
+        """
+        if self.write_queue is not None:
+            self.write_queue.flush()
+        if self.memory is not None:
+            return self.memory.save(path)
+        if not path:
+            raise ValueError("Informe o arquivo em que a cópia do banco deve ser gravada")
+        target = sqlite3.connect(path)
+        try:
+            with self as cursor:
+                cursor.connection.backup(target)
+        finally:
+            target.close()
+        return path
+
+    def load_snapshot(self, path):
+        """
+        Substitui o conteúdo do banco em memória pelo de um arquivo (ex.: voltar ao modelo
+        entre testes) e descarta os caches de leitura. Só existe no modo em memória: num
+        banco em disco, troque o arquivo com o sistema fechado.
+        """
+        if self.memory is None:
+            raise RuntimeError("load_snapshot só está disponível no modo em memória")
+        if self.write_queue is not None:
+            self.write_queue.flush()
+        self.memory.load(path)
+        # Import local: o módulo de cache pertence à camada de negócio
+        from erp_refatorado.business_logic.cache import clear_caches
+        clear_caches(self)
+
+    def close(self):
+        """
+        Grava o que estiver na fila de escrita e fecha as conexões livres do pool (ex.: ao
+        encerrar a aplicação). No modo em memória também grava em DB_MEMORY_SAVE_PATH,
+        se configurado, e libera o banco.
+        """
+        if self.write_queue is not None:
+            close_write_queue(self.db_name)
+            self.write_queue = None
+        self.pool.close_all()
+        if self.memory is not None:
+            close_memory_database(self.memory)
+
+    def schema_version(self):
+        """Retorna a versão atual do esquema do banco."""
+        with self as cursor:
+            return get_schema_version(cursor.connection)
+
+    def needs_migration(self):
+        """Indica se há migrações de esquema pendentes."""
+        return self.schema_version() < LATEST_VERSION
+
+    def migrate(self):
+        """Aplica as migrações pendentes e retorna as versões aplicadas."""
+        with self as cursor:
+            return apply_migrations(cursor.connection)
+
+    def create_tables(self):
+        # As tabelas agora são criadas pelas migrações versionadas (ver migrations.py)
+        self.migrate()
         print("BANCO DE DADOS CRIADO!")
 
 if __name__ == '__main__':
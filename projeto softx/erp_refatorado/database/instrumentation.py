@@ -0,0 +1,223 @@
+# Em erp_refatorado/database/instrumentation.py
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+
+# Limites (em ms) das faixas do histograma de latência de cada comando
+HISTOGRAM_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, float('inf'))
+
+# Comandos de controle que não passam pelo EXPLAIN QUERY PLAN
+_NO_PLAN_PREFIXES = ('PRAGMA', 'BEGIN', 'COMMIT', 'END', 'ROLLBACK', 'SAVEPOINT', 'RELEASE',
+                     'CREATE', 'DROP', 'ALTER', 'ANALYZE', 'VACUUM', 'EXPLAIN')
+
+# Linha de plano que indica varredura completa da tabela (sem índice)
+_FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql):
+    """
+    Gera a chave de agrupamento de um comando: espaços colapsados e literais
+    trocados por '?', para que a mesma consulta escrita de formas diferentes
+    (ou com valores embutidos) caia na mesma linha das estatísticas.
+    """
+    sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    sql = re.sub(r"\b\d+(?:\.\d+)?\b", "?", sql)
+    sql = re.sub(r"\s+", " ", sql).strip().rstrip(';').strip()
+    return sql
+
+
+class QueryStats:
+    """
+    Coleta, por comando SQL normalizado, quantidade de execuções, tempos (com
+    histograma), linhas lidas/alteradas e, opcionalmente, o plano das consultas
+    que varrem tabelas inteiras. Comandos acima do limite vão para o log de lentas.
+    """
+
+    def __init__(self, slow_threshold_ms=100.0, slow_log_path=None, explain_full_scans=False):
+        self.slow_threshold_ms = slow_threshold_ms
+        self.slow_log_path = slow_log_path
+        self.explain_full_scans = explain_full_scans
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._explained = set()
+
+    def _entry(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = {
+                'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'fetch_ms': 0.0, 'rows': 0,
+                'slow': 0, 'buckets': [0] * len(HISTOGRAM_BUCKETS_MS), 'full_scan': None, 'plan': None,
+            }
+        return entry
+
+    def record_execute(self, key, elapsed_ms, rows):
+        with self._lock:
+            entry = self._entry(key)
+            entry['count'] += 1
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            entry['rows'] += rows
+            for i, limit in enumerate(HISTOGRAM_BUCKETS_MS):
+                if elapsed_ms <= limit:
+                    entry['buckets'][i] += 1
+                    break
+
+    def record_fetch(self, key, elapsed_ms, rows):
+        with self._lock:
+            entry = self._entry(key)
+            entry['fetch_ms'] += elapsed_ms
+            entry['total_ms'] += elapsed_ms
+            entry['rows'] += rows
+
+    def record_slow(self, key, sql, params, elapsed_ms):
+        with self._lock:
+            self._entry(key)['slow'] += 1
+        if not self.slow_log_path:
+            return
+        line = (f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | {elapsed_ms:10.2f} ms | "
+                f"{normalize_sql(sql)} | params={params!r}\n")
+        try:
+            with self._lock, open(self.slow_log_path, 'a', encoding='utf-8') as f:
+                f.write(line)
+        except OSError as e:
+            print(f"Não foi possível gravar o log de consultas lentas: {e}")
+
+    def maybe_explain(self, conn, key, sql, params):
+        """Na primeira vez que vê um comando, guarda seu plano e se ele varre alguma tabela inteira."""
+        if not self.explain_full_scans or key in self._explained:
+            return
+        with self._lock:
+            if key in self._explained:
+                return
+            self._explained.add(key)
+        if sql.lstrip().upper().startswith(_NO_PLAN_PREFIXES):
+            return
+        try:
+            # Cursor simples, para que o próprio EXPLAIN não seja instrumentado
+            plan = [row[3] for row in sqlite3.Cursor(conn).execute("EXPLAIN QUERY PLAN " + sql, params)]
+        except sqlite3.Error:
+            return
+        scanned = [m.group(1) for m in (_FULL_SCAN.match(detail) for detail in plan) if m]
+        with self._lock:
+            entry = self._entry(key)
+            entry['plan'] = plan
+            entry['full_scan'] = scanned or None
+
+    def snapshot(self):
+        """Cópia das estatísticas, da maior soma de tempo para a menor."""
+        with self._lock:
+            items = [(key, dict(entry, buckets=list(entry['buckets']))) for key, entry in self._entries.items()]
+        for _, entry in items:
+            entry['avg_ms'] = entry['total_ms'] / entry['count'] if entry['count'] else 0.0
+        items.sort(key=lambda item: item[1]['total_ms'], reverse=True)
+        return dict(items)
+
+    def full_scans(self):
+        """Comandos cujo plano varre ao menos uma tabela inteira."""
+        return {key: entry for key, entry in self.snapshot().items() if entry['full_scan']}
+
+    def dump(self, path):
+        """Grava as estatísticas num arquivo JSON (para comparar versões)."""
+        data = {
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'histogram_buckets_ms': [str(limit) for limit in HISTOGRAM_BUCKETS_MS],
+            'statements': self.snapshot(),
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        return path
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+            self._explained.clear()
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor que mede cada execute/executemany e cada leitura de linhas."""
+
+    def _stats(self):
+        return self.connection.query_stats
+
+    def execute(self, sql, parameters=()):
+        stats = self._stats()
+        self._sql, self._params = sql, parameters
+        self._key = normalize_sql(sql)
+        self._elapsed_ms = 0.0
+        self._slow_logged = False
+        stats.maybe_explain(self.connection, self._key, sql, parameters)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            stats.record_execute(self._key, elapsed_ms, max(self.rowcount, 0))
+            self._add_elapsed(stats, elapsed_ms)
+
+    def executemany(self, sql, seq_of_parameters):
+        stats = self._stats()
+        self._sql, self._params = sql, '<executemany>'
+        self._key = normalize_sql(sql)
+        self._elapsed_ms = 0.0
+        self._slow_logged = False
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            stats.record_execute(self._key, elapsed_ms, max(self.rowcount, 0))
+            self._add_elapsed(stats, elapsed_ms)
+
+    def _add_elapsed(self, stats, elapsed_ms):
+        # Para SELECTs a maior parte do trabalho pode acontecer na leitura das linhas,
+        # então o limite de "lenta" é verificado sobre execute + leituras.
+        self._elapsed_ms += elapsed_ms
+        if not self._slow_logged and self._elapsed_ms >= stats.slow_threshold_ms:
+            self._slow_logged = True
+            stats.record_slow(self._key, self._sql, self._params, self._elapsed_ms)
+
+    def _timed_fetch(self, fetch, *args):
+        key = getattr(self, '_key', None)
+        if key is None:
+            return fetch(*args)
+        start = time.perf_counter()
+        result = fetch(*args)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if result is None:
+            rows = 0
+        elif isinstance(result, list):
+            rows = len(result)
+        else:
+            rows = 1
+        stats = self._stats()
+        stats.record_fetch(key, elapsed_ms, rows)
+        self._add_elapsed(stats, elapsed_ms)
+        return result
+
+    def fetchone(self):
+        return self._timed_fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._timed_fetch(super().fetchmany, size if size is not None else self.arraysize)
+
+    def fetchall(self):
+        return self._timed_fetch(super().fetchall)
+
+    def __next__(self):
+        row = self._timed_fetch(super().__next__)
+        return row
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Conexão cujos cursores (inclusive os de conn.execute) são instrumentados."""
+
+    query_stats = None
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
@@ -0,0 +1,143 @@
+# Em erp_refatorado/database/memory_db.py
+
+import itertools
+import os
+import sqlite3
+import threading
+
+# Banco de dados inteiro em memória, para testes, demonstrações e terminais de consulta
+# (quiosques): nada é lido do disco depois da carga inicial e nada é gravado nele, a
+# não ser quando pedido.
+#
+# O banco é aberto pelo VFS "memdb" do SQLite (URI "file:/nome?vfs=memdb"): todas as
+# conexões do processo que usam o mesmo nome enxergam o mesmo banco, então o pool, a
+# fila de escrita e os managers funcionam sem mudança. Ele foi preferido ao
+# ":memory:" com cache=shared porque mantém o controle de concorrência normal do
+# SQLite (busy_timeout espera o lock); no modo de cache compartilhado um segundo
+# escritor recebe "database table is locked" na hora, sem esperar.
+#
+# O banco existe enquanto houver uma conexão aberta com ele; a conexão "âncora" desta
+# classe o mantém vivo mesmo com o pool vazio e é usada para copiar o conteúdo de/para
+# arquivos com a API de backup do SQLite (cópia consistente, página a página).
+
+_counter = itertools.count(1)
+
+
+def _open_read_only(path):
+    # O modelo só é lido: mode=ro garante que o arquivo não seja alterado nem criado
+    return sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True)
+
+
+class MemoryDatabase:
+    """
+    Banco em memória compartilhado pelas conexões do processo.
+
+    template: arquivo copiado para a memória na criação (None = banco vazio; as
+    migrações criam as tabelas). save_path: arquivo em que save() grava por padrão
+    (None = só grava se receber um caminho). save_interval: se maior que zero, grava
+    em save_path a cada tantos segundos, numa thread própria.
+    """
+
+    def __init__(self, template=None, save_path=None, save_interval=0.0):
+        self.name = f"softx_{os.getpid()}_{next(_counter)}"
+        self.uri = f"file:/{self.name}?vfs=memdb"
+        self.template = template
+        self.save_path = save_path
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._anchor = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {'loads': 0, 'saves': 0, 'autosave_errors': 0}
+        if template:
+            self.load(template)
+        if save_path and save_interval > 0:
+            self._thread = threading.Thread(target=self._autosave, name="softx-autosave", daemon=True)
+            self._thread.start()
+
+    def load(self, path):
+        """
+        Substitui todo o conteúdo do banco em memória pelo do arquivo (ex.: voltar ao
+        estado do modelo entre testes). Espera as transações em andamento terminarem.
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Arquivo de banco de dados não encontrado: {path}")
+        source = _open_read_only(path)
+        try:
+            with self._lock:
+                source.backup(self._anchor)
+                self._stats['loads'] += 1
+        finally:
+            source.close()
+
+    def save(self, path=None):
+        """Grava uma cópia consistente do banco em memória no arquivo (padrão: save_path). Retorna o caminho."""
+        path = path or self.save_path
+        if not path:
+            raise ValueError("Informe o arquivo em que o banco em memória deve ser gravado")
+        target = sqlite3.connect(path)
+        try:
+            with self._lock:
+                self._anchor.backup(target)
+                self._stats['saves'] += 1
+        finally:
+            target.close()
+        return path
+
+    def _autosave(self):
+        while not self._stop.wait(self.save_interval):
+            try:
+                self.save()
+            except sqlite3.Error as e:
+                # Um save que falhou (ex.: arquivo bloqueado) é tentado de novo no próximo ciclo
+                self._stats['autosave_errors'] += 1
+                print(f"Falha ao gravar o banco em memória em {self.save_path}: {e}")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['pages'] = self._anchor.execute("PRAGMA page_count").fetchone()[0]
+        stats['page_size'] = self._anchor.execute("PRAGMA page_size").fetchone()[0]
+        return stats
+
+    def close(self, save=True):
+        """
+        Para a gravação periódica, grava em save_path (se houver e save=True) e fecha a
+        conexão âncora. O banco some quando a última conexão com ele é fechada.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if save and self.save_path:
+            self.save()
+        self._anchor.close()
+
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+
+def get_memory_database(template=None, save_path=None, save_interval=0.0):
+    """
+    Banco em memória carregado do modelo informado, compartilhado por todos os
+    DatabaseManager do processo que pedem o mesmo modelo. Sem modelo, cada chamada
+    cria um banco vazio e independente (útil para isolar testes).
+    """
+    if not template:
+        return MemoryDatabase(None, save_path, save_interval)
+    key = os.path.abspath(template)
+    with _databases_lock:
+        database = _databases.get(key)
+        if database is None:
+            database = _databases[key] = MemoryDatabase(template, save_path, save_interval)
+        return database
+
+
+def close_memory_database(database, save=True):
+    """Fecha o banco em memória e o retira do registro (a próxima chamada recarrega o modelo)."""
+    with _databases_lock:
+        for key, value in list(_databases.items()):
+            if value is database:
+                del _databases[key]
+    database.close(save)
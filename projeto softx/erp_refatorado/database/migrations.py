@@ -0,0 +1,411 @@
+# Em erp_refatorado/database/migrations.py
+
+# Migrações versionadas do esquema. A versão aplicada fica gravada em
+# PRAGMA user_version; cada migração roda numa transação própria, então um erro
+# no meio deixa o banco exatamente na versão anterior.
+#
+# Cada migração é (versão, descrição, passos). Um passo pode ser uma string SQL
+# ou uma função que recebe o cursor, para transformações que não cabem em SQL puro.
+# Nunca altere uma migração já publicada: crie uma nova com a próxima versão.
+
+from erp_refatorado.database.search_index import create_statements, digits_expression, trigger_statements
+
+
+def _centavos(column):
+    # Valor REAL em reais -> INTEGER em centavos, arredondado
+    return f"CAST(ROUND({column} * 100) AS INTEGER)"
+
+
+def rebuild_table(table, create_sql, select_sql, after=()):
+    """
+    Passo de migração que recria a tabela com uma nova definição (o SQLite não altera
+    o tipo de uma coluna): cria "{table}_new" com create_sql (usando {table} no nome),
+    copia as linhas com select_sql, troca as tabelas e executa os comandos de "after"
+    (índices e gatilhos, que são descartados junto com a tabela antiga).
+    Mantém o contador do AUTOINCREMENT, para que ids de linhas excluídas não voltem.
+    """
+    def step(cursor):
+        row = cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+        cursor.execute(create_sql.format(table=f"{table}_new"))
+        cursor.execute(f"INSERT INTO {table}_new {select_sql}")
+        cursor.execute(f"DROP TABLE {table}")
+        cursor.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+        if row is not None:
+            cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (row[0], table))
+            if cursor.rowcount == 0:
+                cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, row[0]))
+        for statement in after:
+            cursor.execute(statement)
+    return step
+
+
+def digits_column(table, column, source):
+    """
+    Coluna gerada (VIRTUAL) com só os dígitos de outra coluna (CPF, CNPJ, telefone).
+    É calculada pelo SQLite a partir do valor gravado, então as linhas existentes já a
+    têm e nenhum INSERT/UPDATE precisa preenchê-la; o índice guarda o valor calculado.
+    """
+    return (f"ALTER TABLE {table} ADD COLUMN {column} TEXT "
+            f"GENERATED ALWAYS AS ({digits_expression(source)}) VIRTUAL")
+
+
+def unique_index(name, table, expression, label):
+    """
+    Passo que cria um índice único, antes conferindo se os dados atuais o permitem.
+    Se houver repetidos a migração é desfeita com uma mensagem que os lista, para
+    que sejam corrigidos à mão (não há como saber qual dos registros é o certo).
+    """
+    def step(cursor):
+        duplicates = cursor.execute(
+            f"SELECT {expression}, COUNT(*) FROM {table} WHERE {expression} IS NOT NULL "
+            f"GROUP BY {expression} HAVING COUNT(*) > 1").fetchall()
+        if duplicates:
+            listed = ", ".join(f"{value} ({count}x)" for value, count in duplicates[:20])
+            raise ValueError(f"Não foi possível criar o índice único de {label} em {table}: "
+                             f"há valores repetidos: {listed}")
+        cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {name} ON {table} ({expression})")
+    return step
+
+
+MIGRATIONS = [
+    (1, "Tabelas iniciais", [
+        """
+            CREATE TABLE IF NOT EXISTS usuarios(
+                id_usuario INTEGER PRIMARY KEY AUTOINCREMENT,
+                nome_usuario TEXT NOT NULL,
+                cpf_usuario TEXT NOT NULL UNIQUE,
+                email_usuario TEXT NOT NULL UNIQUE,
+                telefone_usuario TEXT NOT NULL,
+                data_nascimento TEXT NOT NULL,
+                rua TEXT NOT NULL,
+                cep TEXT NOT NULL,
+                bairro TEXT NOT NULL,
+                cidade TEXT NOT NULL,
+                senha TEXT NOT NULL,
+                tipo TEXT NOT NULL CHECK(tipo IN ('admin', 'vendedor', 'financeiro', 'estoque')),
+                permissao TEXT NOT NULL DEFAULT 'padrao'
+            )
+        """,
+        """
+            CREATE TABLE IF NOT EXISTS clientes (
+                id_cliente INTEGER PRIMARY KEY AUTOINCREMENT,
+                nome_cliente TEXT NOT NULL,
+                cpf_cliente TEXT NOT NULL UNIQUE,
+                email_cliente TEXT NOT NULL UNIQUE,
+                telefone_cliente TEXT NOT NULL,
+                data_nascimento TEXT NOT NULL,
+                rua TEXT NOT NULL,
+                cep TEXT NOT NULL,
+                bairro TEXT NOT NULL,
+                cidade TEXT NOT NULL
+            )
+        """,
+        """
+            CREATE TABLE IF NOT EXISTS fornecedores (
+                id_fornecedor INTEGER PRIMARY KEY AUTOINCREMENT,
+                nome TEXT NOT NULL,
+                cnpj TEXT NOT NULL UNIQUE,
+                telefone TEXT,
+                email TEXT UNIQUE,
+                rua TEXT NOT NULL,
+                cep TEXT NOT NULL,
+                bairro TEXT NOT NULL,
+                cidade TEXT NOT NULL
+            )
+        """,
+        """
+            CREATE TABLE IF NOT EXISTS produtos (
+                id_produto INTEGER PRIMARY KEY AUTOINCREMENT,
+                nome TEXT NOT NULL,
+                descricao TEXT,
+                preco_venda REAL NOT NULL,
+                preco_compra REAL NOT NULL,
+                fornecedor_id INTEGER,
+                FOREIGN KEY(fornecedor_id) REFERENCES fornecedores(id_fornecedor)
+            )
+        """,
+        """
+            CREATE TABLE IF NOT EXISTS estoque (
+                id_estoque INTEGER PRIMARY KEY AUTOINCREMENT,
+                produto_id INTEGER NOT NULL,
+                quantidade INTEGER NOT NULL DEFAULT 0,
+                FOREIGN KEY(produto_id) REFERENCES produtos(id_produto)
+            )
+        """,
+        """
+            CREATE TABLE IF NOT EXISTS vendas (
+                id_vendas INTEGER PRIMARY KEY AUTOINCREMENT,
+                cliente_id INTEGER NOT NULL,
+                usuario_id INTEGER NOT NULL,
+                data_venda TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                total REAL NOT NULL,
+                FOREIGN KEY(cliente_id) REFERENCES clientes(id_cliente),
+                FOREIGN KEY(usuario_id) REFERENCES usuarios(id_usuario)
+            )
+        """,
+        """
+            CREATE TABLE IF NOT EXISTS compras (
+                id_compras INTEGER PRIMARY KEY AUTOINCREMENT,
+                fornecedor_id INTEGER NOT NULL,
+                usuario_id INTEGER NOT NULL,
+                data_compra TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                total REAL NOT NULL,
+                FOREIGN KEY(fornecedor_id) REFERENCES fornecedores(id_fornecedor),
+                FOREIGN KEY(usuario_id) REFERENCES usuarios(id_usuario)
+            )
+        """,
+        """
+            CREATE TABLE IF NOT EXISTS financeiro (
+                id_financeiro INTEGER PRIMARY KEY AUTOINCREMENT,
+                tipo TEXT NOT NULL CHECK(tipo IN (
+                    'entrada', 'saida'
+                )),
+                valor REAL NOT NULL,
+                descricao TEXT,
+                data TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """,
+    ]),
+    (2, "Índices para ordenação, buscas por nome e chaves estrangeiras", [
+        "CREATE INDEX IF NOT EXISTS idx_clientes_nome ON clientes (nome_cliente)",
+        "CREATE INDEX IF NOT EXISTS idx_produtos_nome ON produtos (nome)",
+        "CREATE INDEX IF NOT EXISTS idx_fornecedores_nome ON fornecedores (nome)",
+        "CREATE INDEX IF NOT EXISTS idx_usuarios_nome ON usuarios (nome_usuario)",
+        "CREATE INDEX IF NOT EXISTS idx_produtos_fornecedor ON produtos (fornecedor_id)",
+        "CREATE INDEX IF NOT EXISTS idx_vendas_cliente ON vendas (cliente_id)",
+        "CREATE INDEX IF NOT EXISTS idx_compras_fornecedor ON compras (fornecedor_id)",
+    ]),
+    (3, "Um único registro de estoque por produto", [
+        # O antigo update_stock (INSERT OR REPLACE sem chave única) acumulava várias
+        # linhas por produto; mantemos apenas a mais recente de cada um.
+        """
+            DELETE FROM estoque
+            WHERE id_estoque NOT IN (SELECT MAX(id_estoque) FROM estoque GROUP BY produto_id)
+        """,
+        # O índice único também atende às buscas pela chave estrangeira produto_id
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_estoque_produto ON estoque (produto_id)",
+    ]),
+    (4, "Índices de busca textual (FTS5) para clientes, fornecedores, produtos e usuários",
+        create_statements('clientes') + create_statements('fornecedores')
+        + create_statements('produtos') + create_statements('usuarios')),
+    (5, "Valores em dinheiro como centavos inteiros (INTEGER) em vez de REAL", [
+        # O CHECK impede que um float (ex.: 19.99 em vez de 1999) seja gravado por engano
+        rebuild_table('produtos', """
+            CREATE TABLE {table} (
+                id_produto INTEGER PRIMARY KEY AUTOINCREMENT,
+                nome TEXT NOT NULL,
+                descricao TEXT,
+                preco_venda INTEGER NOT NULL CHECK (typeof(preco_venda) = 'integer'),
+                preco_compra INTEGER NOT NULL CHECK (typeof(preco_compra) = 'integer'),
+                fornecedor_id INTEGER,
+                FOREIGN KEY(fornecedor_id) REFERENCES fornecedores(id_fornecedor)
+            )
+        """, f"SELECT id_produto, nome, descricao, {_centavos('preco_venda')}, {_centavos('preco_compra')}, "
+             f"fornecedor_id FROM produtos",
+            # O índice FTS continua válido (os ids não mudam); só os gatilhos são recriados
+            ["CREATE INDEX IF NOT EXISTS idx_produtos_nome ON produtos (nome)",
+             "CREATE INDEX IF NOT EXISTS idx_produtos_fornecedor ON produtos (fornecedor_id)"]
+            + trigger_statements('produtos')),
+        rebuild_table('vendas', """
+            CREATE TABLE {table} (
+                id_vendas INTEGER PRIMARY KEY AUTOINCREMENT,
+                cliente_id INTEGER NOT NULL,
+                usuario_id INTEGER NOT NULL,
+                data_venda TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                total INTEGER NOT NULL CHECK (typeof(total) = 'integer'),
+                FOREIGN KEY(cliente_id) REFERENCES clientes(id_cliente),
+                FOREIGN KEY(usuario_id) REFERENCES usuarios(id_usuario)
+            )
+        """, f"SELECT id_vendas, cliente_id, usuario_id, data_venda, {_centavos('total')} FROM vendas",
+            ["CREATE INDEX IF NOT EXISTS idx_vendas_cliente ON vendas (cliente_id)"]),
+        rebuild_table('compras', """
+            CREATE TABLE {table} (
+                id_compras INTEGER PRIMARY KEY AUTOINCREMENT,
+                fornecedor_id INTEGER NOT NULL,
+                usuario_id INTEGER NOT NULL,
+                data_compra TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                total INTEGER NOT NULL CHECK (typeof(total) = 'integer'),
+                FOREIGN KEY(fornecedor_id) REFERENCES fornecedores(id_fornecedor),
+                FOREIGN KEY(usuario_id) REFERENCES usuarios(id_usuario)
+            )
+        """, f"SELECT id_compras, fornecedor_id, usuario_id, data_compra, {_centavos('total')} FROM compras",
+            ["CREATE INDEX IF NOT EXISTS idx_compras_fornecedor ON compras (fornecedor_id)"]),
+        rebuild_table('financeiro', """
+            CREATE TABLE {table} (
+                id_financeiro INTEGER PRIMARY KEY AUTOINCREMENT,
+                tipo TEXT NOT NULL CHECK(tipo IN (
+                    'entrada', 'saida'
+                )),
+                valor INTEGER NOT NULL CHECK (typeof(valor) = 'integer'),
+                descricao TEXT,
+                data TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """, f"SELECT id_financeiro, tipo, {_centavos('valor')}, descricao, data FROM financeiro"),
+    ]),
+    (6, "CPF, CNPJ e telefone só com dígitos e e-mail sem diferença de maiúsculas, com índices para busca exata", [
+        # "123.456.789-01" e "12345678901" passam a ser o mesmo CPF (e não podem coexistir)
+        digits_column('clientes', 'cpf_digitos', 'cpf_cliente'),
+        digits_column('clientes', 'telefone_digitos', 'telefone_cliente'),
+        digits_column('fornecedores', 'cnpj_digitos', 'cnpj'),
+        unique_index('idx_clientes_cpf_digitos', 'clientes', 'cpf_digitos', 'CPF'),
+        unique_index('idx_fornecedores_cnpj_digitos', 'fornecedores', 'cnpj_digitos', 'CNPJ'),
+        "CREATE INDEX IF NOT EXISTS idx_clientes_telefone_digitos ON clientes (telefone_digitos)",
+        # O UNIQUE da coluna compara maiúsculas; este índice atende a get_user_by_email
+        unique_index('idx_usuarios_email_nocase', 'usuarios', 'email_usuario COLLATE NOCASE', 'e-mail'),
+    ]),
+    (7, "Itens de venda e desconto da venda", [
+        """
+            CREATE TABLE IF NOT EXISTS itens_venda (
+                id_item INTEGER PRIMARY KEY AUTOINCREMENT,
+                venda_id INTEGER NOT NULL,
+                produto_id INTEGER NOT NULL,
+                quantidade INTEGER NOT NULL CHECK (quantidade > 0),
+                preco_unitario INTEGER NOT NULL CHECK (typeof(preco_unitario) = 'integer'),
+                subtotal INTEGER NOT NULL CHECK (typeof(subtotal) = 'integer'),
+                FOREIGN KEY(venda_id) REFERENCES vendas(id_vendas),
+                FOREIGN KEY(produto_id) REFERENCES produtos(id_produto)
+            )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_itens_venda_venda ON itens_venda (venda_id)",
+        "CREATE INDEX IF NOT EXISTS idx_itens_venda_produto ON itens_venda (produto_id)",
+        # total da venda = soma dos subtotais dos itens - desconto
+        "ALTER TABLE vendas ADD COLUMN desconto INTEGER NOT NULL DEFAULT 0 CHECK (typeof(desconto) = 'integer')",
+    ]),
+    (8, "Razão de movimentos de estoque, com checkpoints das quantidades", [
+        # quantidade é a variação (negativa nas saídas); estoque.quantidade é a soma delas
+        """
+            CREATE TABLE IF NOT EXISTS movimentos_estoque (
+                id_movimento INTEGER PRIMARY KEY AUTOINCREMENT,
+                produto_id INTEGER NOT NULL,
+                tipo TEXT NOT NULL CHECK(tipo IN ('entrada', 'saida', 'ajuste')),
+                quantidade INTEGER NOT NULL,
+                referencia TEXT,
+                usuario_id INTEGER,
+                data TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY(produto_id) REFERENCES produtos(id_produto),
+                FOREIGN KEY(usuario_id) REFERENCES usuarios(id_usuario)
+            )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_movimentos_estoque_produto ON movimentos_estoque (produto_id, id_movimento)",
+        # Quantidade de cada produto depois do movimento ultimo_movimento (ver stock_ledger.py)
+        """
+            CREATE TABLE IF NOT EXISTS estoque_checkpoint (
+                produto_id INTEGER PRIMARY KEY,
+                ultimo_movimento INTEGER NOT NULL,
+                quantidade INTEGER NOT NULL,
+                data TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_estoque_checkpoint_movimento ON estoque_checkpoint (ultimo_movimento)",
+        # O estoque atual vira o saldo inicial da razão, já com um checkpoint
+        """
+            INSERT INTO movimentos_estoque (produto_id, tipo, quantidade, referencia)
+            SELECT produto_id, 'ajuste', quantidade, 'Saldo inicial' FROM estoque WHERE quantidade <> 0
+        """,
+        """
+            INSERT INTO estoque_checkpoint (produto_id, ultimo_movimento, quantidade)
+            SELECT produto_id, COALESCE((SELECT MAX(id_movimento) FROM movimentos_estoque), 0), quantidade
+            FROM estoque
+        """,
+    ]),
+    (9, "Totais de vendas por dia, vendedor e cliente", [
+        # Mantida na mesma transação de cada venda (ver business_logic/sales_aggregates.py)
+        """
+            CREATE TABLE IF NOT EXISTS vendas_diarias (
+                dia TEXT NOT NULL,
+                usuario_id INTEGER NOT NULL,
+                cliente_id INTEGER NOT NULL,
+                vendas INTEGER NOT NULL DEFAULT 0,
+                itens INTEGER NOT NULL DEFAULT 0,
+                desconto INTEGER NOT NULL DEFAULT 0 CHECK (typeof(desconto) = 'integer'),
+                total INTEGER NOT NULL DEFAULT 0 CHECK (typeof(total) = 'integer'),
+                PRIMARY KEY (dia, usuario_id, cliente_id)
+            )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_vendas_diarias_usuario ON vendas_diarias (usuario_id, dia)",
+        "CREATE INDEX IF NOT EXISTS idx_vendas_diarias_cliente ON vendas_diarias (cliente_id, dia)",
+        # Totais das vendas já gravadas
+        """
+            INSERT INTO vendas_diarias (dia, usuario_id, cliente_id, vendas, itens, desconto, total)
+            SELECT date(v.data_venda), v.usuario_id, v.cliente_id, COUNT(*), COALESCE(SUM(i.itens), 0),
+                   SUM(v.desconto), SUM(v.total)
+            FROM vendas v
+            LEFT JOIN (SELECT venda_id, SUM(quantidade) AS itens FROM itens_venda GROUP BY venda_id) i
+                ON i.venda_id = v.id_vendas
+            GROUP BY date(v.data_venda), v.usuario_id, v.cliente_id
+        """,
+    ]),
+    (10, "Totais diários e fechamentos de período do financeiro", [
+        "CREATE INDEX IF NOT EXISTS idx_financeiro_data ON financeiro (data)",
+        # Entradas e saídas de cada dia, mantidas junto com cada lançamento (ver business_logic/financial_ledger.py)
+        """
+            CREATE TABLE IF NOT EXISTS financeiro_diario (
+                dia TEXT PRIMARY KEY,
+                entradas INTEGER NOT NULL DEFAULT 0 CHECK (typeof(entradas) = 'integer'),
+                saidas INTEGER NOT NULL DEFAULT 0 CHECK (typeof(saidas) = 'integer')
+            )
+        """,
+        # Saldo no fim de cada período (mês) fechado; lançamentos até "ate" não são mais aceitos
+        """
+            CREATE TABLE IF NOT EXISTS financeiro_fechamento (
+                periodo TEXT PRIMARY KEY,
+                ate TEXT NOT NULL UNIQUE,
+                entradas INTEGER NOT NULL CHECK (typeof(entradas) = 'integer'),
+                saidas INTEGER NOT NULL CHECK (typeof(saidas) = 'integer'),
+                saldo INTEGER NOT NULL CHECK (typeof(saldo) = 'integer'),
+                data_fechamento TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """,
+        """
+            INSERT INTO financeiro_diario (dia, entradas, saidas)
+            SELECT date(data), SUM(CASE WHEN tipo = 'entrada' THEN valor ELSE 0 END),
+                   SUM(CASE WHEN tipo = 'saida' THEN valor ELSE 0 END)
+            FROM financeiro GROUP BY date(data)
+        """,
+    ]),
+    (11, "Remove da razão do estoque os produtos já excluídos", [
+        # Produtos excluídos antes de delete_product limpar a razão (ver business_logic/stock_ledger.py)
+        "DELETE FROM movimentos_estoque WHERE produto_id NOT IN (SELECT id_produto FROM produtos)",
+        "DELETE FROM estoque_checkpoint WHERE produto_id NOT IN (SELECT id_produto FROM produtos)",
+        "DELETE FROM estoque WHERE produto_id NOT IN (SELECT id_produto FROM produtos)",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    """Retorna a versão do esquema gravada no banco (0 se nunca foi migrado)."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def pending_migrations(conn):
+    """Lista as migrações ainda não aplicadas, em ordem."""
+    version = get_schema_version(conn)
+    return [migration for migration in MIGRATIONS if migration[0] > version]
+
+
+def apply_migrations(conn):
+    """
+    Aplica, em ordem, todas as migrações pendentes. Cada uma roda em sua própria
+    transação junto com a atualização de user_version.
+    Retorna a lista de versões aplicadas.
+    """
+    applied = []
+    for version, description, steps in pending_migrations(conn):
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            for step in steps:
+                if callable(step):
+                    step(cursor)
+                else:
+                    cursor.execute(step)
+            cursor.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        print(f"Migração {version} aplicada: {description}")
+        applied.append(version)
+    return applied
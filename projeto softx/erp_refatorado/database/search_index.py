@@ -0,0 +1,135 @@
+# Em erp_refatorado/database/search_index.py
+
+import re
+
+# Índices de busca textual (FTS5) usados pelos search_* dos managers.
+#
+# As tabelas FTS são "contentless" (content=''): guardam apenas o índice invertido,
+# alimentado por gatilhos na tabela de origem. Isso permite indexar expressões que
+# não existem como coluna, como o CPF/CNPJ só com dígitos.
+#
+# O tokenizador unicode61 com remove_diacritics faz "jose" encontrar "José" e
+# "conceicao" encontrar "Conceição". O prefix='2 3' mantém índices extras para
+# prefixos curtos, deixando a busca por início de palavra ("mar*") tão rápida quanto
+# a busca por palavra inteira.
+
+FTS_TOKENIZE = "unicode61 remove_diacritics 2"
+FTS_PREFIX = "2 3"
+
+
+def digits_expression(column):
+    # Remove a pontuação mais comum de CPF/CNPJ/telefone (ex.: 123.456.789-00 -> 12345678900)
+    return (f"replace(replace(replace(replace(replace(replace("
+            f"{column}, '.', ''), '-', ''), '/', ''), ' ', ''), '(', ''), ')', '')")
+
+
+def only_digits(text):
+    """Lado Python de digits_expression, para o valor procurado: "123.456.789-01" -> "12345678901"."""
+    return re.sub(r"\D", "", str(text or ""))
+
+
+def _document(column):
+    # Indexa o documento como foi digitado e também só com dígitos
+    return f"{{r}}{column} || ' ' || {digits_expression('{r}' + column)}"
+
+
+# tabela de origem -> definição do índice. Em "columns", cada coluna FTS aponta para
+# uma expressão SQL sobre a linha de origem; {r} é trocado por NEW., OLD. ou nada.
+# "weights" são os pesos do bm25 na mesma ordem das colunas (nome pesa mais).
+FTS_INDEXES = {
+    'clientes': {
+        'fts_table': 'clientes_fts',
+        'id_column': 'id_cliente',
+        'columns': {
+            'nome': '{r}nome_cliente',
+            'documento': _document('cpf_cliente'),
+            'email': '{r}email_cliente',
+            'cidade': '{r}cidade',
+            'bairro': '{r}bairro',
+        },
+        'weights': (10.0, 5.0, 3.0, 1.0, 1.0),
+    },
+    'fornecedores': {
+        'fts_table': 'fornecedores_fts',
+        'id_column': 'id_fornecedor',
+        'columns': {
+            'nome': '{r}nome',
+            'documento': _document('cnpj'),
+            'email': '{r}email',
+            'cidade': '{r}cidade',
+            'bairro': '{r}bairro',
+        },
+        'weights': (10.0, 5.0, 3.0, 1.0, 1.0),
+    },
+    'produtos': {
+        'fts_table': 'produtos_fts',
+        'id_column': 'id_produto',
+        'columns': {
+            'nome': '{r}nome',
+            'descricao': '{r}descricao',
+        },
+        'weights': (10.0, 2.0),
+    },
+    'usuarios': {
+        'fts_table': 'usuarios_fts',
+        'id_column': 'id_usuario',
+        'columns': {
+            'nome': '{r}nome_usuario',
+            'documento': _document('cpf_usuario'),
+            'email': '{r}email_usuario',
+            'cidade': '{r}cidade',
+            'bairro': '{r}bairro',
+        },
+        'weights': (10.0, 5.0, 3.0, 1.0, 1.0),
+    },
+}
+
+
+def _values(index, row_prefix):
+    return ", ".join(expr.format(r=row_prefix) for expr in index['columns'].values())
+
+
+def trigger_statements(table):
+    """Gatilhos que mantêm o índice FTS da tabela em sincronia com inserções, exclusões e alterações."""
+    index = FTS_INDEXES[table]
+    fts, id_column = index['fts_table'], index['id_column']
+    columns = ", ".join(index['columns'])
+    insert_new = f"INSERT INTO {fts} (rowid, {columns}) VALUES (NEW.{id_column}, {_values(index, 'NEW.')});"
+    # Em tabelas contentless a remoção exige os mesmos valores que foram indexados
+    delete_old = (f"INSERT INTO {fts} ({fts}, rowid, {columns}) "
+                  f"VALUES ('delete', OLD.{id_column}, {_values(index, 'OLD.')});")
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN {delete_old} {insert_new} END",
+    ]
+
+
+def create_statements(table):
+    """Cria a tabela FTS, indexa as linhas já existentes e cria os gatilhos de sincronia."""
+    index = FTS_INDEXES[table]
+    fts, id_column = index['fts_table'], index['id_column']
+    columns = ", ".join(index['columns'])
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({columns}, content='', "
+        f"tokenize='{FTS_TOKENIZE}', prefix='{FTS_PREFIX}')",
+        f"INSERT INTO {fts} (rowid, {columns}) SELECT {id_column}, {_values(index, '')} FROM {table}",
+    ] + trigger_statements(table)
+
+
+def rank_expression(table):
+    """Expressão bm25 com os pesos das colunas; menor = mais relevante."""
+    index = FTS_INDEXES[table]
+    weights = ", ".join(str(weight) for weight in index['weights'])
+    return f"bm25({index['fts_table']}, {weights})"
+
+
+def build_match_query(term):
+    """
+    Converte o texto digitado numa consulta FTS5: cada palavra vira um prefixo entre
+    aspas ("mar"*) e todas precisam aparecer. Retorna None se não houver palavras.
+    """
+    tokens = re.findall(r"\w+", term or "")
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
@@ -0,0 +1,113 @@
+# Em erp_refatorado/database/sql_catalog.py
+
+import threading
+from erp_refatorado.database.instrumentation import normalize_sql
+
+# Catálogo central dos comandos SQL dos managers. Cada comando é registrado uma única
+# vez, com um nome ("clientes.insert"), e o texto guardado é sempre o mesmo (espaços e
+# quebras de linha colapsados). Isso importa porque o cache de comandos compilados do
+# sqlite3 (cached_statements, um por conexão) é indexado pelo texto exato do SQL:
+# a mesma consulta escrita com outra indentação seria compilada de novo.
+#
+# As conexões do pool são persistentes e abertas com cached_statements grande o bastante
+# para o catálogo inteiro (ver statement_cache_size), então cada comando é compilado
+# uma vez por conexão e reutilizado daí em diante.
+#
+#     INSERT_SQL = register('clientes.insert', """ INSERT INTO clientes (...) VALUES (...) """)
+#     cursor.execute(sql('clientes.insert'), params)  # ou self.INSERT_SQL
+
+# Padrão do sqlite3 e folga para os comandos montados em tempo de execução
+# (paginação, filtros), que não estão no catálogo mas também usam o cache
+DEFAULT_STATEMENT_CACHE = 128
+STATEMENT_CACHE_HEADROOM = 64
+
+
+def _compact(sql):
+    # Só junta as linhas e a indentação; o conteúdo de cada linha não muda
+    return " ".join(line.strip() for line in sql.strip().splitlines() if line.strip())
+
+
+class SqlCatalog:
+    def __init__(self):
+        self._statements = {}
+        self._names = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, sql):
+        """Registra o comando com o nome informado e devolve o texto canônico a ser executado."""
+        text = _compact(sql)
+        with self._lock:
+            current = self._statements.get(name)
+            if current is not None and current != text:
+                raise ValueError(f"O comando '{name}' já está registrado com outro SQL")
+            self._statements[name] = text
+            self._names.setdefault(text, name)
+        return text
+
+    def sql(self, name):
+        """Texto do comando registrado com esse nome."""
+        try:
+            return self._statements[name]
+        except KeyError:
+            raise KeyError(f"Comando SQL não registrado no catálogo: '{name}'") from None
+
+    def name_of(self, sql):
+        """Nome do comando com esse texto (ou None se não for do catálogo)."""
+        return self._names.get(_compact(sql))
+
+    def items(self):
+        with self._lock:
+            return list(self._statements.items())
+
+    def __len__(self):
+        return len(self._statements)
+
+    def __contains__(self, name):
+        return name in self._statements
+
+    def stats(self, query_stats):
+        """
+        Junta as estatísticas de consultas (snapshot do QueryStats, por SQL normalizado)
+        aos nomes do catálogo: {nome: {'count', 'total_ms', 'avg_ms', 'max_ms', 'rows'}},
+        do que mais consumiu tempo para o que menos. Comandos ainda não executados ficam zerados.
+        """
+        result = {}
+        for name, text in self.items():
+            entry = query_stats.get(normalize_sql(text), {})
+            result[name] = {
+                'count': entry.get('count', 0),
+                'total_ms': entry.get('total_ms', 0.0),
+                'avg_ms': entry.get('avg_ms', 0.0),
+                'max_ms': entry.get('max_ms', 0.0),
+                'rows': entry.get('rows', 0),
+            }
+        return dict(sorted(result.items(), key=lambda item: item[1]['total_ms'], reverse=True))
+
+
+# Catálogo único do sistema, preenchido pelos managers ao serem importados
+CATALOG = SqlCatalog()
+
+
+def register(name, sql):
+    return CATALOG.register(name, sql)
+
+
+def sql(name):
+    return CATALOG.sql(name)
+
+
+def update_statement(table, id_column, columns):
+    """
+    UPDATE só das colunas informadas, registrado como "tabela.update(col1,col2)". Cada
+    combinação de colunas alteradas vira um comando próprio, compilado uma vez.
+    """
+    name = f"{table}.update({','.join(columns)})"
+    if name in CATALOG:
+        return CATALOG.sql(name)
+    assignments = ", ".join(f"{column} = ?" for column in columns)
+    return register(name, f"UPDATE {table} SET {assignments} WHERE {id_column} = ?")
+
+
+def statement_cache_size():
+    """Tamanho do cache de comandos compilados de cada conexão: o catálogo inteiro mais uma folga."""
+    return max(DEFAULT_STATEMENT_CACHE, len(CATALOG) + STATEMENT_CACHE_HEADROOM)
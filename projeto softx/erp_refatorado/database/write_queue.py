@@ -0,0 +1,151 @@
+# Em erp_refatorado/database/write_queue.py
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+# Marca colocada na fila para encerrar a thread de escrita
+_STOP = object()
+
+
+class WriteQueue:
+    """
+    Fila de escrita com uma única thread gravadora ("single writer").
+
+    O SQLite só aceita um escritor por vez; com várias threads gravando ao mesmo
+    tempo, cada uma faz seu próprio commit (um fsync) e as demais esperam o lock ou
+    recebem "database is locked". Aqui todas as escritas entram numa fila e a thread
+    gravadora as executa em lotes: junta o que chegou em até max_delay_ms (ou até
+    batch_size operações) e confirma tudo num único commit ("group commit").
+
+    Cada operação roda num SAVEPOINT próprio dentro do lote, então a falha de uma
+    (ex.: CPF repetido) não desfaz as outras. O resultado (ou a exceção) de cada
+    operação é entregue no Future devolvido por submit, só depois do commit.
+    """
+
+    def __init__(self, db_manager, batch_size=200, max_delay_ms=0.0):
+        if batch_size < 1:
+            raise ValueError("batch_size deve ser maior que zero")
+        self.db_manager = db_manager
+        self.batch_size = batch_size
+        self.max_delay = max_delay_ms / 1000
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats = {
+            'operations': 0,  # Operações executadas
+            'failed': 0,      # Operações que terminaram em exceção
+            'batches': 0,     # Lotes (commits) realizados
+        }
+        self._thread = threading.Thread(target=self._run, name="softx-writer", daemon=True)
+        self._thread.start()
+
+    def is_writer_thread(self):
+        return threading.current_thread() is self._thread
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """Enfileira fn(*args, **kwargs) para a thread gravadora e devolve um Future."""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("A fila de escrita já foi encerrada")
+            self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def flush(self, timeout=None):
+        """Espera até que tudo o que foi enfileirado antes desta chamada esteja gravado."""
+        self.submit(lambda: None).result(timeout)
+
+    def close(self, timeout=None):
+        """Grava o que ainda estiver na fila e encerra a thread gravadora."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['pending'] = self._queue.qsize()
+        stats['avg_batch_size'] = stats['operations'] / stats['batches'] if stats['batches'] else 0.0
+        return stats
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.batch_size:
+                try:
+                    # O que já está na fila entra no lote sem espera; depois espera até o prazo
+                    timeout = deadline - time.monotonic()
+                    item = self._queue.get_nowait() if timeout <= 0 else self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        # Operações canceladas pelo chamador antes de começar são descartadas
+        batch = [entry for entry in batch if entry[0].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        outcomes = []
+        try:
+            with self.db_manager.transaction():
+                for future, fn, args, kwargs in batch:
+                    try:
+                        # "with" aninhado numa transação = SAVEPOINT só desta operação
+                        with self.db_manager:
+                            outcomes.append((future, fn(*args, **kwargs), None))
+                    except Exception as e:
+                        outcomes.append((future, None, e))
+        except Exception as e:
+            # O commit do lote falhou: nenhuma operação foi gravada
+            for future, *_ in batch:
+                future.set_exception(e)
+            with self._lock:
+                self._stats['failed'] += len(batch)
+                self._stats['batches'] += 1
+            return
+
+        with self._lock:
+            self._stats['operations'] += len(batch)
+            self._stats['batches'] += 1
+            self._stats['failed'] += sum(1 for _, _, error in outcomes if error is not None)
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_write_queue(db_manager, batch_size=200, max_delay_ms=0.0):
+    """Retorna a fila de escrita do banco do db_manager; um único escritor por arquivo de banco."""
+    with _queues_lock:
+        write_queue = _queues.get(db_manager.db_name)
+        if write_queue is None or write_queue._closed:
+            write_queue = WriteQueue(db_manager, batch_size, max_delay_ms)
+            _queues[db_manager.db_name] = write_queue
+        return write_queue
+
+
+def close_write_queue(db_name, timeout=None):
+    """Encerra a fila de escrita do banco informado, se existir."""
+    with _queues_lock:
+        write_queue = _queues.pop(db_name, None)
+    if write_queue is not None:
+        write_queue.close(timeout)
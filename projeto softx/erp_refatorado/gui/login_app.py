@@ -11,7 +11,7 @@ from erp_refatorado.models.models import User
 
 
 class LoginApp:
-    def __init__(self, master):
+    def __init__(self, master, db_manager=None):
         self.master = master
         master.title("Login - SoftX ERP")
 
@@ -26,7 +26,7 @@ class LoginApp:
         master.resizable(False, False)
 
         self.logged_in_user = None
-        self.user_manager = UserManager()
+        self.user_manager = UserManager(db_manager)
 
         # --- Estilos ---
         style = ttk.Style(master)
@@ -6,23 +6,56 @@ from datetime import datetime
 
 from erp_refatorado.database.database_manager import DatabaseManager
 from erp_refatorado.business_logic.client_manager import ClientManager
+from erp_refatorado.business_logic.financial_manager import FinancialManager
 from erp_refatorado.business_logic.user_manager import UserManager
 from erp_refatorado.business_logic.supplier_manager import SupplierManager
 from erp_refatorado.business_logic.product_manager import ProductManager
+from erp_refatorado.business_logic.sale_manager import SaleManager
+from erp_refatorado.business_logic.stock_ledger import InsufficientStockError
 from erp_refatorado.models.models import Client, User, Supplier, Product
+from erp_refatorado.models.money import Money, format_money
+from erp_refatorado.models.tracking import edit
 from erp_refatorado.gui.gui_components import GUIComponents
 
 class Application:
-    def __init__(self, master, logged_in_user=None):
+    # Opção dos combos de filtro que não filtra
+    FILTER_ALL = "Todos"
+    # Histórico de vendas: texto do combo "Agrupar por" -> agrupamento do SaleManager.get_sales_history
+    HISTORY_GROUPS = {"Dia": 'dia', "Vendedor": 'usuario', "Cliente": 'cliente'}
+    # Financeiro: texto dos combos de tipo -> tipo do lançamento
+    FINANCIAL_TYPES = {"Entrada": 'entrada', "Saída": 'saida'}
+    # Opções mostradas pelos combos de busca (ver _setup_picker)
+    PICKER_PAGE_SIZE = 50
+    # Espera depois da última tecla antes de buscar, em ms
+    PICKER_DELAY_MS = 250
+
+    def __init__(self, master, logged_in_user=None, db_manager=None):
         self.root = master
         self.logged_in_user = logged_in_user
-        self.db_manager = DatabaseManager()
-        self.client_manager = ClientManager()
-        self.user_manager = UserManager()
-        self.supplier_manager = SupplierManager()
-        self.product_manager = ProductManager()
+        # Um único DatabaseManager (e seu pool de conexões) é compartilhado por todos os managers
+        self.db_manager = db_manager or DatabaseManager()
+        self.client_manager = ClientManager(self.db_manager)
+        self.user_manager = UserManager(self.db_manager)
+        self.supplier_manager = SupplierManager(self.db_manager)
+        self.product_manager = ProductManager(self.db_manager)
+        self.sale_manager = SaleManager(self.db_manager)
+        self.financial_manager = FinancialManager(self.db_manager)
         self.current_frame = None
         self.frames = {}
+        # Estado das listas paginadas (ver _show_paged_list)
+        self.paged_lists = {}
+        # Mapa de fornecedores compartilhado pela aba de produtos e pelo combobox:
+        # texto mostrado no combo -> id, e id -> texto (ver _refresh_supplier_map)
+        self.supplier_map = {}
+        self.supplier_labels = {}
+        # Subtotal (Money) de cada item da venda atual, pelo id da linha na Treeview;
+        # a Treeview só guarda o texto formatado
+        self.sale_item_totals = {}
+        # (produto_id, quantidade) de cada item da venda atual, pelo id da linha na Treeview
+        self.sale_items = {}
+        # Combos de busca (cliente/produto da venda, filtros do histórico), por nome:
+        # texto mostrado -> id das opções da busca atual (ver _setup_picker)
+        self.pickers = {}
         self.initialized_tabs = set()
         self.setup_gui()
 
@@ -61,14 +94,14 @@ class Application:
         # Financeiro Menu
         self.financeiro_menu = Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Financeiro", menu=self.financeiro_menu)
-        self.financeiro_menu.add_command(label="Contas a Pagar", command=lambda: GUIComponents.show_info("Financeiro", "Funcionalidade em desenvolvimento."))
-        self.financeiro_menu.add_command(label="Contas a Receber", command=lambda: GUIComponents.show_info("Financeiro", "Funcionalidade em desenvolvimento."))
+        self.financeiro_menu.add_command(label="Contas a Pagar", command=lambda: self.show_financial("Saída"))
+        self.financeiro_menu.add_command(label="Contas a Receber", command=lambda: self.show_financial("Entrada"))
 
         # Vendas Menu
         self.vendas_menu = Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Vendas", menu=self.vendas_menu)
         self.vendas_menu.add_command(label="Nova Venda", command=lambda: self.show_frame("sale"))
-        self.vendas_menu.add_command(label="Histórico de Vendas", command=lambda: GUIComponents.show_info("Vendas", "Funcionalidade em desenvolvimento."))
+        self.vendas_menu.add_command(label="Histórico de Vendas", command=lambda: self.show_frame("sales_history"))
 
         # Initialize frames for each section
         # For simplicity, we'll use the same frame for cadastro and consulta for now, as the tabs already contain CRUD
@@ -78,6 +111,8 @@ class Application:
         self.frames["supplier_cadastro"] = Frame(self.root)
         self.frames["product_cadastro"] = Frame(self.root)
         self.frames["sale"] = Frame(self.root)
+        self.frames["sales_history"] = Frame(self.root)
+        self.frames["financial"] = Frame(self.root)
 
         # For consulta, we can reuse the same frames as they already have search/list functionality
         self.frames["client_consulta"] = self.frames["client_cadastro"]
@@ -92,6 +127,8 @@ class Application:
         self.create_supplier_tab(self.frames["supplier_cadastro"])
         self.create_product_tab(self.frames["product_cadastro"])
         self.create_sale_tab(self.frames["sale"])
+        self.create_sales_history_tab(self.frames["sales_history"])
+        self.create_financial_tab(self.frames["financial"])
 
         # Show initial frame (e.g., client frame)
         self.show_frame("home")
@@ -126,11 +163,85 @@ class Application:
         elif frame_name == "supplier_cadastro" or frame_name == "supplier_consulta":
             self.populate_supplier_list()
         elif frame_name == "product_cadastro" or frame_name == "product_consulta":
-            self.populate_product_list()
             self.populate_supplier_combobox()
+            self.populate_product_list()
         elif frame_name == "sale":
             self.populate_client_combobox()
             self.populate_product_combobox()
+        elif frame_name == "sales_history":
+            self.populate_history_filters()
+            self.show_sales_history()
+        elif frame_name == "financial":
+            self.show_financial_entries()
+
+    # --- Listas paginadas ---
+    def _show_paged_list(self, name, treeview, fetch_page, row_values):
+        """
+        Limpa a tabela e mostra a primeira página. As páginas seguintes são buscadas
+        (com o cursor da página anterior) à medida que o usuário rola até o fim da lista.
+        """
+        treeview.delete(*treeview.get_children())
+        self.paged_lists[name] = {"treeview": treeview, "fetch_page": fetch_page,
+                                  "row_values": row_values, "cursor": None, "done": False}
+        self._load_next_page(name)
+
+    def _load_next_page(self, name):
+        state = self.paged_lists.get(name)
+        if state is None or state["done"]:
+            return
+        page = state["fetch_page"](state["cursor"])
+        for item in page.items:
+            state["treeview"].insert("", "end", values=state["row_values"](item))
+        state["cursor"] = page.next_cursor
+        state["done"] = not page.has_more
+
+    def _on_list_scroll(self, name, scrollbar, first, last):
+        scrollbar.set(first, last)
+        # Chegou ao fim da lista: agenda a próxima página
+        if float(last) >= 1.0:
+            state = self.paged_lists.get(name)
+            if state and not state["done"]:
+                self.root.after_idle(self._load_next_page, name)
+
+    # --- Combos de busca ---
+    def _setup_picker(self, name, combo, search_page, entity_label, fixed=()):
+        """
+        Transforma o combo num campo de busca: as opções são só a primeira página
+        (PICKER_PAGE_SIZE) de search_page(texto digitado), nunca a tabela inteira.
+        entity_label(item) devolve (id, nome); fixed são opções fixas no topo, sem id
+        (ex.: FILTER_ALL).
+        """
+        self.pickers[name] = {"combo": combo, "search_page": search_page, "entity_label": entity_label,
+                              "fixed": tuple(fixed), "map": {}, "job": None}
+        combo.configure(state="normal")
+        combo.bind("<KeyRelease>", lambda event: self._schedule_picker_search(name, event))
+
+    def _schedule_picker_search(self, name, event):
+        if event.keysym in ("Up", "Down", "Return", "Escape", "Tab"):
+            return
+        state = self.pickers[name]
+        # Só busca quando o usuário para de digitar
+        if state["job"] is not None:
+            self.root.after_cancel(state["job"])
+        state["job"] = self.root.after(self.PICKER_DELAY_MS, self._refresh_picker, name)
+
+    def _refresh_picker(self, name):
+        """Busca as opções do combo pelo texto atual (texto vazio: a primeira página em ordem de nome)."""
+        state = self.pickers[name]
+        state["job"] = None
+        combo = state["combo"]
+        term = combo.get()
+        # A opção já escolhida continua valendo, mesmo que a nova busca não a traga
+        selected = state["map"].get(term)
+        page = state["search_page"]("" if term in state["fixed"] or selected is not None else term)
+        options = self._unique_labels([state["entity_label"](item) for item in page.items])
+        state["map"] = {term: selected, **options} if selected is not None else options
+        combo["values"] = list(state["fixed"]) + list(state["map"])
+
+    def _picker_value(self, name):
+        """Id da opção escolhida no combo, ou None se o texto não é uma das opções."""
+        state = self.pickers[name]
+        return state["map"].get(state["combo"].get())
 
     def create_client_tab(self, parent_frame):
         # --- Estilos com ttk (TEMA VERDE PROFISSIONAL) ---
@@ -221,7 +332,8 @@ class Application:
         self.client_list = ttk.Treeview(frame_tabela, columns=colunas, show="headings")
         scrollbar_y = ttk.Scrollbar(frame_tabela, orient="vertical", command=self.client_list.yview)
         scrollbar_x = ttk.Scrollbar(frame_tabela, orient="horizontal", command=self.client_list.xview)
-        self.client_list.configure(yscrollcommand=scrollbar_y.set, xscrollcommand=scrollbar_x.set)
+        self.client_list.configure(yscrollcommand=lambda first, last: self._on_list_scroll("client", scrollbar_y, first, last),
+                                   xscrollcommand=scrollbar_x.set)
         scrollbar_y.pack(side="right", fill="y")
         scrollbar_x.pack(side="bottom", fill="x")
         self.client_list.pack(side="left", fill="both", expand=True)
@@ -375,7 +487,8 @@ class Application:
         # Scrollbars
         scrollbar_y = ttk.Scrollbar(frame_tabela, orient="vertical", command=self.user_list.yview)
         scrollbar_x = ttk.Scrollbar(frame_tabela, orient="horizontal", command=self.user_list.xview)
-        self.user_list.configure(yscrollcommand=scrollbar_y.set, xscrollcommand=scrollbar_x.set)
+        self.user_list.configure(yscrollcommand=lambda first, last: self._on_list_scroll("user", scrollbar_y, first, last),
+                                   xscrollcommand=scrollbar_x.set)
         scrollbar_y.pack(side="right", fill="y")
         scrollbar_x.pack(side="bottom", fill="x")
         self.user_list.pack(side="left", fill="both", expand=True)
@@ -504,7 +617,8 @@ class Application:
         # Scrollbars
         scrollbar_y = ttk.Scrollbar(frame_tabela, orient="vertical", command=self.supplier_list.yview)
         scrollbar_x = ttk.Scrollbar(frame_tabela, orient="horizontal", command=self.supplier_list.xview)
-        self.supplier_list.configure(yscrollcommand=scrollbar_y.set, xscrollcommand=scrollbar_x.set)
+        self.supplier_list.configure(yscrollcommand=lambda first, last: self._on_list_scroll("supplier", scrollbar_y, first, last),
+                                   xscrollcommand=scrollbar_x.set)
         scrollbar_y.pack(side="right", fill="y")
         scrollbar_x.pack(side="bottom", fill="x")
         self.supplier_list.pack(side="left", fill="both", expand=True)
@@ -624,7 +738,8 @@ class Application:
         # Scrollbars
         scrollbar_y = ttk.Scrollbar(frame_tabela, orient="vertical", command=self.product_list.yview)
         scrollbar_x = ttk.Scrollbar(frame_tabela, orient="horizontal", command=self.product_list.xview)
-        self.product_list.configure(yscrollcommand=scrollbar_y.set, xscrollcommand=scrollbar_x.set)
+        self.product_list.configure(yscrollcommand=lambda first, last: self._on_list_scroll("product", scrollbar_y, first, last),
+                                   xscrollcommand=scrollbar_x.set)
         scrollbar_y.pack(side="right", fill="y")
         scrollbar_x.pack(side="bottom", fill="x")
         self.product_list.pack(side="left", fill="both", expand=True)
@@ -645,9 +760,9 @@ class Application:
 
         self.product_list.bind("<Double-1>", self.on_double_click_product)
 
-        # Popula a lista e o combobox de fornecedores
+        # Popula o combobox de fornecedores (e o mapa id <-> nome usado pela lista) e a lista
+        self.populate_supplier_combobox()
         self.populate_product_list()
-        # self.populate_supplier_combobox() # Você precisará criar esta função para carregar os fornecedores no ComboBox
 
 
     def create_sale_tab(self, parent_frame):
@@ -690,8 +805,11 @@ class Application:
         frame_venda_info.pack(side="top", fill="x", pady=(0, 5))
 
         ttk.Label(frame_venda_info, text="Cliente:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
-        self.sale_client_combo = ttk.Combobox(frame_venda_info, state="readonly", width=40)
+        self.sale_client_combo = ttk.Combobox(frame_venda_info, width=40)
         self.sale_client_combo.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
+        self._setup_picker("sale_client", self.sale_client_combo,
+                           lambda term: self.client_manager.search_clients_page(term, self.PICKER_PAGE_SIZE),
+                           lambda client: (client.id_cliente, client.nome_cliente))
         ttk.Label(frame_venda_info, text="Data da Venda:").grid(row=0, column=2, padx=(20, 5), pady=5, sticky="w")
         data_hoje = datetime.now().strftime("%d/%m/%Y")
         ttk.Label(frame_venda_info, text=data_hoje, font=("Segoe UI", 10, "bold")).grid(row=0, column=3, padx=5, pady=5,
@@ -703,8 +821,11 @@ class Application:
         frame_adicionar_item.pack(side="top", fill="x", pady=5)
 
         ttk.Label(frame_adicionar_item, text="Produto:").pack(side="left", padx=(0, 5))
-        self.sale_product_combo = ttk.Combobox(frame_adicionar_item, state="readonly", width=40)
+        self.sale_product_combo = ttk.Combobox(frame_adicionar_item, width=40)
         self.sale_product_combo.pack(side="left", padx=5)
+        self._setup_picker("sale_product", self.sale_product_combo,
+                           lambda term: self.product_manager.search_products_page(term, self.PICKER_PAGE_SIZE),
+                           lambda product: (product.id_produto, product.nome))
         ttk.Label(frame_adicionar_item, text="Qtd:").pack(side="left", padx=(15, 5))
         self.sale_quantidade_entry = ttk.Entry(frame_adicionar_item, width=8)
         self.sale_quantidade_entry.pack(side="left", padx=5)
@@ -721,21 +842,21 @@ class Application:
         frame_finalizacao.columnconfigure(3, weight=1)
         frame_finalizacao.columnconfigure(4, weight=2)
         ttk.Label(frame_finalizacao, text="Subtotal (R$):").grid(row=0, column=0, padx=5, pady=3, sticky="w")
-        self.sale_subtotal_label = ttk.Label(frame_finalizacao, text="0.00", font=("Segoe UI", 10, "bold"))
+        self.sale_subtotal_label = ttk.Label(frame_finalizacao, text="0,00", font=("Segoe UI", 10, "bold"))
         self.sale_subtotal_label.grid(row=0, column=1, padx=5, pady=3, sticky="w")
         ttk.Label(frame_finalizacao, text="Desconto (R$):").grid(row=1, column=0, padx=5, pady=3, sticky="w")
         self.sale_desconto_entry = ttk.Entry(frame_finalizacao, width=12)
         self.sale_desconto_entry.grid(row=1, column=1, padx=5, pady=3, sticky="w")
-        self.sale_desconto_entry.insert(0, "0.00")
+        self.sale_desconto_entry.insert(0, "0,00")
         ttk.Label(frame_finalizacao, text="Valor Pago (R$):").grid(row=2, column=0, padx=5, pady=3, sticky="w")
         self.sale_valor_pago_entry = ttk.Entry(frame_finalizacao, width=12)
         self.sale_valor_pago_entry.grid(row=2, column=1, padx=5, pady=3, sticky="w")
-        self.sale_valor_pago_entry.insert(0, "0.00")
+        self.sale_valor_pago_entry.insert(0, "0,00")
         ttk.Label(frame_finalizacao, text="VALOR TOTAL:").grid(row=0, column=2, padx=(20, 5), pady=3, sticky="w")
-        self.sale_total_label = ttk.Label(frame_finalizacao, text="R$ 0.00", style="Total.TLabel")
+        self.sale_total_label = ttk.Label(frame_finalizacao, text="R$ 0,00", style="Total.TLabel")
         self.sale_total_label.grid(row=0, column=3, padx=5, pady=3, sticky="w")
         ttk.Label(frame_finalizacao, text="TROCO:").grid(row=1, column=2, padx=(20, 5), pady=3, sticky="w")
-        self.sale_troco_label = ttk.Label(frame_finalizacao, text="R$ 0.00", style="Troco.TLabel")
+        self.sale_troco_label = ttk.Label(frame_finalizacao, text="R$ 0,00", style="Troco.TLabel")
         self.sale_troco_label.grid(row=1, column=3, padx=5, pady=3, sticky="w")
         frame_botoes_finais = ttk.Frame(frame_finalizacao)
         frame_botoes_finais.grid(row=0, column=4, rowspan=3, sticky="e", padx=(20, 0))
@@ -767,20 +888,186 @@ class Application:
         self.sale_items_list.column("quantidade", width=80, anchor="center")
         self.sale_items_list.column("preco_unit", width=120, anchor="e")
         self.sale_items_list.column("subtotal", width=120, anchor="e")
+    def create_sales_history_tab(self, parent_frame):
+        """
+        Cria a aba de Histórico de Vendas: totais por dia, vendedor ou cliente num período,
+        lidos da tabela de totais diários (vendas_diarias), não das vendas uma a uma.
+        """
+        COR_DESTAQUE = "#2e8b57"
+        main_frame = ttk.Frame(parent_frame)
+        main_frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+        # --- Filtros ---
+        frame_filtros = ttk.LabelFrame(main_frame, text="Filtros", padding="10")
+        frame_filtros.pack(side="top", fill="x", pady=(0, 5))
+
+        hoje = datetime.now()
+        ttk.Label(frame_filtros, text="De:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
+        self.history_start_entry = DateEntry(frame_filtros, width=12, background=COR_DESTAQUE, foreground="white",
+                                             borderwidth=2, date_pattern='dd/mm/yyyy', font=("Segoe UI", 9))
+        self.history_start_entry.set_date(hoje.replace(day=1))
+        self.history_start_entry.grid(row=0, column=1, padx=5, pady=5, sticky="w")
+        ttk.Label(frame_filtros, text="Até:").grid(row=0, column=2, padx=5, pady=5, sticky="w")
+        self.history_end_entry = DateEntry(frame_filtros, width=12, background=COR_DESTAQUE, foreground="white",
+                                           borderwidth=2, date_pattern='dd/mm/yyyy', font=("Segoe UI", 9))
+        self.history_end_entry.set_date(hoje)
+        self.history_end_entry.grid(row=0, column=3, padx=5, pady=5, sticky="w")
+        ttk.Label(frame_filtros, text="Agrupar por:").grid(row=0, column=4, padx=(20, 5), pady=5, sticky="w")
+        self.history_group_combo = ttk.Combobox(frame_filtros, state="readonly", width=12,
+                                                values=list(self.HISTORY_GROUPS))
+        self.history_group_combo.set("Dia")
+        self.history_group_combo.grid(row=0, column=5, padx=5, pady=5, sticky="w")
+
+        ttk.Label(frame_filtros, text="Vendedor:").grid(row=1, column=0, padx=5, pady=5, sticky="w")
+        self.history_user_combo = ttk.Combobox(frame_filtros, width=30)
+        self.history_user_combo.grid(row=1, column=1, columnspan=3, padx=5, pady=5, sticky="ew")
+        self._setup_picker("history_user", self.history_user_combo,
+                           lambda term: self.user_manager.search_users_page(term, self.PICKER_PAGE_SIZE),
+                           lambda user: (user.id_usuario, user.nome_usuario), fixed=(self.FILTER_ALL,))
+        ttk.Label(frame_filtros, text="Cliente:").grid(row=1, column=4, padx=(20, 5), pady=5, sticky="w")
+        self.history_client_combo = ttk.Combobox(frame_filtros, width=30)
+        self.history_client_combo.grid(row=1, column=5, padx=5, pady=5, sticky="ew")
+        self._setup_picker("history_client", self.history_client_combo,
+                           lambda term: self.client_manager.search_clients_page(term, self.PICKER_PAGE_SIZE),
+                           lambda client: (client.id_cliente, client.nome_cliente), fixed=(self.FILTER_ALL,))
+
+        frame_botoes = ttk.Frame(frame_filtros)
+        frame_botoes.grid(row=0, column=6, rowspan=2, padx=(20, 0), sticky="e")
+        ttk.Button(frame_botoes, text="Consultar", command=self.show_sales_history).pack(pady=4, fill='x')
+        ttk.Button(frame_botoes, text="Recalcular Totais", command=self.rebuild_sales_history).pack(pady=4, fill='x')
+
+        # --- Totais do período ---
+        self.history_totals_label = ttk.Label(main_frame, text="", font=("Segoe UI", 11, "bold"))
+        self.history_totals_label.pack(side="bottom", fill="x", pady=(5, 0))
+
+        # --- Resultado ---
+        frame_lista = ttk.LabelFrame(main_frame, text="Histórico", padding="10")
+        frame_lista.pack(side="top", fill="both", expand=True)
+        colunas = ("chave", "vendas", "itens", "desconto", "total")
+        self.history_list = ttk.Treeview(frame_lista, columns=colunas, show="headings")
+        scrollbar_y = ttk.Scrollbar(frame_lista, orient="vertical", command=self.history_list.yview)
+        self.history_list.configure(yscrollcommand=scrollbar_y.set)
+        scrollbar_y.pack(side="right", fill="y")
+        self.history_list.pack(side="left", fill="both", expand=True)
+        self.history_list.heading("chave", text="Dia")
+        self.history_list.heading("vendas", text="Vendas")
+        self.history_list.heading("itens", text="Itens")
+        self.history_list.heading("desconto", text="Desconto (R$)")
+        self.history_list.heading("total", text="Total (R$)")
+        self.history_list.column("chave", width=250)
+        self.history_list.column("vendas", width=80, anchor="center")
+        self.history_list.column("itens", width=80, anchor="center")
+        self.history_list.column("desconto", width=120, anchor="e")
+        self.history_list.column("total", width=120, anchor="e")
+
+    def create_financial_tab(self, parent_frame):
+        """
+        Cria a aba do Financeiro (Contas a Pagar / a Receber): lançamento de entradas e
+        saídas, lista do período, saldo na data final e fechamento dos meses encerrados.
+        """
+        COR_DESTAQUE = "#2e8b57"
+        main_frame = ttk.Frame(parent_frame)
+        main_frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+        # --- Novo lançamento ---
+        frame_lancamento = ttk.LabelFrame(main_frame, text="Novo Lançamento", padding="10")
+        frame_lancamento.pack(side="top", fill="x", pady=(0, 5))
+        ttk.Label(frame_lancamento, text="Tipo:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
+        self.financial_tipo_combo = ttk.Combobox(frame_lancamento, state="readonly", width=10,
+                                                 values=list(self.FINANCIAL_TYPES))
+        self.financial_tipo_combo.set("Entrada")
+        self.financial_tipo_combo.grid(row=0, column=1, padx=5, pady=5, sticky="w")
+        ttk.Label(frame_lancamento, text="Descrição:").grid(row=0, column=2, padx=(20, 5), pady=5, sticky="w")
+        self.financial_descricao_entry = ttk.Entry(frame_lancamento, width=40)
+        self.financial_descricao_entry.grid(row=0, column=3, padx=5, pady=5, sticky="ew")
+        ttk.Label(frame_lancamento, text="Valor (R$):").grid(row=0, column=4, padx=(20, 5), pady=5, sticky="w")
+        self.financial_valor_entry = ttk.Entry(frame_lancamento, width=12)
+        self.financial_valor_entry.grid(row=0, column=5, padx=5, pady=5, sticky="w")
+        ttk.Label(frame_lancamento, text="Data:").grid(row=0, column=6, padx=(20, 5), pady=5, sticky="w")
+        self.financial_data_entry = DateEntry(frame_lancamento, width=12, background=COR_DESTAQUE, foreground="white",
+                                              borderwidth=2, date_pattern='dd/mm/yyyy', font=("Segoe UI", 9))
+        self.financial_data_entry.grid(row=0, column=7, padx=5, pady=5, sticky="w")
+        ttk.Button(frame_lancamento, text="Lançar", command=self.add_financial_entry).grid(row=0, column=8,
+                                                                                          padx=(20, 5), pady=5)
+
+        # --- Filtros ---
+        frame_filtros = ttk.LabelFrame(main_frame, text="Lançamentos", padding="10")
+        frame_filtros.pack(side="top", fill="x", pady=5)
+        hoje = datetime.now()
+        ttk.Label(frame_filtros, text="De:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
+        self.financial_start_entry = DateEntry(frame_filtros, width=12, background=COR_DESTAQUE, foreground="white",
+                                               borderwidth=2, date_pattern='dd/mm/yyyy', font=("Segoe UI", 9))
+        self.financial_start_entry.set_date(hoje.replace(day=1))
+        self.financial_start_entry.grid(row=0, column=1, padx=5, pady=5, sticky="w")
+        ttk.Label(frame_filtros, text="Até:").grid(row=0, column=2, padx=5, pady=5, sticky="w")
+        self.financial_end_entry = DateEntry(frame_filtros, width=12, background=COR_DESTAQUE, foreground="white",
+                                             borderwidth=2, date_pattern='dd/mm/yyyy', font=("Segoe UI", 9))
+        self.financial_end_entry.set_date(hoje)
+        self.financial_end_entry.grid(row=0, column=3, padx=5, pady=5, sticky="w")
+        ttk.Label(frame_filtros, text="Tipo:").grid(row=0, column=4, padx=(20, 5), pady=5, sticky="w")
+        self.financial_filter_combo = ttk.Combobox(frame_filtros, state="readonly", width=10,
+                                                   values=[self.FILTER_ALL] + list(self.FINANCIAL_TYPES))
+        self.financial_filter_combo.set(self.FILTER_ALL)
+        self.financial_filter_combo.grid(row=0, column=5, padx=5, pady=5, sticky="w")
+        ttk.Button(frame_filtros, text="Consultar", command=self.show_financial_entries).grid(row=0, column=6,
+                                                                                             padx=(20, 5), pady=5)
+        ttk.Button(frame_filtros, text="Fechar Meses Encerrados",
+                   command=self.close_financial_periods).grid(row=0, column=7, padx=5, pady=5)
+
+        # --- Saldo ---
+        self.financial_balance_label = ttk.Label(main_frame, text="", font=("Segoe UI", 11, "bold"))
+        self.financial_balance_label.pack(side="bottom", fill="x", pady=(5, 0))
+
+        # --- Lista ---
+        frame_lista = ttk.Frame(main_frame)
+        frame_lista.pack(side="top", fill="both", expand=True)
+        colunas = ("id", "data", "tipo", "descricao", "valor")
+        self.financial_list = ttk.Treeview(frame_lista, columns=colunas, show="headings")
+        scrollbar_y = ttk.Scrollbar(frame_lista, orient="vertical", command=self.financial_list.yview)
+        self.financial_list.configure(yscrollcommand=scrollbar_y.set)
+        scrollbar_y.pack(side="right", fill="y")
+        self.financial_list.pack(side="left", fill="both", expand=True)
+        self.financial_list.heading("id", text="ID")
+        self.financial_list.heading("data", text="Data")
+        self.financial_list.heading("tipo", text="Tipo")
+        self.financial_list.heading("descricao", text="Descrição")
+        self.financial_list.heading("valor", text="Valor (R$)")
+        self.financial_list.column("id", width=60, anchor="center")
+        self.financial_list.column("data", width=140, anchor="center")
+        self.financial_list.column("tipo", width=80, anchor="center")
+        self.financial_list.column("descricao", width=300)
+        self.financial_list.column("valor", width=120, anchor="e")
+
+    def _refresh_supplier_map(self):
+        """
+        Recarrega o mapa id <-> nome dos fornecedores (o SupplierManager o mantém em cache
+        até algum fornecedor mudar). Nomes repetidos ganham o id para não se confundirem.
+        """
+        names = self.supplier_manager.get_supplier_names()
+        counts = {}
+        for nome in names.values():
+            counts[nome] = counts.get(nome, 0) + 1
+        self.supplier_labels = {supplier_id: nome if counts[nome] == 1 else f"{nome} (#{supplier_id})"
+                                for supplier_id, nome in names.items()}
+        self.supplier_map = {label: supplier_id for supplier_id, label in self.supplier_labels.items()}
+
     def populate_supplier_combobox(self):
-        suppliers = self.supplier_manager.get_all_suppliers()
-        supplier_names = [s.nome for s in suppliers]
-        self.product_fornecedor_combo["values"] = supplier_names
+        self._refresh_supplier_map()
+        self.product_fornecedor_combo["values"] = list(self.supplier_map)
+
+    @staticmethod
+    def _unique_labels(pairs):
+        """{texto: id} a partir de pares (id, nome); nomes repetidos ganham o id, como no combo de fornecedores."""
+        counts = {}
+        for _, nome in pairs:
+            counts[nome] = counts.get(nome, 0) + 1
+        return {nome if counts[nome] == 1 else f"{nome} (#{entity_id})": entity_id for entity_id, nome in pairs}
 
     def populate_client_combobox(self):
-        clients = self.client_manager.get_all_clients()
-        client_names = [c.nome_cliente for c in clients]
-        self.sale_client_combo["values"] = client_names
+        self._refresh_picker("sale_client")
 
     def populate_product_combobox(self):
-        products = self.product_manager.get_all_products()
-        product_names = [p.nome_produto for p in products]
-        self.sale_product_combo["values"] = product_names
+        self._refresh_picker("sale_product")
 
     # --- Client Methods ---
     def add_client(self):
@@ -805,6 +1092,10 @@ class Application:
                 GUIComponents.show_error("Erro", "Formato de data de nascimento inválido. Use MM/DD/AA.")
                 return
 
+            if self.client_manager.get_client_by_cpf(cpf):
+                GUIComponents.show_error("Erro", "Já existe um cliente cadastrado com este CPF.")
+                return
+
             client = Client(id_cliente=None, nome_cliente=nome, cpf_cliente=cpf, email_cliente=email, telefone_cliente=telefone, data_nascimento=nascimento, rua=rua, cep=cep, bairro=bairro, cidade=cidade)
             self.client_manager.add_client(client)
             GUIComponents.show_info("Sucesso", "Cliente adicionado com sucesso!")
@@ -840,7 +1131,13 @@ class Application:
                 GUIComponents.show_error("Erro", "Formato de data de nascimento inválido. Use DD/MM/AA.")
                 return
 
-            client = Client(id_cliente=int(client_id), nome_cliente=nome, cpf_cliente=cpf, email_cliente=email, telefone_cliente=telefone, data_nascimento=nascimento, rua=rua, cep=cep, bairro=bairro, cidade=cidade)
+            current = self.client_manager.get_client_by_id(int(client_id))
+            if current is None:
+                GUIComponents.show_error("Erro", "Cliente não encontrado.")
+                return
+            # edit() parte do cliente lido: o manager grava só os campos que mudaram
+            client = edit(current, nome_cliente=nome, cpf_cliente=cpf, email_cliente=email, telefone_cliente=telefone,
+                          data_nascimento=nascimento, rua=rua, cep=cep, bairro=bairro, cidade=cidade)
             self.client_manager.update_client(client)
             GUIComponents.show_info("Sucesso", "Cliente alterado com sucesso!")
             self.clear_client_entries()
@@ -864,8 +1161,9 @@ class Application:
     def search_client(self):
         try:
             search_term = self.client_search_entry.get()
-            clients = self.client_manager.search_client(search_term)
-            self.populate_client_list(clients)
+            self._show_paged_list("client", self.client_list,
+                                  lambda cursor: self.client_manager.search_clients_page(search_term, cursor=cursor),
+                                  self._client_row_values)
         except Exception as e:
             GUIComponents.show_error("Erro", f"Erro ao buscar cliente: {e}")
 
@@ -883,13 +1181,21 @@ class Application:
         self.client_bairro_entry.delete(0, END)
         self.client_cidade_entry.delete(0, END)
 
+    @staticmethod
+    def _client_row_values(client):
+        return (client.id_cliente, client.nome_cliente, client.cpf_cliente, client.email_cliente, client.telefone_cliente, client.data_nascimento, client.rua, client.cep, client.bairro, client.cidade)
+
     def populate_client_list(self, clients=None):
-        for i in self.client_list.get_children():
-            self.client_list.delete(i)
         if clients is None:
-            clients = self.client_manager.get_all_clients()
+            # Carrega só a primeira página; o restante vem sob demanda ao rolar a lista
+            self._show_paged_list("client", self.client_list,
+                                  lambda cursor: self.client_manager.get_clients_page(cursor=cursor),
+                                  self._client_row_values)
+            return
+        self.paged_lists.pop("client", None)
+        self.client_list.delete(*self.client_list.get_children())
         for client in clients:
-            self.client_list.insert("", "end", values=(client.id_cliente, client.nome_cliente, client.cpf_cliente, client.email_cliente, client.telefone_cliente, client.data_nascimento, client.rua, client.cep, client.bairro, client.cidade))
+            self.client_list.insert("", "end", values=self._client_row_values(client))
 
     def on_double_click_client(self, event):
         selected_item = self.client_list.focus()
@@ -940,6 +1246,10 @@ class Application:
                 GUIComponents.show_error("Erro", "Formato de data de nascimento inválido. Use MM/DD/AA.")
                 return
 
+            if self.user_manager.get_user_by_email(email):
+                GUIComponents.show_error("Erro", "Já existe um usuário cadastrado com este e-mail.")
+                return
+
             user = User(id_usuario=None, nome_usuario=nome, cpf_usuario=cpf, email_usuario=email, telefone_usuario=telefone, data_nascimento=nascimento, rua=rua, cep=cep, bairro=bairro, cidade=cidade, senha=senha, tipo=tipo, permissao=permissao)
             self.user_manager.add_user(user)
             GUIComponents.show_info("Sucesso", "Usuário adicionado com sucesso!")
@@ -985,11 +1295,16 @@ class Application:
                     GUIComponents.show_error("Erro", "Formato de data de nascimento inválido. Use DD/MM/AAAA.")
                     return
 
-            user = User(id_usuario=int(user_id), nome_usuario=nome, cpf_usuario=cpf, email_usuario=email,
+            current = self.user_manager.get_user_by_id(int(user_id))
+            if current is None:
+                GUIComponents.show_error("Erro", "Usuário não encontrado.")
+                return
+            # edit() parte do usuário lido: o manager grava só os campos que mudaram
+            # (senha em branco mantém a atual)
+            user = edit(current, nome_usuario=nome, cpf_usuario=cpf, email_usuario=email,
                         telefone_usuario=telefone, data_nascimento=nascimento, rua=rua, cep=cep,
                         bairro=bairro, cidade=cidade, senha=senha, tipo=tipo, permissao=permissao)
 
-            # Chama o manager, que AGORA vamos corrigir
             self.user_manager.update_user(user)
 
             GUIComponents.show_info("Sucesso", "Usuário alterado com sucesso!")
@@ -1015,8 +1330,9 @@ class Application:
     def search_user(self):
         try:
             search_term = self.user_nome_entry.get()
-            users = self.user_manager.search_users(search_term)
-            self.populate_user_list(users)
+            self._show_paged_list("user", self.user_list,
+                                  lambda cursor: self.user_manager.search_users_page(search_term, cursor=cursor),
+                                  self._user_row_values)
         except Exception as e:
             GUIComponents.show_error("Erro", f"Erro ao buscar usuário: {e}")
 
@@ -1037,13 +1353,21 @@ class Application:
         self.user_tipo_combo.set("")
         self.user_permissao_combo.set("")
 
+    @staticmethod
+    def _user_row_values(user):
+        return (user.id_usuario, user.nome_usuario, user.cpf_usuario, user.email_usuario, user.telefone_usuario, user.data_nascimento, user.rua, user.cep, user.bairro, user.cidade, user.tipo, user.permissao)
+
     def populate_user_list(self, users=None):
-        for i in self.user_list.get_children():
-            self.user_list.delete(i)
         if users is None:
-            users = self.user_manager.get_all_users()
+            # Carrega só a primeira página; o restante vem sob demanda ao rolar a lista
+            self._show_paged_list("user", self.user_list,
+                                  lambda cursor: self.user_manager.get_users_page(cursor=cursor),
+                                  self._user_row_values)
+            return
+        self.paged_lists.pop("user", None)
+        self.user_list.delete(*self.user_list.get_children())
         for user in users:
-            self.user_list.insert("", "end", values=(user.id_usuario, user.nome_usuario, user.cpf_usuario, user.email_usuario, user.telefone_usuario, user.data_nascimento, user.rua, user.cep, user.bairro, user.cidade, user.tipo, user.permissao))
+            self.user_list.insert("", "end", values=self._user_row_values(user))
 
     def on_double_click_user(self, event):
         selected_item = self.user_list.focus()
@@ -1086,6 +1410,10 @@ class Application:
                 GUIComponents.show_error("Erro", "Todos os campos são obrigatórios.")
                 return
 
+            if self.supplier_manager.get_supplier_by_cnpj(cnpj):
+                GUIComponents.show_error("Erro", "Já existe um fornecedor cadastrado com este CNPJ.")
+                return
+
             supplier = Supplier(id_fornecedor=None, nome=razao_social, cnpj=cnpj, email=email, telefone=telefone, rua=rua, cep=cep, bairro=bairro, cidade=cidade)
             self.supplier_manager.add_supplier(supplier)
             GUIComponents.show_info("Sucesso", "Fornecedor adicionado com sucesso!")
@@ -1114,7 +1442,13 @@ class Application:
                 GUIComponents.show_error("Erro", "Todos os campos são obrigatórios.")
                 return
 
-            supplier = Supplier(id_fornecedor=int(supplier_id), nome=razao_social, cnpj=cnpj, email=email, telefone=telefone, rua=rua, cep=cep, bairro=bairro, cidade=cidade)
+            current = self.supplier_manager.get_supplier_by_id(int(supplier_id))
+            if current is None:
+                GUIComponents.show_error("Erro", "Fornecedor não encontrado.")
+                return
+            # edit() parte do fornecedor lido: o manager grava só os campos que mudaram
+            supplier = edit(current, nome=razao_social, cnpj=cnpj, email=email, telefone=telefone, rua=rua, cep=cep,
+                            bairro=bairro, cidade=cidade)
             self.supplier_manager.update_supplier(supplier)
             GUIComponents.show_info("Sucesso", "Fornecedor alterado com sucesso!")
             self.clear_supplier_entries()
@@ -1138,8 +1472,9 @@ class Application:
     def search_supplier(self):
         try:
             search_term = self.supplier_nome_fantasia_entry.get()
-            suppliers = self.supplier_manager.search_suppliers(search_term)
-            self.populate_supplier_list(suppliers)
+            self._show_paged_list("supplier", self.supplier_list,
+                                  lambda cursor: self.supplier_manager.search_suppliers_page(search_term, cursor=cursor),
+                                  self._supplier_row_values)
         except Exception as e:
             GUIComponents.show_error("Erro", f"Erro ao buscar fornecedor: {e}")
 
@@ -1156,13 +1491,21 @@ class Application:
         self.supplier_bairro_entry.delete(0, END)
         self.supplier_cidade_entry.delete(0, END)
 
+    @staticmethod
+    def _supplier_row_values(supplier):
+        return (supplier.id_fornecedor, supplier.nome, supplier.cnpj, supplier.email, supplier.telefone, supplier.rua, supplier.cep, supplier.bairro, supplier.cidade)
+
     def populate_supplier_list(self, suppliers=None):
-        for i in self.supplier_list.get_children():
-            self.supplier_list.delete(i)
         if suppliers is None:
-            suppliers = self.supplier_manager.get_all_suppliers()
+            # Carrega só a primeira página; o restante vem sob demanda ao rolar a lista
+            self._show_paged_list("supplier", self.supplier_list,
+                                  lambda cursor: self.supplier_manager.get_suppliers_page(cursor=cursor),
+                                  self._supplier_row_values)
+            return
+        self.paged_lists.pop("supplier", None)
+        self.supplier_list.delete(*self.supplier_list.get_children())
         for supplier in suppliers:
-            self.supplier_list.insert("", "end", values=(supplier.id_fornecedor, supplier.nome, supplier.cnpj, supplier.email, supplier.telefone, supplier.rua, supplier.cep, supplier.bairro, supplier.cidade))
+            self.supplier_list.insert("", "end", values=self._supplier_row_values(supplier))
 
     def on_double_click_supplier(self, event):
         selected_item = self.supplier_list.focus()
@@ -1200,20 +1543,14 @@ class Application:
                 return
 
             try:
-                preco = float(preco_str)
+                preco = Money.parse(preco_str)
                 estoque = int(estoque_str)
             except ValueError:
                 GUIComponents.show_error("Erro", "Preço e Estoque devem ser números válidos.")
                 return
 
-            fornecedor = self.supplier_manager.search_supplier(nome)
-            if not fornecedor:
-                GUIComponents.show_error("Erro", "Fornecedor não encontrado.")
-                return
-            fornecedor_id = fornecedor[0].id # Assuming unique name for simplicity
-
-            product = Product(id_produto=None, nome=nome, descricao=descricao, preco=preco, estoque=estoque, fornecedor_id=fornecedor_id)
-            self.product_manager.add_product(product)
+            product = Product(id_produto=None, nome=nome, descricao=descricao, preco_venda=preco, fornecedor_id=fornecedor_id)
+            self.product_manager.add_product(product, initial_stock=estoque)
             GUIComponents.show_info("Sucesso", "Produto adicionado com sucesso!")
             self.clear_product_entries()
             self.populate_product_list()
@@ -1238,20 +1575,29 @@ class Application:
                 return
 
             try:
-                preco = float(preco_str)
+                preco = Money.parse(preco_str)
                 estoque = int(estoque_str)
             except ValueError:
                 GUIComponents.show_error("Erro", "Preço e Estoque devem ser números válidos.")
                 return
 
-            fornecedor = self.supplier_manager.search_suppliers(fornecedor_nome)
-            if not fornecedor:
-                GUIComponents.show_error("Erro", "Fornecedor não encontrado.")
+            fornecedor_id = self.supplier_map.get(fornecedor_nome)
+            if fornecedor_id is None:
+                GUIComponents.show_error("Erro", f"Fornecedor '{fornecedor_nome}' não encontrado ou inválido.")
                 return
-            fornecedor_id = fornecedor[0].id
 
-            product = Product(id=int(product_id), nome=nome, descricao=descricao, preco=preco, estoque=estoque, fornecedor_id=fornecedor_id)
-            self.product_manager.update_product(product)
+            current = self.product_manager.get_product_by_id(int(product_id))
+            if current is None:
+                GUIComponents.show_error("Erro", "Produto não encontrado.")
+                return
+            # edit() parte do produto lido: o manager grava só os campos que mudaram
+            product = edit(current, nome=nome, descricao=descricao, preco_venda=preco, fornecedor_id=fornecedor_id)
+            with self.db_manager.transaction():
+                self.product_manager.update_product(product)
+                # O campo mostra a quantidade total: se foi alterada, é um ajuste de estoque
+                if estoque != current.stock_quantity:
+                    self.product_manager.adjust_stock(current.id_produto, estoque, "Alteração no cadastro",
+                                                      self.logged_in_user.id_usuario)
             GUIComponents.show_info("Sucesso", "Produto alterado com sucesso!")
             self.clear_product_entries()
             self.populate_product_list()
@@ -1274,8 +1620,9 @@ class Application:
     def search_product(self):
         try:
             search_term = self.product_nome_entry.get()
-            products = self.product_manager.search_products(search_term)
-            self.populate_product_list(products)
+            self._show_paged_list("product", self.product_list,
+                                  lambda cursor: self.product_manager.search_products_page(search_term, cursor=cursor),
+                                  self._product_row_values)
         except Exception as e:
             GUIComponents.show_error("Erro", f"Erro ao buscar produto: {e}")
 
@@ -1289,42 +1636,248 @@ class Application:
         self.product_estoque_entry.delete(0, END)
         self.product_fornecedor_combo.set("")
 
+    def _product_row_values(self, product):
+        # O nome do fornecedor já vem na listagem (JOIN); o mapa só desambigua nomes repetidos
+        supplier_name = self.supplier_labels.get(product.fornecedor_id, product.fornecedor_nome)
+        return (product.id_produto, product.nome, format_money(product.preco_venda), product.stock_quantity,
+                supplier_name)
+
     def populate_product_list(self, products=None):
-        for i in self.product_list.get_children():
-            self.product_list.delete(i)
         if products is None:
-            products = self.product_manager.get_all_products()
+            # Carrega só a primeira página; o restante vem sob demanda ao rolar a lista
+            self._show_paged_list("product", self.product_list,
+                                  lambda cursor: self.product_manager.get_products_page(cursor=cursor),
+                                  self._product_row_values)
+            return
+        self.paged_lists.pop("product", None)
+        self.product_list.delete(*self.product_list.get_children())
         for product in products:
-            # Get supplier name for display
-            supplier_name = ""
-            if product.fornecedor_id:
-                supplier = self.supplier_manager.get_supplier_by_id(product.fornecedor_id)
-                if supplier:
-                    supplier_name = supplier.nome_fantasia
-            self.product_list.insert("", "end", values=(product.id, product.nome, product.descricao, product.preco, product.estoque, supplier_name))
+            self.product_list.insert("", "end", values=self._product_row_values(product))
 
     def on_double_click_product(self, event):
         selected_item = self.product_list.focus()
         if selected_item:
             values = self.product_list.item(selected_item, "values")
+            # A tabela não mostra a descrição: busca o produto (normalmente já no cache)
+            product = self.product_manager.get_product_by_id(int(values[0]))
+            if product is None:
+                return
             self.clear_product_entries()
             self.product_codigo_entry.config(state="normal")
-            self.product_codigo_entry.insert(0, values[0])
+            self.product_codigo_entry.insert(0, product.id_produto)
             self.product_codigo_entry.config(state="readonly")
-            self.product_nome_entry.insert(0, values[1])
-            self.product_descricao_entry.insert(0, values[2])
-            self.product_preco_entry.insert(0, values[3])
-            self.product_estoque_entry.insert(0, values[4])
-            self.product_fornecedor_combo.set(values[5])
+            self.product_nome_entry.insert(0, product.nome)
+            self.product_descricao_entry.insert(0, product.descricao or "")
+            self.product_preco_entry.insert(0, format_money(product.preco_venda))
+            self.product_estoque_entry.insert(0, product.stock_quantity)
+            self.product_fornecedor_combo.set(values[4])
+
+    # --- Sales History Methods ---
+    def populate_history_filters(self):
+        for name in ("history_user", "history_client"):
+            combo = self.pickers[name]["combo"]
+            if not combo.get():
+                combo.set(self.FILTER_ALL)
+            self._refresh_picker(name)
+
+    def show_sales_history(self):
+        start = self.history_start_entry.get_date().isoformat()
+        end = self.history_end_entry.get_date().isoformat()
+        if start > end:
+            GUIComponents.show_error("Erro", "A data inicial é posterior à final.")
+            return
+        group_label = self.history_group_combo.get()
+        # Vendedor e cliente: "Todos" (ou vazio) não filtra; outro texto precisa ser uma opção da lista
+        filters = []
+        for name, rotulo in (("history_user", "vendedor"), ("history_client", "cliente")):
+            if self.pickers[name]["combo"].get() in ("", self.FILTER_ALL):
+                filters.append(None)
+                continue
+            entity_id = self._picker_value(name)
+            if entity_id is None:
+                GUIComponents.show_error("Erro", f"Escolha um {rotulo} da lista ou \"{self.FILTER_ALL}\".")
+                return
+            filters.append(entity_id)
+        try:
+            rows = self.sale_manager.get_sales_history(start, end, self.HISTORY_GROUPS[group_label], *filters)
+        except Exception as e:
+            GUIComponents.show_error("Erro", f"Erro ao consultar o histórico de vendas: {e}")
+            return
+
+        self.history_list.heading("chave", text=group_label)
+        for item in self.history_list.get_children():
+            self.history_list.delete(item)
+        for row in rows:
+            chave = datetime.strptime(row.chave, "%Y-%m-%d").strftime("%d/%m/%Y") if group_label == "Dia" else row.chave
+            self.history_list.insert("", "end", values=(chave, row.vendas, row.itens, format_money(row.desconto),
+                                                        format_money(row.total)))
+        vendas = sum(row.vendas for row in rows)
+        total = sum((Money(row.total) for row in rows), Money(0))
+        self.history_totals_label.config(text=f"{vendas} venda(s) no período, total {total.format(symbol=True)}")
+
+    def rebuild_sales_history(self):
+        if not GUIComponents.ask_yes_no("Histórico", "Recalcular os totais de todas as vendas gravadas?"):
+            return
+        try:
+            linhas = self.sale_manager.rebuild_sales_history()
+        except Exception as e:
+            GUIComponents.show_error("Erro", f"Erro ao recalcular os totais: {e}")
+            return
+        GUIComponents.show_info("Histórico", f"Totais recalculados ({linhas} linhas).")
+        self.show_sales_history()
+
+    # --- Financial Methods ---
+    def show_financial(self, tipo_label):
+        """Abre o Financeiro já filtrado em entradas (a receber) ou saídas (a pagar)."""
+        self.financial_tipo_combo.set(tipo_label)
+        self.financial_filter_combo.set(tipo_label)
+        self.show_frame("financial")
+
+    def add_financial_entry(self):
+        descricao = self.financial_descricao_entry.get().strip()
+        if not descricao:
+            GUIComponents.show_error("Erro", "Informe a descrição do lançamento.")
+            return
+        try:
+            valor = Money.parse(self.financial_valor_entry.get())
+        except ValueError:
+            GUIComponents.show_error("Erro", "Valor inválido.")
+            return
+        data = self.financial_data_entry.get_date()
+        # Lançamento do dia leva a hora atual; de outro dia, o início do dia
+        data = datetime.now() if data == datetime.now().date() else datetime(data.year, data.month, data.day)
+        try:
+            self.financial_manager.post_entry(self.FINANCIAL_TYPES[self.financial_tipo_combo.get()], valor,
+                                              descricao, data.strftime("%Y-%m-%d %H:%M:%S"))
+        except ValueError as e:
+            GUIComponents.show_error("Erro", str(e))
+            return
+        except Exception as e:
+            GUIComponents.show_error("Erro", f"Erro ao gravar o lançamento: {e}")
+            return
+        GUIComponents.clear_entries(self.financial_descricao_entry, self.financial_valor_entry)
+        self.show_financial_entries()
+
+    def show_financial_entries(self):
+        start = self.financial_start_entry.get_date().isoformat()
+        end = self.financial_end_entry.get_date().isoformat()
+        if start > end:
+            GUIComponents.show_error("Erro", "A data inicial é posterior à final.")
+            return
+        tipo = self.FINANCIAL_TYPES.get(self.financial_filter_combo.get())
+        try:
+            entries = self.financial_manager.get_entries(start, end, tipo)
+            saldo = self.financial_manager.get_balance(end)
+        except Exception as e:
+            GUIComponents.show_error("Erro", f"Erro ao consultar o financeiro: {e}")
+            return
+
+        for item in self.financial_list.get_children():
+            self.financial_list.delete(item)
+        entradas = saidas = Money(0)
+        for entry in entries:
+            if entry.tipo == 'entrada':
+                entradas += entry.valor
+            else:
+                saidas += entry.valor
+            data = datetime.strptime(entry.data, "%Y-%m-%d %H:%M:%S").strftime("%d/%m/%Y %H:%M")
+            self.financial_list.insert("", "end", values=(entry.id_financeiro, data,
+                                                          "Entrada" if entry.tipo == 'entrada' else "Saída",
+                                                          entry.descricao or "", format_money(entry.valor)))
+        fim = self.financial_end_entry.get_date().strftime("%d/%m/%Y")
+        self.financial_balance_label.config(text=f"Entradas {entradas.format(symbol=True)}   "
+                                                 f"Saídas {saidas.format(symbol=True)}   "
+                                                 f"Saldo em {fim}: {saldo.format(symbol=True)}")
+
+    def close_financial_periods(self):
+        if not GUIComponents.ask_yes_no("Financeiro", "Fechar todos os meses já encerrados? Depois disso não "
+                                                      "será possível lançar em datas desses meses."):
+            return
+        try:
+            closed = self.financial_manager.close_periods()
+        except Exception as e:
+            GUIComponents.show_error("Erro", f"Erro ao fechar os períodos: {e}")
+            return
+        if not closed:
+            GUIComponents.show_info("Financeiro", "Não há meses encerrados em aberto.")
+            return
+        ultimo = closed[-1]
+        GUIComponents.show_info("Financeiro", f"{len(closed)} mês(es) fechado(s), até {ultimo.periodo}: saldo "
+                                              f"{format_money(ultimo.saldo, symbol=True)}.")
 
     # --- Sale Methods ---
     def add_sale_item(self):
-        # Implement logic to add item to a temporary list for the current sale
-        GUIComponents.show_info("Venda", "Funcionalidade de adicionar item em desenvolvimento.")
+        produto_id = self._picker_value("sale_product")
+        if produto_id is None:
+            GUIComponents.show_error("Erro", "Selecione um produto.")
+            return
+        try:
+            quantidade = int(self.sale_quantidade_entry.get())
+        except ValueError:
+            quantidade = 0
+        if quantidade <= 0:
+            GUIComponents.show_error("Erro", "A quantidade deve ser um número inteiro maior que zero.")
+            return
+
+        product = self.product_manager.get_product_by_id(produto_id)
+        if product is None:
+            GUIComponents.show_error("Erro", "Produto não encontrado.")
+            return
+        # Quantidade deste produto já incluída em outros itens da venda
+        reservado = sum(qtd for pid, qtd in self.sale_items.values() if pid == produto_id)
+        if reservado + quantidade > product.stock_quantity:
+            GUIComponents.show_warning("Estoque", f"Estoque insuficiente para '{product.nome}': "
+                                                 f"{product.stock_quantity - reservado} disponível(is).")
+            return
+
+        subtotal = Money(product.preco_venda) * quantidade
+        iid = self.sale_items_list.insert("", "end", values=(product.id_produto, product.nome, quantidade,
+                                                             format_money(product.preco_venda),
+                                                             subtotal.format()))
+        self.sale_items[iid] = (produto_id, quantidade)
+        self.sale_item_totals[iid] = subtotal
+        self.sale_product_combo.set('')
+        self.sale_quantidade_entry.delete(0, 'end')
+        self.sale_quantidade_entry.insert(0, "1")
+        self.update_sale_totals()
 
     def finalize_sale(self):
-        # Implement logic to finalize the sale, update stock, record transaction
-        GUIComponents.show_info("Venda", "Funcionalidade de finalizar venda em desenvolvimento.")
+        cliente_id = self._picker_value("sale_client")
+        if cliente_id is None:
+            GUIComponents.show_error("Erro", "Selecione o cliente da venda.")
+            return
+        if not self.sale_items:
+            GUIComponents.show_error("Erro", "Adicione ao menos um item à venda.")
+            return
+        try:
+            desconto = Money.parse(self.sale_desconto_entry.get())
+            valor_pago = Money.parse(self.sale_valor_pago_entry.get())
+        except ValueError:
+            GUIComponents.show_error("Erro", "Desconto ou valor pago inválido.")
+            return
+        total = sum(self.sale_item_totals.values(), Money(0)) - desconto
+        if valor_pago > 0 and valor_pago < total:
+            GUIComponents.show_error("Erro", "O valor pago é menor que o total da venda.")
+            return
+
+        try:
+            sale = self.sale_manager.finalize_sale(cliente_id, self.logged_in_user.id_usuario,
+                                                   list(self.sale_items.values()), desconto)
+        except InsufficientStockError as e:
+            # Outro caixa pode ter vendido o produto depois que o item entrou no carrinho
+            lines = "\n".join(f"{self.product_manager.get_product_by_id(produto_id).nome}: "
+                              f"pedido {pedido}, disponível {disponivel}"
+                              for produto_id, pedido, disponivel in e.shortages)
+            GUIComponents.show_warning("Estoque", f"Estoque insuficiente; a venda não foi gravada.\n{lines}")
+            return
+        except Exception as e:
+            GUIComponents.show_error("Erro", f"Erro ao finalizar a venda: {e}")
+            return
+        troco = valor_pago - sale.total if valor_pago > 0 else Money(0)
+        GUIComponents.show_info("Venda", f"Venda #{sale.id_vendas} registrada: {sale.total.format(symbol=True)}"
+                                         f" (troco {troco.format(symbol=True)}).")
+        # As opções do combo de produtos (nomes) não mudam com a venda: não há o que recarregar
+        self.clear_sale()
 
     # Em gui/main_app.py, dentro da classe Application
 
@@ -1335,33 +1888,26 @@ class Application:
         os valores de desconto/pago são alterados.
         """
         try:
-            # 1. Calcular o Subtotal a partir da Treeview
-            subtotal = 0.0
-            for item_id in self.sale_items_list.get_children():
-                # A coluna 'subtotal' é a 5ª (índice 4)
-                valor_item_str = self.sale_items_list.item(item_id, "values")[4]
-                subtotal += float(valor_item_str)
+            # 1. Subtotal: soma exata, em centavos, dos itens da venda
+            subtotal = sum(self.sale_item_totals.values(), Money(0))
 
-            self.sale_subtotal_label.config(text=f"{subtotal:.2f}")
+            self.sale_subtotal_label.config(text=subtotal.format())
 
             # 2. Obter Desconto e Valor Pago
-            desconto_str = self.sale_desconto_entry.get().replace(",", ".") or "0"
-            valor_pago_str = self.sale_valor_pago_entry.get().replace(",", ".") or "0"
-
-            desconto = float(desconto_str)
-            valor_pago = float(valor_pago_str)
+            desconto = Money.parse(self.sale_desconto_entry.get())
+            valor_pago = Money.parse(self.sale_valor_pago_entry.get())
 
             # 3. Calcular Total e Troco
             total_final = subtotal - desconto
-            troco = valor_pago - total_final if valor_pago > 0 else 0.0
+            troco = valor_pago - total_final if valor_pago > 0 else Money(0)
 
             # Garante que total e troco não sejam negativos
-            total_final = max(0, total_final)
-            troco = max(0, troco)
+            total_final = max(Money(0), total_final)
+            troco = max(Money(0), troco)
 
             # 4. Atualizar os Labels
-            self.sale_total_label.config(text=f"R$ {total_final:.2f}")
-            self.sale_troco_label.config(text=f"R$ {troco:.2f}")
+            self.sale_total_label.config(text=total_final.format(symbol=True))
+            self.sale_troco_label.config(text=troco.format(symbol=True))
 
         except (ValueError, IndexError):
             # Se houver um erro de conversão (ex: texto no campo de preço)
@@ -1375,6 +1921,8 @@ class Application:
         # ... (código anterior para limpar a Treeview e os comboboxes) ...
         for item in self.sale_items_list.get_children():
             self.sale_items_list.delete(item)
+        self.sale_item_totals.clear()
+        self.sale_items.clear()
         self.sale_client_combo.set('')
         self.sale_product_combo.set('')
         self.sale_quantidade_entry.delete(0, 'end')
@@ -1382,9 +1930,9 @@ class Application:
 
         # ATUALIZAÇÃO: Limpar os novos campos financeiros
         self.sale_desconto_entry.delete(0, 'end')
-        self.sale_desconto_entry.insert(0, "0.00")
+        self.sale_desconto_entry.insert(0, "0,00")
         self.sale_valor_pago_entry.delete(0, 'end')
-        self.sale_valor_pago_entry.insert(0, "0.00")
+        self.sale_valor_pago_entry.insert(0, "0,00")
 
         # Chama a função de update para zerar os labels
         self.update_sale_totals()
@@ -4,6 +4,8 @@ import tkinter as tk
 from gui.login_app import LoginApp  # Importa a classe da tela de login
 from gui.main_app import Application  # Importa a classe da aplicação principal
 from database.database_manager import DatabaseManager  # Importa para criar as tabelas
+from erp_refatorado.business_logic.cache import cache_stats
+from erp_refatorado.business_logic.product_manager import ProductManager
 
 
 def main():
@@ -14,17 +16,26 @@ def main():
     # Isso é importante para que o login possa consultar a tabela de usuários
     print("Inicializando o sistema e verificando o banco de dados...")
     db_manager = DatabaseManager()
-    # A classe DatabaseManager já deve ter o método para criar as tabelas
-    if hasattr(db_manager, 'create_tables'):
-        db_manager.create_tables()
+    if db_manager.memory is not None:
+        # SOFTX_DB_MEMORY=1: tudo roda sobre uma cópia em memória (ver config.DB_MEMORY)
+        destino = db_manager.memory.save_path or "descartadas ao sair"
+        print(f"Banco em memória carregado de {db_manager.memory.template or '(banco vazio)'}; "
+              f"alterações: {destino}")
+    # Só aplica as migrações quando o esquema não está na versão mais recente
+    if db_manager.needs_migration():
+        db_manager.migrate()
     else:
-        # Se não tiver, você pode adicionar a lógica aqui ou na própria classe
-        print("Aviso: Método 'create_tables' não encontrado no DatabaseManager.")
-        print("Certifique-se de que as tabelas já existem no banco de dados.")
+        print(f"Esquema do banco de dados atualizado (versão {db_manager.schema_version()}).")
+
+    # Confere se os PRAGMAs do perfil de desempenho estão realmente em vigor
+    db_manager.check_pragmas()
+
+    # Manutenção da razão do estoque: checkpoint das quantidades, se já for a hora
+    ProductManager(db_manager).checkpoint_stock(only_if_due=True)
 
     # Passo 2: Iniciar a tela de login
     login_root = tk.Tk()
-    login_app = LoginApp(login_root)
+    login_app = LoginApp(login_root, db_manager=db_manager)
     login_root.mainloop()  # Este loop pausa o código aqui até a janela de login ser fechada
 
     # Passo 3: Verificar se o login foi bem-sucedido
@@ -35,11 +46,22 @@ def main():
 
         # Passo 4: Iniciar a aplicação principal
         main_root = tk.Tk()
-        app = Application(main_root, logged_in_user=login_app.logged_in_user)  # Passa o usuário logado para a app
+        # Passa o usuário logado e o DatabaseManager (com o pool de conexões já aberto) para a app
+        app = Application(main_root, logged_in_user=login_app.logged_in_user, db_manager=db_manager)
         main_root.mainloop()
     else:
         print("Login cancelado ou falhou. Encerrando o programa.")
 
+    # Estatísticas só no modo de diagnóstico (SOFTX_QUERY_STATS=1)
+    if db_manager.query_stats_enabled:
+        print(f"Estatísticas do pool de conexões: {db_manager.pool_stats()}")
+        for table, stats in cache_stats(db_manager).items():
+            print(f"Cache de {table}: {stats}")
+        db_manager.print_query_stats()
+        db_manager.print_catalog_stats()
+        db_manager.dump_query_stats()
+    db_manager.close()
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,156 @@
+# Em erp_refatorado/models/mapping.py
+
+import dataclasses
+import threading
+from functools import lru_cache
+from erp_refatorado.models.money import Money
+from erp_refatorado.models.tracking import TrackedModel
+
+# Conversão de linhas do SQLite em modelos, guiada por cursor.description (o nome de
+# cada coluna do SELECT) em vez de índices fixos escritos à mão em cada manager.
+#
+# Para cada par (modelo, colunas da consulta) é gerada e guardada uma função do tipo
+#     def map_row(row): return Client(id_cliente=row[0], nome_cliente=row[1], ...)
+# então o custo de descobrir quais colunas vão para quais campos é pago uma vez só.
+# Colunas que não são campos do modelo são ignoradas; campos sem coluna ficam com o
+# padrão do modelo. Para colunas calculadas, use um alias com o nome do campo
+# (ex.: "COALESCE(s.quantidade, 0) AS stock_quantity").
+#
+# Os valores não são copiados: o modelo aponta para os mesmos objetos da tupla. A
+# exceção são os campos do tipo Money, que o SQLite devolve como int: o conversor os
+# embrulha em Money (Money(row[3])), para que .format() e afins funcionem no modelo lido.
+# Modelos com rastreamento (TrackedModel) também guardam a tupla lida, para saber
+# depois quais campos foram alterados (ver models/tracking.py).
+
+_mappers = {}
+_views = {}
+_lock = threading.Lock()
+
+
+def _columns(cursor):
+    return tuple(column[0] for column in cursor.description)
+
+
+def _field_positions(model, columns):
+    # {campo: posição na linha}; se a consulta repetir um nome, vale a primeira coluna
+    fields = {f.name for f in dataclasses.fields(model)}
+    positions = {}
+    for i, name in enumerate(columns):
+        if name in fields and name not in positions:
+            positions[name] = i
+    return positions
+
+
+def _to_money(value):
+    return value if value is None else Money(value)
+
+
+@lru_cache(maxsize=None)
+def _money_fields(model):
+    """Nomes dos campos do modelo anotados como Money."""
+    return frozenset(f.name for f in dataclasses.fields(model) if f.type in (Money, 'Money'))
+
+
+def compile_mapper(model, columns):
+    """Retorna a função (compilada e guardada) que converte uma linha com essas colunas no modelo."""
+    key = (model, columns)
+    mapper = _mappers.get(key)
+    if mapper is None:
+        positions = _field_positions(model, columns)
+        money = _money_fields(model)
+        args = ", ".join(f"{name}=money(row[{i}])" if name in money else f"{name}=row[{i}]"
+                         for name, i in positions.items())
+        namespace = {'Model': model, 'POSITIONS': positions, 'money': _to_money}
+        if issubclass(model, TrackedModel):
+            source = (f"def map_row(row):\n    obj = Model({args})\n"
+                      f"    obj._loaded_row = row\n    obj._loaded_positions = POSITIONS\n    return obj")
+        else:
+            source = f"def map_row(row):\n    return Model({args})"
+        exec(source, namespace)
+        with _lock:
+            mapper = _mappers.setdefault(key, namespace['map_row'])
+    return mapper
+
+
+def row_mapper(cursor, model):
+    """Conversor de linhas para o último SELECT executado no cursor."""
+    return compile_mapper(model, _columns(cursor))
+
+
+def fetch_models(cursor, model):
+    """Lê todas as linhas do cursor como instâncias do modelo."""
+    mapper = row_mapper(cursor, model)
+    return list(map(mapper, cursor.fetchall()))
+
+
+def fetch_model(cursor, model):
+    """Lê uma linha do cursor como instância do modelo (None se não houver)."""
+    row = cursor.fetchone()
+    return row_mapper(cursor, model)(row) if row is not None else None
+
+
+class RowView:
+    """
+    Visão "preguiçosa" de uma linha: guarda só a tupla devolvida pelo SQLite e lê cada
+    campo dela quando acessado (view.nome_cliente), sem construir o modelo. Serve para
+    listas grandes em que a maioria das linhas só é percorrida ou exibida em parte.
+    Use to_model() para obter o objeto completo (ex.: antes de editar e gravar).
+    """
+
+    __slots__ = ('_row',)
+    _model = None
+    _columns = ()
+
+    def __init__(self, row):
+        self._row = row
+
+    def to_model(self):
+        return compile_mapper(self._model, self._columns)(self._row)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self._row == other._row
+
+    def __hash__(self):
+        return hash(self._row)
+
+    def __repr__(self):
+        fields = ", ".join(f"{f.name}={getattr(self, f.name)!r}" for f in dataclasses.fields(self._model))
+        return f"{type(self).__name__}({fields})"
+
+
+def _view_field(position):
+    return property(lambda self: self._row[position])
+
+
+def _view_money_field(position):
+    return property(lambda self: _to_money(self._row[position]))
+
+
+def _view_default(f):
+    value = f.default_factory() if f.default is dataclasses.MISSING else f.default
+    return property(lambda self: value)
+
+
+def row_view_class(model, columns):
+    """Classe de RowView (gerada e guardada) para o modelo e as colunas da consulta."""
+    key = (model, columns)
+    view = _views.get(key)
+    if view is None:
+        positions = _field_positions(model, columns)
+        attrs = {'__slots__': (), '_model': model, '_columns': columns}
+        for f in dataclasses.fields(model):
+            if f.name not in positions:
+                attrs[f.name] = _view_default(f)
+            elif f.name in _money_fields(model):
+                attrs[f.name] = _view_money_field(positions[f.name])
+            else:
+                attrs[f.name] = _view_field(positions[f.name])
+        with _lock:
+            view = _views.setdefault(key, type(f"{model.__name__}View", (RowView,), attrs))
+    return view
+
+
+def fetch_views(cursor, model):
+    """Lê todas as linhas do cursor como RowViews do modelo."""
+    view = row_view_class(model, _columns(cursor))
+    return list(map(view, cursor.fetchall()))
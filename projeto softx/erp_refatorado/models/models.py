@@ -1,9 +1,21 @@
+import dataclasses
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional
 
-@dataclass
-class User:
+from erp_refatorado.models.money import Money
+from erp_refatorado.models.tracking import TrackedModel
+
+# Os modelos usam slots=True: sem __dict__ por instância, cada objeto ocupa bem menos
+# memória (importa em listas de centenas de milhares de linhas) e atributos com nome
+# errado dão erro em vez de serem criados em silêncio.
+#
+# Valores em dinheiro são Money: inteiros em centavos (ver models/money.py).
+# Os modelos editáveis herdam de TrackedModel: sabem quais campos mudaram desde a
+# leitura, e os update_* gravam só esses (ver models/tracking.py).
+
+@dataclass(slots=True)
+class User(TrackedModel):
     id_usuario: Optional[int] = None
     nome_usuario: str = field(default="")
     cpf_usuario: str = field(default="")
@@ -18,8 +30,8 @@ class User:
     tipo: str = field(default="vendedor") # admin, vendedor, financeiro, estoque
     permissao: str = field(default="padrao")
 
-@dataclass
-class Client:
+@dataclass(slots=True)
+class Client(TrackedModel):
     id_cliente: Optional[int] = None
     nome_cliente: str = field(default="")
     cpf_cliente: str = field(default="")
@@ -31,8 +43,8 @@ class Client:
     bairro: str = field(default="")
     cidade: str = field(default="")
 
-@dataclass
-class Supplier:
+@dataclass(slots=True)
+class Supplier(TrackedModel):
     id_fornecedor: Optional[int] = None
     nome: str = field(default="")
     cnpj: str = field(default="")
@@ -43,43 +55,105 @@ class Supplier:
     bairro: str = field(default="")
     cidade: str = field(default="")
 
-@dataclass
-class Product:
+@dataclass(slots=True)
+class Product(TrackedModel):
     id_produto: Optional[int] = None
     nome: str = field(default="")
     descricao: Optional[str] = None
-    preco_venda: float = field(default=0.0)
-    preco_compra: float = field(default=0.0)
+    preco_venda: Money = field(default=Money(0))
+    preco_compra: Money = field(default=Money(0))
     fornecedor_id: Optional[int] = None
+    # Preenchidos pela listagem de produtos (JOIN com estoque e fornecedores); não são gravados
+    stock_quantity: int = field(default=0)
+    fornecedor_nome: str = field(default="")
 
-@dataclass
+@dataclass(slots=True)
 class Stock:
     id_estoque: Optional[int] = None
     produto_id: int = field(default=0)
     quantidade: int = field(default=0)
 
-@dataclass
+@dataclass(slots=True)
+class StockMovement:
+    id_movimento: Optional[int] = None
+    produto_id: int = field(default=0)
+    tipo: str = field(default="entrada") # entrada, saida, ajuste
+    quantidade: int = field(default=0) # variação: negativa nas saídas
+    referencia: Optional[str] = None
+    usuario_id: Optional[int] = None
+    data: str = field(default_factory=lambda: datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+
+@dataclass(slots=True)
 class Sale:
     id_vendas: Optional[int] = None
     cliente_id: int = field(default=0)
     usuario_id: int = field(default=0)
     data_venda: str = field(default_factory=lambda: datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-    total: float = field(default=0.0)
+    total: Money = field(default=Money(0))
+    desconto: Money = field(default=Money(0))
+
+@dataclass(slots=True)
+class SaleItem:
+    id_item: Optional[int] = None
+    venda_id: Optional[int] = None
+    produto_id: int = field(default=0)
+    quantidade: int = field(default=1)
+    preco_unitario: Money = field(default=Money(0))
+    subtotal: Money = field(default=Money(0))
+
+@dataclass(slots=True)
+class SalesSummary:
+    chave: str = field(default="") # dia (AAAA-MM-DD), nome do vendedor ou do cliente
+    vendas: int = field(default=0)
+    itens: int = field(default=0)
+    desconto: Money = field(default=Money(0))
+    total: Money = field(default=Money(0))
 
-@dataclass
+@dataclass(slots=True)
 class Purchase:
     id_compras: Optional[int] = None
     fornecedor_id: int = field(default=0)
     usuario_id: int = field(default=0)
     data_compra: str = field(default_factory=lambda: datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-    total: float = field(default=0.0)
+    total: Money = field(default=Money(0))
 
-@dataclass
+@dataclass(slots=True)
 class Financial:
     id_financeiro: Optional[int] = None
     tipo: str = field(default="entrada") # entrada, saida
-    valor: float = field(default=0.0)
+    valor: Money = field(default=Money(0))
     descricao: Optional[str] = None
     data: str = field(default_factory=lambda: datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
 
+@dataclass(slots=True)
+class DailyBalance:
+    dia: str = field(default="") # AAAA-MM-DD
+    entradas: Money = field(default=Money(0))
+    saidas: Money = field(default=Money(0))
+    saldo: Money = field(default=Money(0)) # saldo no fim do dia
+
+@dataclass(slots=True)
+class FinancialClosing:
+    periodo: str = field(default="") # AAAA-MM
+    ate: str = field(default="") # último dia do período (AAAA-MM-DD)
+    entradas: Money = field(default=Money(0))
+    saidas: Money = field(default=Money(0))
+    saldo: Money = field(default=Money(0)) # saldo no fim do período
+    data_fechamento: str = field(default_factory=lambda: datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+
+
+def _frozen_variant(cls):
+    """Cria a variante imutável (frozen) de um modelo, com os mesmos campos e padrões."""
+    fields = [(f.name, f.type, field(default=f.default, default_factory=f.default_factory))
+              for f in dataclasses.fields(cls)]
+    frozen = dataclasses.make_dataclass(f"Frozen{cls.__name__}", fields, frozen=True, slots=True)
+    frozen.__module__ = __name__
+    return frozen
+
 
+# Variantes imutáveis (e hasheáveis), para resultados que são só lidos ou compartilhados
+# entre telas/threads: qualquer tentativa de alteração levanta FrozenInstanceError.
+FrozenUser = _frozen_variant(User)
+FrozenClient = _frozen_variant(Client)
+FrozenSupplier = _frozen_variant(Supplier)
+FrozenProduct = _frozen_variant(Product)
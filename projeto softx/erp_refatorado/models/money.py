@@ -0,0 +1,109 @@
+# Em erp_refatorado/models/money.py
+
+import re
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+# Valores em dinheiro são guardados como número inteiro de centavos (R$ 19,99 -> 1999),
+# no modelo e no banco (colunas INTEGER). Somas e diferenças ficam exatas e com a
+# velocidade de inteiros, tanto em Python quanto num SUM() do SQLite; float só
+# aparece, se aparecer, na hora de ler o que o usuário digitou.
+#
+# Money é um int: funciona em qualquer lugar que espera um inteiro (parâmetros do
+# sqlite3, sum(), comparações). Conversão de/para texto só na interface:
+#     Money.parse("1.234,56") -> Money(123456)      Money(123456).format() -> "1.234,56"
+
+_CENT = Decimal("0.01")
+
+
+class Money(int):
+    """Valor monetário em centavos."""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_reais(cls, value):
+        """Converte um valor em reais (Decimal, int, str "19.99" ou float) para centavos, arredondando."""
+        if isinstance(value, float):
+            # repr dá a menor representação exata do float (0.1 -> "0.1", não 0.1000000000000000055...)
+            value = repr(value)
+        try:
+            reais = Decimal(value)
+        except InvalidOperation:
+            raise ValueError(f"Valor monetário inválido: {value!r}") from None
+        if not reais.is_finite():
+            raise ValueError(f"Valor monetário inválido: {value!r}")
+        return cls(int(reais.quantize(_CENT, rounding=ROUND_HALF_UP).scaleb(2)))
+
+    @classmethod
+    def parse(cls, text):
+        """
+        Lê um valor digitado pelo usuário: "19,99", "19.99", "R$ 1.234,56", "-5".
+        Se houver vírgula ela é o separador decimal e os pontos são de milhar.
+        Texto vazio vale zero; texto inválido levanta ValueError.
+        """
+        text = re.sub(r"[R$\s]", "", str(text or ""))
+        if not text:
+            return cls(0)
+        if "," in text:
+            text = text.replace(".", "").replace(",", ".")
+        return cls.from_reais(text)
+
+    @property
+    def reais(self) -> Decimal:
+        """O valor em reais, como Decimal exato."""
+        return Decimal(int(self)).scaleb(-2)
+
+    def format(self, symbol=False) -> str:
+        """Texto no padrão brasileiro: "1.234,56" (ou "R$ 1.234,56" com symbol=True)."""
+        sign = "-" if self < 0 else ""
+        reais, centavos = divmod(abs(int(self)), 100)
+        text = f"{sign}{reais:,}".replace(",", ".") + f",{centavos:02d}"
+        return f"R$ {text}" if symbol else text
+
+    def __str__(self):
+        return self.format()
+
+    def __repr__(self):
+        return f"Money({int(self)})"
+
+    # Operações entre valores (e com inteiros) continuam sendo Money
+    def __add__(self, other):
+        if not isinstance(other, int):
+            return NotImplemented
+        return Money(int(self) + int(other))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if not isinstance(other, int):
+            return NotImplemented
+        return Money(int(self) - int(other))
+
+    def __rsub__(self, other):
+        if not isinstance(other, int):
+            return NotImplemented
+        return Money(int(other) - int(self))
+
+    def __mul__(self, quantity):
+        # Preço x quantidade; para percentuais use scale()
+        if not isinstance(quantity, int):
+            return NotImplemented
+        return Money(int(self) * int(quantity))
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return Money(-int(self))
+
+    def __abs__(self):
+        return Money(abs(int(self)))
+
+    def scale(self, factor):
+        """Multiplica por um fator (ex.: Decimal("0.10") para 10%), arredondando para o centavo."""
+        value = Decimal(int(self)) * Decimal(str(factor) if isinstance(factor, float) else factor)
+        return Money(int(value.quantize(Decimal(1), rounding=ROUND_HALF_UP)))
+
+
+def format_money(value, symbol=False):
+    """Formata centavos (Money ou int lido do banco) para exibição."""
+    return Money(value or 0).format(symbol)
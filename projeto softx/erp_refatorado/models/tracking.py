@@ -0,0 +1,75 @@
+# Em erp_refatorado/models/tracking.py
+
+import dataclasses
+from functools import lru_cache
+
+# Rastreamento de campos alterados desde a leitura do banco, para que os update_* dos
+# managers gravem só as colunas que mudaram (e não gravem nada se nada mudou).
+#
+# Não há custo em cada atribuição: ao converter uma linha (models/mapping.py), o modelo
+# guarda uma referência à própria tupla lida e às posições de cada campo nela. A
+# comparação com os valores atuais só acontece quando alguém pergunta o que mudou.
+# Modelos criados à mão (sem leitura) não têm esse registro: tudo conta como alterado.
+#
+# Os objetos do cache são compartilhados; para alterar um deles use edit(), que cria
+# uma cópia com as mudanças e mantém o registro da leitura original.
+
+
+class TrackedModel:
+    """Base dos modelos com rastreamento de alterações (User, Client, Supplier, Product)."""
+
+    __slots__ = ('_loaded_row', '_loaded_positions')
+
+
+@lru_cache(maxsize=None)
+def _field_names(model):
+    return tuple(f.name for f in dataclasses.fields(model))
+
+
+@lru_cache(maxsize=None)
+def _own_positions(model):
+    return {name: i for i, name in enumerate(_field_names(model))}
+
+
+def mark_loaded(obj, row, positions):
+    """Registra a linha da qual o modelo foi lido; positions é {campo: índice na linha}."""
+    obj._loaded_row = row
+    obj._loaded_positions = positions
+
+
+def mark_clean(obj):
+    """Passa a considerar os valores atuais como os gravados (ex.: depois de um UPDATE)."""
+    if isinstance(obj, TrackedModel):
+        names = _field_names(type(obj))
+        mark_loaded(obj, tuple(getattr(obj, name) for name in names), _own_positions(type(obj)))
+
+
+def changed_fields(obj, names=None):
+    """
+    Campos (dentre names, ou todos) cujo valor difere do lido do banco. Retorna None se
+    o modelo não veio do banco, ou seja, se não há como saber (trate como tudo alterado).
+    Campos que a consulta de leitura não trouxe contam como alterados.
+    """
+    row = getattr(obj, '_loaded_row', None)
+    if row is None:
+        return None
+    positions = obj._loaded_positions
+    return [name for name in (names or _field_names(type(obj)))
+            if name not in positions or getattr(obj, name) != row[positions[name]]]
+
+
+def loaded_value(obj, name):
+    """Valor do campo na linha lida do banco, ou None se o modelo (ou o campo) não veio de uma leitura."""
+    row = getattr(obj, '_loaded_row', None)
+    if row is None or name not in obj._loaded_positions:
+        return None
+    return row[obj._loaded_positions[name]]
+
+
+def edit(obj, **changes):
+    """Cópia do modelo com as alterações, mantendo o registro da leitura original."""
+    copy = dataclasses.replace(obj, **changes)
+    row = getattr(obj, '_loaded_row', None)
+    if row is not None:
+        mark_loaded(copy, row, obj._loaded_positions)
+    return copy